@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Benchmarks - Measure the bot's capture and analysis pipeline offline
+
+Runs against saved screenshots, so no game window (or Windows) is needed:
+  python benchmark.py capture --source screenshots --fps 30 --seconds 5
+  python benchmark.py match
+  python benchmark.py ocr --frames screenshots/loot --labels screenshots/loot/labels.json
+  python benchmark.py evaluate --frames screenshots --backend cascade --stub --output results.csv
+  python benchmark.py backends --frames screenshots --labels screenshots/labels.json --stub
+  python benchmark.py stream
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from src.core.frame import Frame
+from src.core.frame_source import DirectoryFrameSource
+from src.core.frame_buffer import FrameRingBuffer, ContinuousCapture
+from src.core.template_registry import TemplateRegistry
+from src.core.template_matcher import TemplateMatcher
+from src.core.loot_ocr import LootOCR
+from src.core.townhall_detector import TownHallDetector
+from src.core.ai_analyzer import AIAnalyzer
+from src.core.payload_builder import PayloadBuilder
+from src.core.decision_cascade import Decision
+from src.core.analyzer_backends import BACKENDS, AnalyzerBackend, CascadeBackend, create_backend
+from src.core.batch_evaluator import BatchEvaluator, StaticCoordinates
+from src.utils.gemini_stub import GeminiStub
+from src.utils.http_cassette import HttpCassette
+from src.utils.rate_limiter import TokenBucket
+
+def benchmark_capture(args) -> None:
+    """Continuous capture into the ring buffer, read by a waiting consumer"""
+    print("=== BENCHMARK: Continuous Capture ===")
+
+    source = DirectoryFrameSource(args.source)
+    if not source.files:
+        return
+
+    buffer = FrameRingBuffer(args.buffer)
+    capture = ContinuousCapture(source, buffer, args.fps)
+
+    frames_read = 0
+    wakeup_latencies = []
+    sequence = 0
+
+    capture.start()
+    end_time = time.monotonic() + args.seconds
+    while time.monotonic() < end_time:
+        frame = buffer.wait_for_newer(sequence, timeout=1.0)
+        if frame is None:
+            continue
+        wakeup_latencies.append(time.time() - frame.timestamp)
+        sequence = frame.sequence
+        frames_read += 1
+    capture.stop()
+
+    stats = capture.get_stats()
+    wakeup_latencies.sort()
+    print(f"Source: {args.source} ({len(source.files)} images)")
+    print(f"Target FPS: {stats['target_fps']}")
+    print(f"Actual FPS: {stats['actual_fps']:.1f}")
+    print(f"Frames captured: {stats['frames_captured']} (missed ticks: {stats['missed_ticks']})")
+    print(f"Frames read by consumer: {frames_read}")
+    print(f"Average grab + buffer write: {stats['avg_grab_ms']:.2f} ms")
+    if wakeup_latencies:
+        median = wakeup_latencies[len(wakeup_latencies) // 2]
+        print(f"Median capture-to-consumer latency: {median * 1000:.2f} ms")
+
+def _synthetic_frame(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """Smooth textured frame with button-like shapes, a stand-in for a game screen"""
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+    for i in range(12):
+        x, y = int(rng.integers(0, width - 200)), int(rng.integers(0, height - 80))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(image, (x, y), (x + 180, y + 70), color, -1)
+        cv2.putText(image, f"BTN{i}", (x + 20, y + 50), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (255, 255, 255), 3)
+    return image
+
+def _time_match(matcher: TemplateMatcher, frame: Frame, name: str, mode: str, repeats: int):
+    """Average milliseconds per match and the last match result"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        match = matcher.match(frame, name, 0.8, mode=mode)
+    return (time.perf_counter() - start) / repeats * 1000, match
+
+def benchmark_match(args) -> None:
+    """Exhaustive vs pyramid (coarse-to-fine + learned ROI) template matching"""
+    print("=== BENCHMARK: Template Matching ===")
+
+    work_dir = tempfile.mkdtemp(prefix="coc_bench_")
+    try:
+        for width, height in [(1920, 1080), (2560, 1440)]:
+            image = _synthetic_frame(width, height)
+            # Cut templates out of known positions, like mapped game buttons
+            positions = {"next_button": (width - 260, height - 180), "return_home": (width // 2 - 90, height - 150)}
+            for name, (x, y) in positions.items():
+                cv2.imwrite(os.path.join(work_dir, f"{name}.png"), image[y:y + 90, x:x + 180])
+
+            registry = TemplateRegistry(work_dir)
+            frame = Frame(image)
+            print(f"\n{width}x{height} frame:")
+
+            for name in positions:
+                exhaustive = TemplateMatcher(registry, mode=TemplateMatcher.EXHAUSTIVE)
+                exhaustive_ms, expected = _time_match(exhaustive, frame, name, TemplateMatcher.EXHAUSTIVE, args.repeats)
+
+                pyramid = TemplateMatcher(registry, mode=TemplateMatcher.PYRAMID, pyramid_level=args.level)
+                coarse_ms = 0.0
+                for _ in range(args.repeats):
+                    pyramid.forget_rois()
+                    elapsed, coarse_match = _time_match(pyramid, frame, name, TemplateMatcher.PYRAMID, 1)
+                    coarse_ms += elapsed / args.repeats
+                roi_ms, roi_match = _time_match(pyramid, frame, name, TemplateMatcher.PYRAMID, args.repeats)
+
+                agree = coarse_match.location == expected.location and roi_match.location == expected.location
+                print(f"  {name}:")
+                print(f"    exhaustive:          {exhaustive_ms:8.2f} ms  (score {expected.score:.3f})")
+                print(f"    pyramid (no ROI):    {coarse_ms:8.2f} ms  ({exhaustive_ms / max(coarse_ms, 1e-6):.1f}x)")
+                print(f"    pyramid (learned):   {roi_ms:8.2f} ms  ({exhaustive_ms / max(roi_ms, 1e-6):.1f}x)")
+                print(f"    same location: {'yes' if agree else 'NO'}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def benchmark_ocr(args) -> None:
+    """Local loot OCR accuracy and latency on labelled screenshots"""
+    print("=== BENCHMARK: Loot OCR ===")
+
+    with open(args.coordinates, 'r') as f:
+        coordinates = json.load(f)
+    offset = tuple(int(v) for v in args.offset.split(","))
+
+    ocr = LootOCR()
+    ocr.glyph_dir = args.glyphs
+    if args.learn:
+        # Build the glyph library from the first labelled frames
+        with open(args.labels, 'r') as f:
+            labels = json.load(f)
+        for filename in sorted(labels)[:args.learn]:
+            image = cv2.imread(os.path.join(args.frames, filename), cv2.IMREAD_COLOR)
+            if image is not None:
+                ocr.learn_glyphs(Frame(image, offset=offset), coordinates, labels[filename])
+
+    if not ocr.load_glyphs():
+        print(f"No digit glyphs in {args.glyphs} (use --learn N to build them from labelled frames)")
+        return
+
+    results = ocr.evaluate(args.frames, args.labels, coordinates, offset)
+    print(f"Frames: {results['frames']} (glyphs: {len(ocr.glyph_labels)})")
+    for resource, accuracy in results['accuracy'].items():
+        print(f"  {resource:12s} {accuracy:6.1f}% correct")
+    print(f"All three correct: {results['exact_match_rate']:.1f}%")
+    print(f"Latency per frame: mean {results['mean_ms']:.2f} ms, p95 {results['p95_ms']:.2f} ms")
+    for filename, resource, expected, actual in results['errors'][:10]:
+        print(f"  {filename}: {resource} expected {expected}, read {actual}")
+
+class _OfflineConfig:
+    """Dotted-key lookups over a plain dict, standing in for Config in offline runs"""
+
+    def __init__(self, values: dict):
+        self.values = values
+
+    def get(self, key_path: str, default=None):
+        value = self.values
+        for key in key_path.split("."):
+            if not isinstance(value, dict) or key not in value:
+                return default
+            value = value[key]
+        return value
+
+class _OfflineBot:
+    """The bot's analysis components built from benchmark arguments instead of the live config"""
+
+    def __init__(self, args, gemini: bool):
+        """
+        Args:
+            gemini: Start an AIAnalyzer (against the stub or --base-url) for the gemini stage
+        """
+        self.config = _OfflineConfig({
+            'loot_ocr': {'glyph_dir': args.glyphs},
+            'townhall_detector': {'sprite_dir': args.sprites},
+            'ai_analyzer': {'enabled': gemini, 'workers': args.workers, 'decision_deadline': args.deadline},
+            'analysis_cache': {'enabled': args.cache},
+            'decision_cascade': {'stages': ['townhall', 'ocr', 'gemini']},
+            'mock_backend': {'seed': 0}
+        })
+        self.coordinates = (StaticCoordinates.load(args.coordinates) if os.path.exists(args.coordinates)
+                            else StaticCoordinates({}))
+        self.loot_ocr = LootOCR(self.config)
+        self.loot_ocr.load_glyphs()
+        self.townhall_detector = TownHallDetector(self.config)
+        self.payload_builder = PayloadBuilder(self.coordinates, self.townhall_detector, self.loot_ocr, self.config)
+
+        self.stub = None
+        self.analyzer = None
+        if gemini:
+            base_url = args.base_url
+            if args.stub:
+                cassette = HttpCassette(args.cassette) if args.cassette else None
+                self.stub = GeminiStub(latency=args.stub_latency, error_rate=args.stub_error_rate, cassette=cassette,
+                                       replay_latency=args.replay_latency)
+                self.stub.start()
+                base_url = self.stub.url
+            self.analyzer = AIAnalyzer(args.api_key, logging.getLogger("benchmark"), base_url=base_url,
+                                       config=self.config)
+
+    def backend(self, name: str) -> AnalyzerBackend:
+        return create_backend(name, self.config, logging.getLogger("benchmark"), self.analyzer, self.loot_ocr,
+                              self.townhall_detector, self.coordinates, self.payload_builder)
+
+    def close(self) -> None:
+        if self.analyzer:
+            self.analyzer.close()
+        if self.stub:
+            self.stub.stop()
+
+def _thresholds(args) -> dict:
+    return {'gold': args.min_gold, 'elixir': args.min_elixir, 'dark_elixir': args.min_dark,
+            'max_townhall_level': args.max_townhall}
+
+def _describe(backend: AnalyzerBackend) -> str:
+    if isinstance(backend, CascadeBackend):
+        return ", ".join(stage.name for stage in backend.cascade.stages if stage.is_available())
+    return backend.name
+
+def benchmark_evaluate(args) -> None:
+    """A decision backend over a directory of saved frames: accuracy, throughput, latency"""
+    print("=== BENCHMARK: Batch Evaluation ===")
+
+    gemini = args.backend in ("gemini", "cascade") and (args.stub or args.base_url)
+    if args.backend == "gemini" and not gemini:
+        print("The gemini backend needs --stub or --base-url (offline runs only use the stub)")
+        return
+
+    bot = _OfflineBot(args, bool(gemini))
+    backend = bot.backend(args.backend)
+    if not backend.is_available():
+        print(f"Backend '{args.backend}' has nothing to work with "
+              f"(no digit glyphs in {args.glyphs}, no sprites in {args.sprites})")
+        bot.close()
+        return
+
+    offset = tuple(int(v) for v in args.offset.split(","))
+    rate_limiter = TokenBucket(args.rate, args.burst) if args.rate > 0 else None
+    evaluator = BatchEvaluator(backend, _thresholds(args), args.workers, rate_limiter, offset)
+
+    try:
+        results = evaluator.run(args.frames, args.limit)
+    finally:
+        bot.close()
+
+    if not results:
+        print(f"No frames found in {args.frames}")
+        return
+
+    summary = evaluator.summarize(results)
+    print(f"Backend: {args.backend} ({_describe(backend)})")
+    print(f"Frames: {summary['frames']} (errors: {summary['errors']}) in {summary['elapsed']:.2f}s "
+          f"with {args.workers} workers" + (f", rate limit {args.rate:g}/s" if rate_limiter else ""))
+    print(f"Throughput: {summary['fps']:.1f} frames/s")
+    print(f"Latency per frame: mean {summary['mean_ms']:.1f} ms, p50 {summary['p50_ms']:.1f} ms, "
+          f"p95 {summary['p95_ms']:.1f} ms, p99 {summary['p99_ms']:.1f} ms")
+    print("Verdicts: " + ", ".join(f"{k} {v}" for k, v in summary['verdicts'].items()))
+    print("Decided by: " + ", ".join(f"{k} {v}" for k, v in summary['stages'].items()))
+    if rate_limiter:
+        print(f"Rate limiter waits: {rate_limiter.get_stats()['wait_seconds']:.2f}s total")
+
+    if args.output:
+        BatchEvaluator.write_csv(results, args.output)
+        print(f"Results written to {args.output}")
+
+    if args.labels:
+        with open(args.labels, 'r') as f:
+            labels = json.load(f)
+        comparison = BatchEvaluator.compare(results, labels)
+        print(f"Labelled frames: {comparison['labelled']}")
+        for field, accuracy in comparison['accuracy'].items():
+            print(f"  {field:15s} {accuracy:6.1f}% correct ({comparison['checked'][field]} checked)")
+        if comparison['confusion']:
+            print("Decisions (expected->actual): " +
+                  ", ".join(f"{k} {v}" for k, v in sorted(comparison['confusion'].items())))
+        for filename, field, expected, actual in comparison['mismatches'][:10]:
+            print(f"  {filename}: {field} expected {expected}, got {actual}")
+
+def benchmark_backends(args) -> None:
+    """Every decision backend over the same frames, side by side"""
+    print("=== BENCHMARK: Decision Backends ===")
+
+    names = BACKENDS if args.backends == "all" else [n.strip() for n in args.backends.split(",") if n.strip()]
+    unknown = [n for n in names if n not in BACKENDS]
+    if unknown:
+        print(f"Unknown backends: {', '.join(unknown)} (use {', '.join(BACKENDS)})")
+        return
+
+    frames = BatchEvaluator.list_frames(args.frames)
+    if not frames:
+        print(f"No frames found in {args.frames}")
+        return
+
+    labels = {}
+    if args.labels:
+        with open(args.labels, 'r') as f:
+            labels = json.load(f)
+
+    gemini = bool(args.stub or args.base_url)
+    bot = _OfflineBot(args, gemini)
+    offset = tuple(int(v) for v in args.offset.split(","))
+    rows = []
+    try:
+        for name in names:
+            if name == "gemini" and not gemini:
+                print("Skipping gemini: needs --stub or --base-url")
+                continue
+            backend = bot.backend(name)
+            if not backend.is_available():
+                print(f"Skipping {name}: nothing to work with")
+                continue
+            evaluator = BatchEvaluator(backend, _thresholds(args), args.workers, offset=offset)
+            results = evaluator.run(args.frames, args.limit)
+            summary = evaluator.summarize(results)
+            accuracy = BatchEvaluator.compare(results, labels)['accuracy'].get('decision') if labels else None
+            rows.append((name, _describe(backend), summary, accuracy))
+    finally:
+        bot.close()
+
+    print(f"Frames: {min(len(frames), args.limit or len(frames))} from {args.frames}, {args.workers} workers")
+    print(f"{'Backend':10s} {'Frames/s':>9s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} "
+          f"{'Attack':>7s} {'Errors':>7s} {'Correct':>8s}  Stages")
+    for name, stages, summary, accuracy in rows:
+        correct = f"{accuracy:7.1f}%" if accuracy is not None else f"{'-':>8s}"
+        print(f"{name:10s} {summary['fps']:9.1f} {summary['p50_ms']:8.1f} {summary['p95_ms']:8.1f} "
+              f"{summary['p99_ms']:8.1f} {summary['verdicts'][Decision.ATTACK]:7d} {summary['errors']:7d} "
+              f"{correct}  {stages}")
+    if labels and not any(accuracy is not None for _, _, _, accuracy in rows):
+        print("No frame has a \"decision\" label, so decision accuracy was not measured")
+
+def _chunked(text: str, size: int) -> list:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+_GOOD_LOOT = {"gold": 900000, "elixir": 900000, "dark_elixir": 9000}
+_NO_REASONING = {"loot": _GOOD_LOOT, "townhall_level": 10, "recommendation": "ATTACK"}
+_FULL_ANSWER = dict(_NO_REASONING, difficulty="Medium", reasoning="Plenty of loot behind weak walls " * 4)
+
+# name -> (streamed chunks, or a whole answer for a non-streamed request; expected recommendation or None for an error)
+STREAM_SCENARIOS = {
+    "full": (_chunked(json.dumps(_FULL_ANSWER), 24), "ATTACK"),
+    "no-reasoning": (_chunked(json.dumps(_NO_REASONING), 24), "ATTACK"),
+    "no-reasoning-plain": (_NO_REASONING, "ATTACK"),
+    "split-tokens": (['{"lo', 'ot": {"gold": 12', '3, "elixir": 5, "dark_el', 'ixir": 0}, "townhall_le', 'vel": 9',
+                      ', "recommendation": "SK', 'IP", "reasoning": "Low loot"}'], "SKIP"),
+    "truncated": (['{"loot": {"gold": 900000, "elixir": 900000', ', "dark_elixir": 9000}, "townhall_level": 10'], None)
+}
+
+def benchmark_stream(args) -> None:
+    """Canned Gemini answers replayed through the analyzer, streamed chunk by chunk or whole"""
+    print("=== BENCHMARK: Streamed Answer Replay ===")
+
+    config = _OfflineConfig({'ai_analyzer': {'enabled': True}, 'analysis_cache': {'enabled': False}})
+    frame = Frame(_synthetic_frame(640, 360))
+    names = list(STREAM_SCENARIOS) if args.scenarios == "all" else [n.strip() for n in args.scenarios.split(",")]
+    failures = 0
+
+    print(f"{'Scenario':20s} {'Mode':7s} {'Expected':9s} {'Got':9s} {'ms':>7s} {'Early':>6s}  Reasoning")
+    for name in names:
+        if name not in STREAM_SCENARIOS:
+            print(f"Unknown scenario '{name}' (use {', '.join(STREAM_SCENARIOS)})")
+            continue
+        answer, expected = STREAM_SCENARIOS[name]
+        streamed = isinstance(answer, list)
+        stub = GeminiStub(chunk_delay=args.chunk_delay, stream_chunks=answer if streamed else None,
+                          analysis=None if streamed else answer)
+        stub.start()
+        analyzer = AIAnalyzer("offline", logging.getLogger("benchmark"), base_url=stub.url, config=config)
+        analyzer.streaming = streamed
+        try:
+            start = time.perf_counter()
+            result = analyzer.analyze_base(frame, 300000, 300000, 2000)
+            elapsed = (time.perf_counter() - start) * 1000
+            closed_early = analyzer.stats['streams_closed_early'] > 0
+        finally:
+            analyzer.close()
+            stub.stop()
+
+        got = None if result.get("error") else result.get("recommendation")
+        ok = got == expected
+        failures += 0 if ok else 1
+        early = ("yes" if closed_early else "no") if streamed else "-"
+        print(f"{name:20s} {'stream' if streamed else 'plain':7s} {expected or 'error':9s} {got or 'error':9s} "
+              f"{elapsed:7.1f} {early:>6s}  {result.get('reasoning', '')[:40]!r}" + ("" if ok else "  <- MISMATCH"))
+
+    print(f"{len(names) - failures}/{len(names)} scenarios as expected")
+
+def _add_backend_arguments(parser) -> None:
+    """Options shared by the evaluate and backends benchmarks"""
+    parser.add_argument("--frames", default="screenshots", help="Directory of saved screenshots")
+    parser.add_argument("--stub", action="store_true", help="Answer Gemini requests from a local stub")
+    parser.add_argument("--stub-latency", default="0.3",
+                        help='Stub delay: seconds or a distribution, e.g. "lognormal:1.2,0.5"')
+    parser.add_argument("--stub-error-rate", type=float, default=0.0, help="Fraction of stub 503 answers")
+    parser.add_argument("--cassette", help="Replay answers recorded with ai_analyzer.record_cassette")
+    parser.add_argument("--replay-latency", action="store_true", help="Delay replayed answers as recorded")
+    parser.add_argument("--base-url", help="generateContent URL of another local server")
+    parser.add_argument("--api-key", default="offline", help="API key sent with Gemini requests")
+    parser.add_argument("--workers", type=int, default=4, help="Frames evaluated concurrently")
+    parser.add_argument("--deadline", type=float, default=8.0, help="Seconds allowed per Gemini verdict")
+    parser.add_argument("--cache", action="store_true", help="Reuse analyses of near-identical frames")
+    parser.add_argument("--limit", type=int, default=0, help="Only the first N frames")
+    parser.add_argument("--labels", help='JSON {"file.png": {"decision": "attack", "gold": n, ...}}')
+    parser.add_argument("--coordinates", default=os.path.join("coordinates", "button_coordinates.json"),
+                        help="Mapped button coordinates")
+    parser.add_argument("--glyphs", default=os.path.join("templates", "digits"), help="Digit glyph directory")
+    parser.add_argument("--sprites", default=os.path.join("templates", "townhall"), help="Town Hall sprite directory")
+    parser.add_argument("--offset", default="0,0", help="Screen position of the screenshots' top-left corner")
+    parser.add_argument("--min-gold", type=int, default=300000)
+    parser.add_argument("--min-elixir", type=int, default=300000)
+    parser.add_argument("--min-dark", type=int, default=5000)
+    parser.add_argument("--max-townhall", type=int, default=12)
+
+def main():
+    """Main benchmark entry point"""
+    parser = argparse.ArgumentParser(description="COC Attack Bot benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    capture_parser = subparsers.add_parser("capture", help="Continuous capture and ring buffer throughput")
+    capture_parser.add_argument("--source", default="screenshots", help="Image file or directory of frames")
+    capture_parser.add_argument("--fps", type=float, default=30.0, help="Target capture rate")
+    capture_parser.add_argument("--buffer", type=int, default=4, help="Ring buffer size")
+    capture_parser.add_argument("--seconds", type=float, default=5.0, help="Benchmark duration")
+    capture_parser.set_defaults(func=benchmark_capture)
+
+    match_parser = subparsers.add_parser("match", help="Exhaustive vs pyramid template matching")
+    match_parser.add_argument("--repeats", type=int, default=10, help="Matches per measurement")
+    match_parser.add_argument("--level", type=int, default=2, help="Pyramid level for the coarse search")
+    match_parser.set_defaults(func=benchmark_match)
+
+    ocr_parser = subparsers.add_parser("ocr", help="Local loot OCR accuracy against labelled screenshots")
+    ocr_parser.add_argument("--frames", default="screenshots", help="Directory of saved screenshots")
+    ocr_parser.add_argument("--labels", required=True, help='JSON {"file.png": {"gold": n, "elixir": n, "dark_elixir": n}}')
+    ocr_parser.add_argument("--coordinates", default=os.path.join("coordinates", "button_coordinates.json"),
+                            help="Mapped button coordinates")
+    ocr_parser.add_argument("--glyphs", default=os.path.join("templates", "digits"), help="Digit glyph directory")
+    ocr_parser.add_argument("--offset", default="0,0", help="Screen position of the screenshots' top-left corner")
+    ocr_parser.add_argument("--learn", type=int, default=0, help="Learn glyphs from the first N labelled frames")
+    ocr_parser.set_defaults(func=benchmark_ocr)
+
+    evaluate_parser = subparsers.add_parser("evaluate", help="Decision backend over a directory of screenshots")
+    _add_backend_arguments(evaluate_parser)
+    evaluate_parser.add_argument("--backend", choices=BACKENDS, default="cascade",
+                                 help="Decision backend (gemini and the cascade's Gemini stage need --stub or --base-url)")
+    evaluate_parser.add_argument("--rate", type=float, default=0.0, help="Frames per second limit (0 for none)")
+    evaluate_parser.add_argument("--burst", type=int, default=1, help="Token bucket burst size")
+    evaluate_parser.add_argument("--output", help="CSV file for the per-frame results")
+    evaluate_parser.set_defaults(func=benchmark_evaluate)
+
+    backends_parser = subparsers.add_parser("backends", help="Compare decision backends on the same screenshots")
+    _add_backend_arguments(backends_parser)
+    backends_parser.add_argument("--backends", default="all",
+                                 help=f"Comma-separated backends to compare ({', '.join(BACKENDS)}) or all")
+    backends_parser.set_defaults(func=benchmark_backends)
+
+    stream_parser = subparsers.add_parser("stream", help="Replay canned streamed Gemini answers through the analyzer")
+    stream_parser.add_argument("--scenarios", default="all",
+                               help=f"Comma-separated scenarios ({', '.join(STREAM_SCENARIOS)}) or all")
+    stream_parser.add_argument("--chunk-delay", type=float, default=0.02, help="Seconds between streamed chunks")
+    stream_parser.set_defaults(func=benchmark_stream)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -20,13 +20,14 @@ class BotController:
     def __init__(self):
         self.logger = Logger()
         self.config = Config()
-        self.screen_capture = ScreenCapture()
+        self.screen_capture = ScreenCapture(self.config)
         self.coordinate_mapper = CoordinateMapper()
         self.attack_recorder = AttackRecorder()
         self.attack_player = AttackPlayer()
         self.ai_analyzer = AIAnalyzer(
             api_key=self.config.get("ai_analyzer.google_gemini_api_key", ""),
-            logger=self.logger
+            logger=self.logger,
+            config=self.config
         )
         self.auto_attacker = AutoAttacker(
             attack_player=self.attack_player, 
@@ -122,7 +123,7 @@ class BotController:
         """Detect and return COC game window bounds"""
         return self.screen_capture.find_game_window()
     
-    def take_screenshot(self, region: Optional[Tuple[int, int, int, int]] = None) -> str:
+    def take_screenshot(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[str]:
         """Take a screenshot and return the file path"""
         return self.screen_capture.capture_screen(region)
     
@@ -134,4 +135,6 @@ class BotController:
         if self.is_playing:
             self.is_playing = False
         if self.auto_attacker.is_running:
-            self.stop_auto_attack() 
\ No newline at end of file
+            self.stop_auto_attack()
+        self.screen_capture.shutdown()
+        self.ai_analyzer.close() 
\ No newline at end of file
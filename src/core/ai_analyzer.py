@@ -5,18 +5,162 @@ AI Analyzer - Google Gemini integration for base analysis
 import os
 import base64
 import json
+import threading
+import time
+import weakref
 import requests
-from typing import Dict, Optional, Tuple
-from PIL import Image
-import io
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+import cv2
+
+from .frame import Frame
+from .payload_builder import Payload, PayloadBuilder
+from .analysis_cache import AnalysisCache
+from .stream_parser import StreamingAnalysisScanner, iter_sse_data, chunk_text
+from .http_client import HttpClient, RetryPolicy, RequestCancelled
+from .circuit_breaker import CircuitBreaker
+from .request_hedger import RequestHedger
+from .usage_meter import UsageMeter, UsageRecord, estimate_tokens
+from ..utils.metrics import LatencyTracker
+from ..utils.http_cassette import HttpCassette
+
+class AnalysisHandle:
+    """A running analysis: poll done(), wait with result(), or cancel()"""
+    
+    def __init__(self, future: Future, deadline: Optional[float], cancel_event: threading.Event):
+        self.future = future
+        self.deadline = deadline
+        self.cancel_event = cancel_event
+    
+    def done(self) -> bool:
+        return self.future.done()
+    
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline (None without a deadline)"""
+        return self.deadline - time.monotonic() if self.deadline is not None else None
+    
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline and not self.done()
+    
+    def result(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Wait up to timeout seconds for the analysis, None if it is not finished"""
+        try:
+            return self.future.result(timeout)
+        except Exception:
+            return None
+    
+    def cancel(self) -> None:
+        """
+        Abandon the analysis. A request already on the wire is left to finish
+        in the background, but its result is ignored and no retries follow.
+        """
+        self.cancel_event.set()
+        self.future.cancel()
 
 class AIAnalyzer:
     """Google Gemini AI analyzer for COC base evaluation"""
     
-    def __init__(self, api_key: str, logger):
+    API_ROOT = "https://generativelanguage.googleapis.com/v1beta/models"
+    DEFAULT_MODEL = "gemini-2.5-flash-lite-preview-06-17"
+    DEFAULT_BASE_URL = f"{API_ROOT}/{DEFAULT_MODEL}:generateContent"
+    
+    # Decision fields come first: a streamed answer is usable before the reasoning arrives
+    RESPONSE_SCHEMA = {
+        "type": "OBJECT",
+        "properties": {
+            "loot": {
+                "type": "OBJECT",
+                "properties": {
+                    "gold": {"type": "INTEGER"},
+                    "elixir": {"type": "INTEGER"},
+                    "dark_elixir": {"type": "INTEGER"}
+                },
+                "required": ["gold", "elixir", "dark_elixir"],
+                "propertyOrdering": ["gold", "elixir", "dark_elixir"]
+            },
+            "townhall_level": {"type": "INTEGER"},
+            "recommendation": {"type": "STRING", "enum": ["ATTACK", "SKIP"]},
+            "difficulty": {"type": "STRING", "enum": ["Easy", "Medium", "Hard"]},
+            "reasoning": {"type": "STRING"}
+        },
+        "required": ["loot", "townhall_level", "recommendation"],
+        "propertyOrdering": ["loot", "townhall_level", "recommendation", "difficulty", "reasoning"]
+    }
+    # Filled in when the model leaves them out (the schema does not require them)
+    OPTIONAL_FIELDS = {"difficulty": "Unknown", "reasoning": ""}
+    
+    def __init__(self, api_key: str, logger, base_url: Optional[str] = None, config=None):
         self.api_key = api_key
         self.logger = logger
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-lite-preview-06-17:generateContent"
+        # Endpoint: explicit argument, then config (e.g. a local GeminiStub), then the public API
+        model = config.get('ai_analyzer.model', self.DEFAULT_MODEL) if config else self.DEFAULT_MODEL
+        self.base_url = (base_url or (config.get('ai_analyzer.base_url') if config else None)
+                         or f"{self.API_ROOT}/{model}:generateContent")
+        # Records every answer for offline replay through GeminiStub
+        record_dir = config.get('ai_analyzer.record_cassette') if config else None
+        self.cassette = HttpCassette(record_dir) if record_dir else None
+        
+        # One pooled keep-alive session for every request, with bounded retries
+        policy = RetryPolicy(
+            max_retries=config.get('ai_analyzer.max_retries', 3) if config else 3,
+            backoff_base=config.get('ai_analyzer.backoff_base', 0.5) if config else 0.5,
+            backoff_max=config.get('ai_analyzer.backoff_max', 8.0) if config else 8.0
+        )
+        self.request_timeout = config.get('ai_analyzer.request_timeout', 30) if config else 30
+        self.http = HttpClient(policy, timeout=self.request_timeout)
+        self.streaming = config.get('ai_analyzer.streaming', True) if config else True
+        self.max_output_tokens = config.get('ai_analyzer.max_output_tokens', 160) if config else 160
+        
+        # Encodes frames passed in directly (whole frame - no coordinates known here)
+        self.payload_builder = PayloadBuilder(config=config)
+        # Background threads for analyze_base_async
+        self.executor = ThreadPoolExecutor(max_workers=config.get('ai_analyzer.workers', 2) if config else 2,
+                                           thread_name_prefix="ai-analyzer")
+        # Analyses submitted to the executor, so close() can cancel the queued ones
+        self.futures = weakref.WeakSet()
+        # Round trips that produced an answer; refused and failed calls are counted in failures instead
+        self.latency = LatencyTracker()
+        self.failures = {'failed': 0, 'circuit_open': 0, 'over_budget': 0}
+        self.cache = None
+        if config is None or config.get('analysis_cache.enabled', True):
+            self.cache = AnalysisCache(
+                max_entries=config.get('analysis_cache.max_entries', 256) if config else 256,
+                ttl=config.get('analysis_cache.ttl', 600) if config else 600,
+                max_distance=config.get('analysis_cache.max_distance', None) if config else None
+            )
+        # Stops calling Gemini after repeated failures or slow answers, probing it now and then
+        self.breaker = CircuitBreaker(
+            failure_threshold=config.get('ai_analyzer.breaker_failures', 3) if config else 3,
+            slow_call_threshold=config.get('ai_analyzer.breaker_slow_call', 10.0) if config else 10.0,
+            open_duration=config.get('ai_analyzer.breaker_open_seconds', 60) if config else 60,
+            on_state_change=self._on_breaker_change
+        )
+        # Optional backup request when Gemini is slower than usual (long-tailed latency)
+        self.hedger = None
+        if config and config.get('ai_analyzer.hedge_enabled', False):
+            self.hedger = RequestHedger(
+                percentile=config.get('ai_analyzer.hedge_percentile', 0.95),
+                min_delay=config.get('ai_analyzer.hedge_min_delay', 2.0),
+                max_hedge_rate=config.get('ai_analyzer.hedge_max_rate', 0.1),
+                on_hedge=lambda: self.usage.record_hedge()
+            )
+        # Bytes, tokens and cost per call, with an optional hourly budget
+        self.usage = UsageMeter(
+            input_price=config.get('ai_analyzer.price_input_per_million', 0.10) if config else 0.10,
+            output_price=config.get('ai_analyzer.price_output_per_million', 0.40) if config else 0.40,
+            hourly_requests=config.get('ai_analyzer.budget_requests_per_hour') if config else None,
+            hourly_tokens=config.get('ai_analyzer.budget_tokens_per_hour') if config else None,
+            hourly_cost=config.get('ai_analyzer.budget_cost_per_hour') if config else None
+        )
+        self.budget_exhausted = False
+        self.stats = {
+            'payloads': 0,
+            'payload_bytes': 0,
+            'encode_time': 0.0,
+            'streams': 0,
+            'streams_closed_early': 0,
+            'stream_decision_time': 0.0
+        }
         
         # Analysis prompt template
         self.analysis_prompt = """
@@ -42,42 +186,115 @@ Respond in this exact JSON format:
         "dark_elixir": estimated_dark_elixir_amount
     },
     "townhall_level": town_hall_level_number,
-    "difficulty": "Easy/Medium/Hard",
     "recommendation": "ATTACK/SKIP",
+    "difficulty": "Easy/Medium/Hard",
     "reasoning": "Brief explanation of decision"
 }
 """
     
-    def analyze_base(self, screenshot_path: str, min_gold: int = 300000, 
-                    min_elixir: int = 300000, min_dark: int = 2000) -> Dict:
+    def analyze_base(self, screenshot: Union[Frame, Payload, str], min_gold: int = 300000, 
+                    min_elixir: int = 300000, min_dark: int = 2000, deadline: Optional[float] = None,
+                    cancel_event: Optional[threading.Event] = None) -> Dict:
         """
         Analyze enemy base screenshot using Google Gemini
         
         Args:
-            screenshot_path: Path to screenshot file
+            screenshot: In-memory frame, prebuilt payload or path to screenshot file
             min_gold: Minimum gold requirement
             min_elixir: Minimum elixir requirement  
             min_dark: Minimum dark elixir requirement
+            deadline: time.monotonic() by which the analysis must finish
+            cancel_event: Set it to abandon the analysis
             
         Returns:
             Dict with analysis results and attack recommendation
         """
+        start = time.perf_counter()
+        result = self._analyze(screenshot, min_gold, min_elixir, min_dark, deadline, cancel_event)
+        if result.get("error"):
+            # Refusals return at once and failures say nothing about how fast Gemini answers
+            kind = 'circuit_open' if result.get("circuit_open") else 'over_budget' if result.get("over_budget") \
+                else 'failed'
+            self.failures[kind] += 1
+        elif not result.get("cached"):
+            self.latency.record(time.perf_counter() - start)
+        return result
+    
+    def analyze_base_async(self, screenshot: Union[Frame, Payload, str], min_gold: int = 300000,
+                           min_elixir: int = 300000, min_dark: int = 2000,
+                           timeout: Optional[float] = None) -> AnalysisHandle:
+        """
+        Start an analysis on the analyzer's worker threads and return at once
+        
+        Args:
+            timeout: Seconds the analysis may take (retries included), None for no deadline
+            
+        Returns:
+            AnalysisHandle to poll, wait on or cancel
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        cancel_event = threading.Event()
+        future = self.executor.submit(self.analyze_base, screenshot, min_gold, min_elixir, min_dark,
+                                      deadline, cancel_event)
+        self.futures.add(future)
+        return AnalysisHandle(future, deadline, cancel_event)
+    
+    def _analyze(self, screenshot: Union[Frame, Payload, str], min_gold: int, min_elixir: int, min_dark: int,
+                 deadline: Optional[float], cancel_event: Optional[threading.Event]) -> Dict:
+        """Encode, send and parse one analysis"""
         try:
-            self.logger.info(f"🤖 Analyzing base with AI: {screenshot_path}")
+            if isinstance(screenshot, Frame):
+                self.logger.info(f"🤖 Analyzing base with AI: frame {screenshot.width}x{screenshot.height}")
+            elif isinstance(screenshot, Payload):
+                self.logger.info(f"🤖 Analyzing base with AI: {', '.join(screenshot.regions)}")
+            else:
+                self.logger.info(f"🤖 Analyzing base with AI: {screenshot}")
             
-            # Encode image to base64
-            image_data = self._encode_image(screenshot_path)
-            if not image_data:
+            # Encode image
+            payload = self._build_payload(screenshot)
+            if not payload:
                 return self._create_error_response("Failed to encode image")
+            self._record_payload(payload)
+            
+            # A near-identical frame analyzed with the same requirements needs no new request
+            thresholds = (min_gold, min_elixir, min_dark)
+            if self.cache is not None:
+                cached = self.cache.get(payload.fingerprint, thresholds)
+                if cached is not None:
+                    self.logger.info(f"♻️ AI Analysis (cached): {cached['recommendation']} - {cached.get('reasoning', '')}")
+                    self.usage.record(UsageRecord(cached=True))
+                    return cached
+            
+            if self._check_budget():
+                return self._create_error_response("Hourly AI budget used up, not calling Gemini", over_budget=True)
+            if not self.breaker.allow_request():
+                return self._create_error_response("Circuit open - Gemini is failing or slow, not calling it",
+                                                   circuit_open=True)
+            request_start = time.perf_counter()
             
             # Create analysis prompt with requirements
-            prompt = self._create_analysis_prompt(min_gold, min_elixir, min_dark)
+            prompt = self._create_analysis_prompt(min_gold, min_elixir, min_dark, payload.is_composite)
             
             # Send request to Gemini
-            response = self._send_gemini_request(image_data, prompt)
+            image_data = base64.b64encode(payload.data).decode('utf-8')
+            try:
+                if self.hedger is not None:
+                    response = self.hedger.call(
+                        lambda event, hedge: self._send_gemini_request(image_data, prompt, payload.mime_type, deadline,
+                                                                       event, payload.size, hedge),
+                        deadline, cancel_event)
+                else:
+                    response = self._send_gemini_request(image_data, prompt, payload.mime_type, deadline,
+                                                         cancel_event, payload.size)
+            except Exception:
+                self.breaker.record_failure("request error")
+                raise
+            self._record_outcome(response, time.perf_counter() - request_start, deadline, cancel_event)
             
             if response:
-                self.logger.info(f"✅ AI Analysis: {response['recommendation']} - {response['reasoning']}")
+                self.logger.info(f"✅ AI Analysis: {response['recommendation']} - {response.get('reasoning', '')}")
+                if self.cache is not None:
+                    self.cache.put(payload.fingerprint, thresholds, response, time.perf_counter() - request_start)
                 return response
             else:
                 return self._create_error_response("Failed to get AI response")
@@ -86,38 +303,71 @@ Respond in this exact JSON format:
             self.logger.error(f"AI analysis error: {e}")
             return self._create_error_response(f"Analysis error: {e}")
     
-    def _encode_image(self, image_path: str) -> Optional[str]:
-        """Encode image to base64 for Gemini API"""
+    def _record_outcome(self, response: Optional[Dict], elapsed: float, deadline: Optional[float],
+                        cancel_event: Optional[threading.Event]) -> None:
+        """Tell the circuit breaker how the request went"""
+        if response:
+            self.breaker.record_success(elapsed)
+        elif deadline is not None and time.monotonic() >= deadline:
+            self.breaker.record_failure(f"no answer within the deadline ({elapsed:.1f}s)")
+        elif cancel_event is not None and cancel_event.is_set():
+            # Abandoned by the caller (emergency stop) - says nothing about Gemini
+            self.breaker.record_cancelled()
+        else:
+            self.breaker.record_failure("request failed")
+    
+    def _on_breaker_change(self, old_state: str, new_state: str, reason: str) -> None:
+        if new_state == CircuitBreaker.OPEN:
+            self.logger.warning(f"⚡ AI circuit open ({reason}) - using local decisions, "
+                                f"next probe in {self.breaker.open_duration:g}s")
+        elif new_state == CircuitBreaker.HALF_OPEN:
+            self.logger.info(f"⚡ AI circuit half-open - {reason}")
+        else:
+            self.logger.info(f"⚡ AI circuit closed - {reason}, Gemini analysis resumed")
+    
+    def is_circuit_open(self) -> bool:
+        """True while Gemini calls are refused by the circuit breaker"""
+        return self.breaker.is_open()
+    
+    def _build_payload(self, image: Union[Frame, Payload, str]) -> Optional[Payload]:
+        """Encode a frame or image file for the Gemini API"""
         try:
-            with open(image_path, 'rb') as image_file:
-                # Resize image if too large (Gemini has size limits)
-                img = Image.open(image_file)
-                
-                # Resize if width > 1024px to reduce API payload
-                if img.width > 1024:
-                    ratio = 1024 / img.width
-                    new_height = int(img.height * ratio)
-                    img = img.resize((1024, new_height), Image.Resampling.LANCZOS)
-                
-                # Convert to bytes
-                img_byte_arr = io.BytesIO()
-                img.save(img_byte_arr, format='PNG')
-                img_byte_arr = img_byte_arr.getvalue()
-                
-                # Encode to base64
-                return base64.b64encode(img_byte_arr).decode('utf-8')
+            if isinstance(image, Payload):
+                return image
+            if not isinstance(image, Frame):
+                pixels = cv2.imread(image, cv2.IMREAD_COLOR)
+                if pixels is None:
+                    self.logger.error(f"Could not read image: {image}")
+                    return None
+                image = Frame(pixels)
+            return self.payload_builder.build(image)
                 
         except Exception as e:
             self.logger.error(f"Image encoding error: {e}")
             return None
     
-    def _create_analysis_prompt(self, min_gold: int, min_elixir: int, min_dark: int) -> str:
+    def _record_payload(self, payload: Payload) -> None:
+        """Log and count the size and encode time of an uploaded image"""
+        self.stats['payloads'] += 1
+        self.stats['payload_bytes'] += len(payload.data)
+        self.stats['encode_time'] += payload.encode_time
+        self.logger.info(f"📦 Payload: {len(payload.data) / 1024:.1f} KB {payload.mime_type} "
+                         f"{payload.size[0]}x{payload.size[1]}, encoded in {payload.encode_time * 1000:.1f} ms")
+    
+    def _create_analysis_prompt(self, min_gold: int, min_elixir: int, min_dark: int,
+                                composite: bool = False) -> str:
         """Create analysis prompt with current requirements"""
+        layout = ""
+        if composite:
+            layout = """
+IMAGE LAYOUT: This is not a full screenshot. The top part is the "Available Loot:" panel
+cut out of the screen, the part below it is a close-up of the area around the Town Hall.
+"""
         return f"""
 You are an expert Clash of Clans player analyzing enemy bases for attack decisions.
 
 CRITICAL: You must read the EXACT loot numbers displayed in the top-left area of the screen.
-
+{layout}
 Current loot requirements:
 - Minimum Gold: {min_gold:,}
 - Minimum Elixir: {min_elixir:,}  
@@ -161,26 +411,31 @@ Respond in this exact JSON format:
         "dark_elixir": actual_dark_elixir_amount_you_read
     }},
     "townhall_level": town_hall_level_number,
-    "difficulty": "Easy/Medium/Hard",
     "recommendation": "ATTACK/SKIP",
+    "difficulty": "Easy/Medium/Hard",
     "reasoning": "Specific reason: Gold X vs required Y, Elixir A vs required B, Dark C vs required D, TH level E"
 }}
 """
     
-    def _send_gemini_request(self, image_data: str, prompt: str) -> Optional[Dict]:
+    def _send_gemini_request(self, image_data: str, prompt: str, mime_type: str = "image/png",
+                             deadline: Optional[float] = None,
+                             cancel_event: Optional[threading.Event] = None,
+                             image_size: Optional[Tuple[int, int]] = None, hedge: bool = False) -> Optional[Dict]:
         """Send request to Google Gemini API"""
+        usage = {}
+        analysis = None
+        start = None
+        if cancel_event is not None and cancel_event.is_set():
+            # A hedge that lost before it was sent costs nothing
+            return None
         try:
-            headers = {
-                'Content-Type': 'application/json',
-            }
-            
             payload = {
                 "contents": [{
                     "parts": [
                         {"text": prompt},
                         {
                             "inline_data": {
-                                "mime_type": "image/png",
+                                "mime_type": mime_type,
                                 "data": image_data
                             }
                         }
@@ -190,56 +445,181 @@ Respond in this exact JSON format:
                     "temperature": 0.1,  # Low temperature for consistent analysis
                     "topK": 1,
                     "topP": 1,
-                    "maxOutputTokens": 1024,
+                    "maxOutputTokens": self.max_output_tokens,
+                    # Strict JSON with the decision fields first, so a stream can stop early
+                    "responseMimeType": "application/json",
+                    "responseSchema": self.RESPONSE_SCHEMA
                 }
             }
             
-            url = f"{self.base_url}?key={self.api_key}"
+            if self.streaming:
+                url = f"{self._stream_url()}?alt=sse&key={self.api_key}"
+            else:
+                url = f"{self.base_url}?key={self.api_key}"
             
             self.logger.info("🌐 Sending request to Gemini API...")
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            start = time.perf_counter()
+            response = self.http.post_json(url, payload, deadline=deadline, cancel_event=cancel_event,
+                                           stream=self.streaming)
             
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Extract text from response
-                if 'candidates' in result and len(result['candidates']) > 0:
-                    content = result['candidates'][0]['content']['parts'][0]['text']
-                    
-                    # Parse JSON response
-                    try:
-                        # Clean up response (remove markdown formatting if present)
-                        content = content.strip()
-                        if content.startswith('```json'):
-                            content = content[7:]
-                        if content.endswith('```'):
-                            content = content[:-3]
-                        content = content.strip()
-                        
-                        analysis = json.loads(content)
-                        return analysis
-                        
-                    except json.JSONDecodeError as e:
-                        self.logger.error(f"Failed to parse AI response as JSON: {e}")
-                        self.logger.error(f"Raw response: {content}")
-                        return None
-                else:
-                    self.logger.error("No candidates in Gemini response")
-                    return None
-            else:
+            if response.status_code != 200:
                 self.logger.error(f"Gemini API error: {response.status_code} - {response.text}")
                 return None
+            
+            if self.streaming:
+                analysis = self._read_stream(response, deadline, cancel_event, usage)
+            else:
+                analysis = self._parse_response(response, usage)
+            if isinstance(analysis, dict):
+                # Fields the schema leaves optional may be missing from a valid answer
+                for field, default in self.OPTIONAL_FIELDS.items():
+                    analysis.setdefault(field, default)
+            if analysis is not None and self.cassette is not None:
+                self.cassette.record(payload, analysis, time.perf_counter() - start)
+            return analysis
                 
         except requests.exceptions.Timeout:
             self.logger.error("Gemini API request timeout")
             return None
+        except RequestCancelled:
+            self.logger.info("Gemini API request cancelled")
+            return None
         except Exception as e:
             self.logger.error(f"Gemini API request error: {e}")
             return None
+        finally:
+            if start is not None:
+                self._record_usage(payload, prompt, image_size, usage, analysis, time.perf_counter() - start, hedge)
     
-    def _create_error_response(self, error_msg: str) -> Dict:
+    def _record_usage(self, payload: Dict, prompt: str, image_size: Optional[Tuple[int, int]], usage: Dict,
+                      analysis: Optional[Dict], latency: float, hedge: bool) -> None:
+        """Account one request; token counts come from usageMetadata, or are estimated without it"""
+        estimated = 'promptTokenCount' not in usage and analysis is not None
+        if estimated:
+            prompt_tokens = estimate_tokens(prompt, image_size)
+            output_tokens = estimate_tokens(json.dumps(analysis))
+        else:
+            prompt_tokens = usage.get('promptTokenCount', 0)
+            output_tokens = usage.get('candidatesTokenCount', 0) + usage.get('thoughtsTokenCount', 0)
+        self.usage.record(UsageRecord(
+            request_bytes=len(json.dumps(payload)),
+            prompt_tokens=prompt_tokens,
+            output_tokens=output_tokens,
+            latency=latency,
+            success=analysis is not None,
+            hedge=hedge,
+            estimated=estimated
+        ))
+    
+    def _check_budget(self) -> bool:
+        """True while the hourly budget is used up; logs when that changes"""
+        reason = self.usage.over_budget()
+        if reason and not self.budget_exhausted:
+            self.logger.warning(f"💰 AI budget used up: {reason} - using local decisions")
+        elif not reason and self.budget_exhausted:
+            self.logger.info("💰 AI budget available again - Gemini analysis resumed")
+        self.budget_exhausted = reason is not None
+        return self.budget_exhausted
+    
+    def remote_unavailable(self) -> Optional[str]:
+        """Why Gemini should not be called right now (budget used up, circuit open), None if it can be"""
+        if self._check_budget():
+            return "AI budget used up"
+        if self.breaker.is_open():
+            return "AI circuit open"
+        return None
+    
+    def _parse_response(self, response, usage: Optional[Dict] = None) -> Optional[Dict]:
+        """Analysis JSON from a complete (non-streamed) generateContent response"""
+        try:
+            result = response.json()
+            if usage is not None:
+                usage.update(result.get('usageMetadata', {}))
+            
+            # Extract text from response
+            if 'candidates' in result and len(result['candidates']) > 0:
+                content = result['candidates'][0]['content']['parts'][0]['text']
+                
+                # Parse JSON response
+                try:
+                    # Clean up response (remove markdown formatting if present)
+                    content = content.strip()
+                    if content.startswith('```json'):
+                        content = content[7:]
+                    if content.endswith('```'):
+                        content = content[:-3]
+                    content = content.strip()
+                    
+                    analysis = json.loads(content)
+                    return analysis
+                    
+                except json.JSONDecodeError as e:
+                    self.logger.error(f"Failed to parse AI response as JSON: {e}")
+                    self.logger.error(f"Raw response: {content}")
+                    return None
+            else:
+                self.logger.error("No candidates in Gemini response")
+                return None
+                
+        except (ValueError, KeyError, IndexError) as e:
+            self.logger.error(f"Malformed Gemini response: {e}")
+            return None
+    
+    def _stream_url(self) -> str:
+        """streamGenerateContent endpoint for the configured model"""
+        if self.base_url.endswith(":generateContent"):
+            return self.base_url[:-len(":generateContent")] + ":streamGenerateContent"
+        return self.base_url
+    
+    def _read_stream(self, response, deadline: Optional[float], cancel_event: Optional[threading.Event],
+                     usage: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Read server-sent events until loot, Town Hall level and recommendation
+        are known and return without waiting for the rest; the remaining
+        events (at most max_output_tokens) are drained in the background so
+        the connection is kept alive for the next base
+        """
+        scanner = StreamingAnalysisScanner()
+        start = time.perf_counter()
+        closed_early = False
+        events = iter_sse_data(response.iter_lines(decode_unicode=True))
+        try:
+            for data in events:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise RequestCancelled("Request cancelled")
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise requests.exceptions.Timeout("Deadline passed while streaming")
+                try:
+                    event = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+                scanner.feed(chunk_text(event))
+                if usage is not None:
+                    # Counts are cumulative, the latest chunk has the most recent ones
+                    usage.update(event.get('usageMetadata', {}))
+                if scanner.is_decided() and scanner.complete() is None:
+                    closed_early = True
+                    break
+        except Exception:
+            # Cancelled, timed out or failed: the rest of the answer is not worth waiting for
+            response.close()
+            raise
+        self.http.release(response, background=closed_early, reader=events)
+        
+        self.stats['streams'] += 1
+        self.stats['stream_decision_time'] += time.perf_counter() - start
+        if closed_early:
+            self.stats['streams_closed_early'] += 1
+        
+        if not scanner.is_decided():
+            self.logger.error(f"Incomplete AI stream: {scanner.text[:200]}")
+            return None
+        return scanner.result()
+    
+    def _create_error_response(self, error_msg: str, circuit_open: bool = False,
+                               over_budget: bool = False) -> Dict:
         """Create error response with SKIP recommendation"""
-        return {
+        response = {
             "loot": {"gold": 0, "elixir": 0, "dark_elixir": 0},
             "townhall_level": 0,
             "difficulty": "Unknown",
@@ -247,19 +627,23 @@ Respond in this exact JSON format:
             "reasoning": f"Error: {error_msg}",
             "error": True
         }
+        if circuit_open:
+            response["circuit_open"] = True
+        if over_budget:
+            response["over_budget"] = True
+        return response
     
     def test_connection(self) -> bool:
         """Test connection to Gemini API"""
         try:
             # Create a simple test request
-            headers = {'Content-Type': 'application/json'}
             payload = {
                 "contents": [{"parts": [{"text": "Hello, respond with 'OK'"}]}],
                 "generationConfig": {"maxOutputTokens": 10}
             }
             
             url = f"{self.base_url}?key={self.api_key}"
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
+            response = self.http.post_json(url, payload, timeout=10)
             
             if response.status_code == 200:
                 self.logger.info("✅ Gemini API connection successful")
@@ -270,4 +654,34 @@ Respond in this exact JSON format:
                 
         except Exception as e:
             self.logger.error(f"❌ Gemini API test error: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def get_stats(self) -> Dict:
+        """Payload sizes and network metrics: requests, retries, connections opened and their setup time"""
+        payloads = self.stats['payloads']
+        stats = {
+            'payloads': payloads,
+            'avg_payload_kb': self.stats['payload_bytes'] / max(payloads, 1) / 1024,
+            'avg_encode_ms': self.stats['encode_time'] / max(payloads, 1) * 1000,
+            'streams': self.stats['streams'],
+            'streams_closed_early': self.stats['streams_closed_early'],
+            'avg_stream_read_ms': self.stats['stream_decision_time'] / max(self.stats['streams'], 1) * 1000
+        }
+        stats.update(self.http.get_stats())
+        stats['latency'] = self.latency.get_stats()
+        stats['failures'] = dict(self.failures)
+        stats['cache'] = self.cache.get_stats() if self.cache is not None else None
+        stats['breaker'] = self.breaker.get_stats()
+        stats['hedging'] = self.hedger.get_stats() if self.hedger is not None else None
+        stats['usage'] = self.usage.get_stats()
+        return stats
+    
+    def close(self) -> None:
+        """Stop the worker threads and close pooled connections"""
+        # shutdown(cancel_futures=True) needs Python 3.9
+        for future in list(self.futures):
+            future.cancel()
+        self.executor.shutdown(wait=False)
+        if self.hedger is not None:
+            self.hedger.close()
+        self.http.close()
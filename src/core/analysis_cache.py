@@ -0,0 +1,127 @@
+"""
+Analysis Cache - Reuse analyzer results for near-identical frames (perceptual hash LRU)
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import cv2
+import numpy as np
+
+def dhash(image: np.ndarray, hash_size: int = 16) -> int:
+    """
+    Difference hash: shrink to (hash_size + 1) x hash_size grayscale and
+    keep one bit per horizontal neighbour comparison (hash_size^2 bits)
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def bright_mask_hash(image: np.ndarray, threshold: int = 190) -> int:
+    """
+    One bit per pixel that is at least threshold bright, at full resolution.
+    Meant for the loot panel: the white digits survive capture noise, and
+    changing a single digit flips dozens of bits (a dHash may flip none).
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    return int.from_bytes(np.packbits(gray >= threshold).tobytes(), 'big')
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class _CacheEntry:
+    def __init__(self, fingerprint: Dict[str, int], result: Dict, latency: float):
+        self.fingerprint = fingerprint
+        self.result = result
+        self.latency = latency  # What the original call cost, saved on every hit
+        self.created = time.monotonic()
+
+class AnalysisCache:
+    """
+    LRU cache of analyzer results with size and TTL limits. Entries are
+    keyed by the thresholds the analysis was made for plus a hash of each
+    payload region (digit mask for the loot panel, dHash for the Town Hall);
+    a lookup hits when every region is within its Hamming distance of a
+    cached entry.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 600.0,
+                 max_distance: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            max_entries: Least recently used entries are evicted beyond this
+            ttl: Seconds an entry stays valid
+            max_distance: Allowed differing bits per region name ("default" for others)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = {'loot': 16, 'townhall': 12, 'full': 6, 'default': 6}
+        self.max_distance.update(max_distance or {})
+        self.entries: "OrderedDict[int, Tuple[Tuple, _CacheEntry]]" = OrderedDict()
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'saved_time': 0.0
+        }
+
+    def _matches(self, a: Dict[str, int], b: Dict[str, int]) -> bool:
+        if a.keys() != b.keys():
+            return False
+        for region, value in a.items():
+            limit = self.max_distance.get(region, self.max_distance['default'])
+            if hamming(value, b[region]) > limit:
+                return False
+        return True
+
+    def _expire(self, now: float) -> None:
+        for entry_id in [i for i, (_, e) in self.entries.items() if now - e.created > self.ttl]:
+            del self.entries[entry_id]
+            self.stats['evictions'] += 1
+
+    def get(self, fingerprint: Dict[str, int], thresholds: Tuple) -> Optional[Dict]:
+        """Cached result for a near-identical payload analyzed with the same thresholds"""
+        with self.lock:
+            self._expire(time.monotonic())
+            for entry_id, (entry_thresholds, entry) in reversed(self.entries.items()):
+                if entry_thresholds == thresholds and self._matches(fingerprint, entry.fingerprint):
+                    self.entries.move_to_end(entry_id)
+                    self.stats['hits'] += 1
+                    self.stats['saved_time'] += entry.latency
+                    result = copy.deepcopy(entry.result)
+                    result['cached'] = True
+                    return result
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, fingerprint: Dict[str, int], thresholds: Tuple, result: Dict, latency: float) -> None:
+        """Store a successful analysis"""
+        with self.lock:
+            self.entries[self.next_id] = (thresholds, _CacheEntry(fingerprint, copy.deepcopy(result), latency))
+            self.next_id += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Hit rate, API calls saved and the latency they would have cost"""
+        with self.lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                'entries': len(self.entries),
+                'hits': self.stats['hits'],
+                'misses': self.stats['misses'],
+                'hit_rate': self.stats['hits'] / max(lookups, 1) * 100,
+                'saved_calls': self.stats['hits'],
+                'saved_seconds': self.stats['saved_time'],
+                'evictions': self.stats['evictions']
+            }
@@ -0,0 +1,153 @@
+"""
+Analyzer Backends - Interchangeable base deciders behind one analyze(frame, thresholds) contract
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .frame import Frame
+from .decision_cascade import (Decision, DecisionCascade, CascadeStage, SignatureStage, TownHallStage,
+                               OCRStage, GeminiStage)
+
+BACKENDS = ('cascade', 'gemini', 'ocr', 'townhall', 'mock')
+
+class AnalyzerBackend:
+    """
+    Decides whether to attack a scouted base. analyze() always returns
+    ATTACK or SKIP; a backend that cannot tell uses its own fallback.
+    """
+
+    name = "backend"
+
+    def analyze(self, frame: Frame, thresholds: Dict) -> Decision:
+        """
+        Args:
+            frame: Scouted base
+            thresholds: {'gold', 'elixir', 'dark_elixir', 'max_townhall_level'}
+        """
+        raise NotImplementedError
+
+    def is_available(self) -> bool:
+        """False when the backend has nothing to work with (no glyphs, sprites or API access)"""
+        return True
+
+    def get_stats(self) -> Dict:
+        """{'decisions', 'fallbacks', 'stages': {name: per-stage counters}} as DecisionCascade reports them"""
+        return {'decisions': 0, 'fallbacks': 0, 'stages': {}}
+
+class CascadeBackend(AnalyzerBackend):
+    """One or more cascade stages, tried in order until one decides"""
+
+    def __init__(self, name: str, stages: List[CascadeStage], uncertain_action: str = Decision.SKIP):
+        self.name = name
+        self.cascade = DecisionCascade(stages, uncertain_action)
+
+    def analyze(self, frame: Frame, thresholds: Dict) -> Decision:
+        return self.cascade.decide(frame, thresholds)
+
+    def is_available(self) -> bool:
+        return any(stage.is_available() for stage in self.cascade.stages)
+
+    def get_stats(self) -> Dict:
+        return self.cascade.get_stats()
+
+class MockBackend(AnalyzerBackend):
+    """
+    Answers without looking at the frame: a fixed verdict, or ATTACK with
+    probability attack_rate, after a fixed delay. For exercising the
+    search loop and the benchmark harness.
+    """
+
+    name = "mock"
+
+    def __init__(self, verdict: Optional[str] = None, attack_rate: float = 0.5, latency: float = 0.0,
+                 seed: Optional[int] = None):
+        self.verdict = verdict
+        self.attack_rate = attack_rate
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'evaluated': 0, 'attack': 0, 'skip': 0, 'time': 0.0}
+
+    def analyze(self, frame: Frame, thresholds: Dict) -> Decision:
+        start = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            verdict = self.verdict
+            if verdict is None:
+                verdict = Decision.ATTACK if self.random.random() < self.attack_rate else Decision.SKIP
+            self.stats['evaluated'] += 1
+            self.stats[verdict] += 1
+            self.stats['time'] += time.perf_counter() - start
+        return Decision(verdict, "mock verdict", self.name)
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            s = dict(self.stats)
+        resolved = s['attack'] + s['skip']
+        return {
+            'decisions': s['evaluated'],
+            'fallbacks': 0,
+            'stages': {self.name: {
+                'evaluated': s['evaluated'],
+                'attack': s['attack'],
+                'skip': s['skip'],
+                'resolved': resolved,
+                'resolved_pct': 100.0 if resolved else 0.0,
+                'avg_ms': s['time'] / max(s['evaluated'], 1) * 1000
+            }}
+        }
+
+def create_backend(name: str, config=None, logger=None, ai_analyzer=None, loot_ocr=None, townhall_detector=None,
+                   coordinate_mapper=None, payload_builder=None, screen_capture=None,
+                   should_continue: Optional[Callable[[], bool]] = None) -> AnalyzerBackend:
+    """
+    Build the backend called name (one of BACKENDS) from the bot's components
+
+    cascade:  signature, townhall, ocr and gemini stages in decision_cascade.stages order
+    gemini:   Gemini only; failed requests fall back to SKIP
+    ocr:      local loot OCR; borderline loot uses the strict 2-of-3 rule
+    townhall: local Town Hall detector; every base it does not reject is attacked
+    mock:     see MockBackend (settings under mock_backend)
+    """
+    def setting(key: str, default):
+        return config.get(key, default) if config else default
+
+    def gemini_stage() -> GeminiStage:
+        return GeminiStage(ai_analyzer, config, logger, payload_builder, should_continue)
+
+    def townhall_stage() -> TownHallStage:
+        return TownHallStage(townhall_detector, setting('decision_cascade.townhall_reject_score', 0.8))
+
+    def ocr_stage() -> OCRStage:
+        return OCRStage(loot_ocr, coordinate_mapper,
+                        setting('decision_cascade.ocr_skip_below', 0.7),
+                        setting('decision_cascade.ocr_attack_above', 1.3),
+                        setting('decision_cascade.ocr_min_confidence', 0.75))
+
+    if name == 'cascade':
+        stages = {
+            'townhall': townhall_stage,
+            'ocr': ocr_stage,
+            'gemini': gemini_stage
+        }
+        if screen_capture is not None:
+            stages['signature'] = lambda: SignatureStage(screen_capture,
+                                                         setting('decision_cascade.skip_signatures', []),
+                                                         setting('decision_cascade.attack_signatures', []))
+        order = setting('decision_cascade.stages', ['signature', 'townhall', 'ocr', 'gemini'])
+        return CascadeBackend(name, [stages[stage]() for stage in order if stage in stages],
+                              setting('decision_cascade.uncertain_action', Decision.SKIP))
+    if name == 'gemini':
+        return CascadeBackend(name, [gemini_stage()], Decision.SKIP)
+    if name == 'ocr':
+        return CascadeBackend(name, [ocr_stage()], setting('decision_cascade.uncertain_action', Decision.SKIP))
+    if name == 'townhall':
+        return CascadeBackend(name, [townhall_stage()], Decision.ATTACK)
+    if name == 'mock':
+        return MockBackend(setting('mock_backend.verdict', None), setting('mock_backend.attack_rate', 0.5),
+                           setting('mock_backend.latency', 0.0), setting('mock_backend.seed', None))
+    raise ValueError(f"Unknown decision backend '{name}' (use one of {', '.join(BACKENDS)})")
@@ -4,11 +4,18 @@ Attack Player - Plays back recorded attack sessions
 
 import json
 import time
+import numpy as np
 import pyautogui
 import keyboard
 import threading
 from typing import Dict, List, Optional
 from .attack_recorder import AttackRecorder
+from ..utils.metrics import percentile
+
+# Sleep until this close to a deadline, then spin; covers the ~15 ms sleep granularity on Windows
+SPIN_SECONDS = 0.015
+# How often the hotkeys are polled while waiting for the next action
+POLL_SECONDS = 0.05
 
 class AttackPlayer:
     """Plays back recorded attack sessions"""
@@ -19,6 +26,7 @@ class AttackPlayer:
         self.current_playback = None
         self.playback_thread = None
         self.playback_speed = 1.0
+        self.last_playback_report: Optional[Dict] = None
         
         print("Attack Player initialized")
         print("Playback Controls:")
@@ -73,68 +81,131 @@ class AttackPlayer:
         if self.playback_thread:
             self.playback_thread.join(timeout=2)
     
+    @staticmethod
+    def compile_schedule(actions: List[Dict], speed: float = 1.0) -> np.ndarray:
+        """
+        Deadline of every action in seconds after the first one
+
+        Recorded timestamps are made relative to the first action, delay
+        markers push every later action back by their duration, and the
+        whole schedule is divided by the playback speed. Deadlines never go
+        backwards, so out-of-order timestamps play immediately.
+        """
+        if not actions:
+            return np.zeros(0)
+        timestamps = np.array([a.get('timestamp', 0) for a in actions], dtype=np.float64)
+        delays = np.array([a.get('duration', 1.0) if a.get('type') == 'delay' else 0.0 for a in actions],
+                          dtype=np.float64)
+        # A delay marker holds back the actions after it, not itself
+        offsets = np.cumsum(delays) - delays
+        schedule = (timestamps - timestamps[0] + offsets) / speed
+        return np.maximum.accumulate(schedule)
+
+    def _poll_controls(self) -> Optional[float]:
+        """Check the hotkeys: None to stop, otherwise the seconds spent paused"""
+        if not self.is_playing:
+            return None
+
+        if keyboard.is_pressed('esc'):
+            print("\nEmergency stop activated")
+            return None
+
+        if keyboard.is_pressed('f9'):
+            print("\nPlayback stopped by user")
+            return None
+
+        if not keyboard.is_pressed('f8'):
+            return 0.0
+
+        pause_start = time.perf_counter()
+        print("\nPlayback paused")
+        while keyboard.is_pressed('f8'):
+            time.sleep(0.1)
+
+        while self.is_playing:
+            time.sleep(0.1)
+            if keyboard.is_pressed('esc') or keyboard.is_pressed('f9'):
+                print("\nPlayback stopped by user")
+                return None
+            if keyboard.is_pressed('f8'):
+                print("Playback resumed")
+                while keyboard.is_pressed('f8'):
+                    time.sleep(0.1)
+                return time.perf_counter() - pause_start
+        return None
+
     def _playback_loop(self, actions: List[Dict]) -> None:
-        """Main playback loop"""
+        """
+        Main playback loop
+
+        Actions run against absolute deadlines from compile_schedule() on
+        the monotonic clock, so time spent on hotkeys, printing and the
+        actions themselves is absorbed by the next wait instead of adding
+        up. Pausing moves the start time forward by the time paused.
+        """
+        schedule = self.compile_schedule(actions, self.playback_speed)
+        lateness = np.full(len(actions), np.nan)
+        paused_total = 0.0
+        start = time.perf_counter()
+        t0 = start
         try:
-            last_timestamp = 0
-            paused = False
-            
             for i, action in enumerate(actions):
-                if not self.is_playing:
-                    break
-                
-                # Check for control keys
-                if keyboard.is_pressed('esc'):
-                    print("\nEmergency stop activated")
+                stopped = False
+                while True:
+                    paused = self._poll_controls()
+                    if paused is None:
+                        stopped = True
+                        break
+                    t0 += paused
+                    paused_total += paused
+                    remaining = t0 + schedule[i] - time.perf_counter()
+                    if remaining <= SPIN_SECONDS:
+                        break
+                    time.sleep(min(remaining - SPIN_SECONDS, POLL_SECONDS))
+                if stopped:
                     break
-                
-                if keyboard.is_pressed('f9'):
-                    print("\nPlayback stopped by user")
-                    break
-                
-                if keyboard.is_pressed('f8'):
-                    paused = not paused
-                    status = "paused" if paused else "resumed"
-                    print(f"\nPlayback {status}")
-                    
-                    # Wait for key release
-                    while keyboard.is_pressed('f8'):
-                        time.sleep(0.1)
-                
-                # Handle pause
-                while paused and self.is_playing:
-                    time.sleep(0.1)
-                    if keyboard.is_pressed('f8'):
-                        paused = False
-                        print("Playback resumed")
-                        while keyboard.is_pressed('f8'):
-                            time.sleep(0.1)
-                
-                if not self.is_playing:
-                    break
-                
-                # Calculate delay based on timestamps
-                current_timestamp = action.get('timestamp', 0)
-                if i > 0:
-                    delay = (current_timestamp - last_timestamp) / self.playback_speed
-                    if delay > 0:
-                        time.sleep(delay)
-                
+
+                deadline = t0 + schedule[i]
+                while time.perf_counter() < deadline:
+                    pass
+                lateness[i] = time.perf_counter() - deadline
+
                 # Execute the action
                 self._execute_action(action)
-                last_timestamp = current_timestamp
-                
+
                 # Progress indicator
                 progress = (i + 1) / len(actions) * 100
                 print(f"\rProgress: {progress:.1f}% ({i + 1}/{len(actions)})", end='', flush=True)
-        
+
         except Exception as e:
             print(f"\nPlayback error: {e}")
-        
+
         finally:
             self.is_playing = False
+            self.last_playback_report = self._playback_report(schedule, lateness,
+                                                              time.perf_counter() - start - paused_total)
             print(f"\nPlayback completed")
-    
+            report = self.last_playback_report
+            if report['executed']:
+                print(f"Timing: {report['executed']}/{report['actions']} actions, lateness mean "
+                      f"{report['mean_ms']:.1f} ms, p95 {report['p95_ms']:.1f} ms, max {report['max_ms']:.1f} ms")
+
+    @staticmethod
+    def _playback_report(schedule: np.ndarray, lateness: np.ndarray, elapsed: float) -> Dict:
+        """Per-action lateness of one playback in milliseconds (actions not reached are left out)"""
+        executed = lateness[~np.isnan(lateness)]
+        values = sorted(executed * 1000)
+        return {
+            'actions': len(schedule),
+            'executed': len(values),
+            'scheduled_seconds': float(schedule[-1]) if len(schedule) else 0.0,
+            'elapsed_seconds': elapsed,
+            'mean_ms': float(np.mean(values)) if values else 0.0,
+            'p95_ms': float(percentile(values, 0.95)),
+            'max_ms': float(values[-1]) if values else 0.0,
+            'lateness_ms': [None if np.isnan(v) else round(float(v) * 1000, 3) for v in lateness]
+        }
+
     def _execute_action(self, action: Dict) -> None:
         """Execute a single action"""
         action_type = action.get('type', '')
@@ -143,22 +214,23 @@ class AttackPlayer:
         
         try:
             if action_type == 'click':
-                pyautogui.click(x, y)
+                # No pyautogui.PAUSE after each action: the schedule does the waiting
+                pyautogui.click(x, y, _pause=False)
                 print(f" - Click at ({x}, {y})")
             
             elif action_type == 'move':
-                pyautogui.moveTo(x, y)
+                pyautogui.moveTo(x, y, _pause=False)
                 print(f" - Move to ({x}, {y})")
             
             elif action_type == 'delay':
+                # The wait is part of the compiled schedule
                 duration = action.get('duration', 1.0) / self.playback_speed
-                time.sleep(duration)
                 print(f" - Delay {duration:.1f}s")
             
             elif action_type == 'drag':
                 start_x = action.get('start_x', x)
                 start_y = action.get('start_y', y)
-                pyautogui.drag(x - start_x, y - start_y, duration=0.5)
+                pyautogui.drag(x - start_x, y - start_y, duration=0.5, _pause=False)
                 print(f" - Drag from ({start_x}, {start_y}) to ({x}, {y})")
             
             else:
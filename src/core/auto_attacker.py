@@ -12,8 +12,15 @@ import keyboard
 
 from .attack_player import AttackPlayer
 from .screen_capture import ScreenCapture
+from .frame import Frame
 from .coordinate_mapper import CoordinateMapper
 from .ai_analyzer import AIAnalyzer
+from .loot_ocr import LootOCR
+from .townhall_detector import TownHallDetector
+from .payload_builder import PayloadBuilder
+from .decision_cascade import Decision
+from .analyzer_backends import AnalyzerBackend, create_backend
+from .screen_state import ScreenState, ScreenStateClassifier
 from ..utils.logger import Logger
 from ..utils.config import Config
 
@@ -36,13 +43,28 @@ class AutoAttacker:
             'successful_attacks': 0,
             'failed_attacks': 0,
             'start_time': None,
-            'last_attack_time': None
+            'last_attack_time': None,
+            'bases_scanned': 0,
+            'search_time': 0.0
         }
         
         self.attack_sessions = self.config.get('auto_attacker.attack_sessions', [])
         self.max_search_attempts = self.config.get('auto_attacker.max_search_attempts', 10)
+        self.max_townhall_level = self.config.get('auto_attacker.max_townhall_level', 12)
         self.current_session_index = 0
         
+        # Detects screen transitions so the search loop does not sleep blindly
+        self.state_classifier = ScreenStateClassifier(screen_capture, config)
+        
+        # Reads the enemy loot panel locally when AI analysis is disabled
+        self.loot_ocr = LootOCR(config)
+        # Rejects bases with a too strong Town Hall before any analyzer request
+        self.townhall_detector = TownHallDetector(config)
+        # Only the loot panel and Town Hall are uploaded to Gemini
+        self.payload_builder = PayloadBuilder(coordinate_mapper, self.townhall_detector, self.loot_ocr, config)
+        # By default a cascade: clear cases are decided locally, only borderline bases reach Gemini
+        self.decision_backend = self._build_decision_backend()
+        
         print("Auto Attacker initialized")
         print("Emergency stop: Ctrl+Alt+S")
     
@@ -81,6 +103,9 @@ class AutoAttacker:
         self.is_running = True
         self.stats['start_time'] = datetime.now()
         
+        if self.config.get('screen_capture.continuous_enabled', False):
+            self.screen_capture.start_continuous_capture()
+        
         self.auto_thread = threading.Thread(target=self._auto_attack_loop)
         self.auto_thread.daemon = True
         self.auto_thread.start()
@@ -101,6 +126,8 @@ class AutoAttacker:
         if self.auto_thread and self.auto_thread.is_alive():
             self.auto_thread.join(timeout=5)
         
+        self.screen_capture.stop_continuous_capture()
+        
         self.logger.info("Auto attacker stopped")
     
     def _auto_attack_loop(self) -> None:
@@ -115,13 +142,19 @@ class AutoAttacker:
                 self.logger.info("🎯 Starting new attack cycle...")
                 
                 # Execute attack sequence
-                if self._execute_attack_sequence():
+                successful = self._execute_attack_sequence()
+                if successful:
                     self.stats['successful_attacks'] += 1
                     self.logger.info("✅ Attack sequence completed successfully")
                 else:
                     self.stats['failed_attacks'] += 1
                     self.logger.warning("❌ Attack sequence failed")
                 
+                used = self.ai_analyzer.usage.end_attack(successful)
+                if used['requests']:
+                    self.logger.info(f"💰 AI usage this attack: {used['requests']} calls, "
+                                     f"{used['prompt_tokens'] + used['output_tokens']:,} tokens, ${used['cost']:.4f}")
+                
                 self.stats['total_attacks'] += 1
                 self.stats['last_attack_time'] = datetime.now()
                 
@@ -136,6 +169,13 @@ class AutoAttacker:
         finally:
             self.is_running = False
 
+    def _should_continue(self) -> bool:
+        """False once the bot was stopped or the emergency stop hotkey is held"""
+        if self.is_running and keyboard.is_pressed('ctrl+alt+s'):
+            self.logger.warning("Emergency stop activated!")
+            self.is_running = False
+        return self.is_running
+    
     def _safe_click(self, x: int, y: int, name: str = "button") -> None:
         """
         Robust click function that simulates human behavior and ensures
@@ -220,66 +260,10 @@ class AutoAttacker:
             self.logger.error("next_button not mapped")
             return False
         
-        search_attempts = 0
-        max_attempts = self.max_search_attempts
-        
-        while search_attempts < max_attempts and self.is_running:
-            search_attempts += 1
-            
-            # === START SEARCH SEQUENCE (Attempt 1 Only) ===
-            if search_attempts == 1:
-                # Step 2: Click find_a_match
-                find_coord = coords['find_a_match']
-                self.logger.info(f"2️⃣ Clicking find_a_match...")
-                self._safe_click(find_coord['x'], find_coord['y'], "find_a_match")
-                
-                # Step 2.5: Confirm Attack (MANDATORY)
-                if 'confirm_attack' in coords:
-                    confirm_coord = coords['confirm_attack']
-                    self.logger.info("2️⃣.5️⃣ Confirming attack...")
-                    time.sleep(2)  # Wait for button to animate/appear
-                    self._safe_click(confirm_coord['x'], confirm_coord['y'], "confirm_attack")
-                else:
-                    self.logger.error("⛔ 'confirm_attack' button is MISSING from coordinates!")
-                    self.logger.error("Please go to Coordinate Mapping and map the 'confirm_attack' button.")
-                    return False
-            
-            # Step 3: Wait 5 seconds for base to load
-            self.logger.info(f"3️⃣ Waiting 5 seconds for base to load... (Attempt {search_attempts}/{max_attempts})")
-            time.sleep(5)
-            
-            # Step 4: Check loot
-            screenshot_path = self.screen_capture.capture_game_screen()
-            if not screenshot_path:
-                self.logger.warning("Could not take screenshot, skipping base...")
-                continue
-
-            use_ai = self.config.get('ai_analyzer.enabled', False)
-            self.logger.info(f"AI Analysis is {'ENABLED' if use_ai else 'DISABLED'}.")
-
-            decision_to_attack = False
-            if use_ai:
-                self.logger.info("4️⃣ Checking enemy loot with AI...")
-                decision_to_attack = self._check_loot_with_ai(screenshot_path)
-            else:
-                self.logger.info("4️⃣ Performing simple loot check (AI Disabled)...")
-                decision_to_attack = self._check_loot()
-
-            if decision_to_attack:
-                self.logger.info("✅ Base is good! Proceeding with attack!")
-                return True
-            else:
-                # Step 5: Bad loot or AI said SKIP, click next
-                self.logger.info("❌ Base not suitable. Clicking next...")
-                if 'next_button' in coords:
-                    next_coord = coords['next_button']
-                    self._safe_click(next_coord['x'], next_coord['y'], "next_button")
-                    time.sleep(3)  # Wait for next base
-                else:
-                    self.logger.error("next_button not mapped, cannot skip.")
-                    return False
+        if self._search_for_good_base_cycle():
+            return True
         
-        self.logger.warning(f"Could not find good loot after {max_attempts} attempts")
+        self.logger.warning(f"Could not find good loot after {self.max_search_attempts} attempts")
         
         # Click end button and retry the entire search process
         self.logger.info("🔄 No good bases found - clicking end button to restart search...")
@@ -305,130 +289,119 @@ class AutoAttacker:
             
             # === START SEARCH SEQUENCE (Attempt 1 Only) ===
             if search_attempts == 1:
-                # Click find_a_match
+                # Step 2: Click find_a_match
                 find_coord = coords['find_a_match']
                 self.logger.info(f"2️⃣ Clicking find_a_match...")
                 self._safe_click(find_coord['x'], find_coord['y'], "find_a_match")
 
-                # Click confirm_attack (MANDATORY)
+                # Step 2.5: Confirm Attack (MANDATORY)
                 if 'confirm_attack' in coords:
                     confirm_coord = coords['confirm_attack']
                     self.logger.info("2️⃣.5️⃣ Confirming attack...")
-                    time.sleep(2)
+                    time.sleep(2)  # Wait for button to animate/appear
                     self._safe_click(confirm_coord['x'], confirm_coord['y'], "confirm_attack")
                 else:
-                    self.logger.error("⛔ 'confirm_attack' button is MISSING!")
+                    self.logger.error("⛔ 'confirm_attack' button is MISSING from coordinates!")
+                    self.logger.error("Please go to Coordinate Mapping and map the 'confirm_attack' button.")
                     return False
             
-            # Wait for base to load
-            self.logger.info(f"3️⃣ Waiting 5 seconds for base to load... (Attempt {search_attempts}/{max_attempts})")
-            time.sleep(5)
+            # Step 3: Wait for base to load (up to 5 seconds)
+            self.logger.info(f"3️⃣ Waiting for base to load... (Attempt {search_attempts}/{max_attempts})")
+            search_start = time.monotonic()
+            self._wait_for_screen(ScreenState.BASE_READY, timeout=5)
             
-            # Check loot
-            screenshot_path = self.screen_capture.capture_game_screen()
-            if not screenshot_path:
+            # Step 4: Check loot
+            frame = self.screen_capture.capture_game_frame()
+            if frame is None:
                 self.logger.warning("Could not take screenshot, skipping base...")
                 continue
             
-            use_ai = self.config.get('ai_analyzer.enabled', False)
-            self.logger.info(f"AI Analysis is {'ENABLED' if use_ai else 'DISABLED'}.")
-            
-            decision_to_attack = False
-            if use_ai:
-                self.logger.info("4️⃣ Checking enemy loot with AI...")
-                decision_to_attack = self._check_loot_with_ai(screenshot_path)
-            else:
-                self.logger.info("4️⃣ Performing simple loot check (AI Disabled)...")
-                decision_to_attack = self._check_loot()
+            self.logger.info("4️⃣ Checking enemy base...")
+            decision = self._decide(frame)
+            self.logger.info(f"Decision: {decision.verdict.upper()} by {decision.stage} - {decision.reason}")
+            decision_to_attack = decision.attack
             
             if decision_to_attack:
+                self._record_base_scanned(search_start)
                 self.logger.info("✅ Base is good! Proceeding with attack!")
                 return True
             else:
-                # Bad base, click next
+                # Step 5: Bad loot or AI said SKIP, click next
                 self.logger.info("❌ Base not suitable. Clicking next...")
                 next_coord = coords['next_button']
                 self._safe_click(next_coord['x'], next_coord['y'], "next_button")
-                time.sleep(3)
+                
+                # Wait (up to 3 seconds) for the current base to go away
+                self._wait_for_screen_exit(ScreenState.BASE_READY, timeout=3)
+                self._record_base_scanned(search_start)
         
         return False
     
-    def _check_loot_with_ai(self, screenshot_path: str) -> bool:
-        """Analyze the base with Gemini and decide whether to attack."""
-        min_gold = self.config.get('ai_analyzer.min_gold', 300000)
-        min_elixir = self.config.get('ai_analyzer.min_elixir', 300000)
-        min_dark = self.config.get('ai_analyzer.min_dark_elixir', 5000)
-
-        analysis = self.ai_analyzer.analyze_base(screenshot_path, min_gold, min_elixir, min_dark)
-
-        if analysis.get("error"):
-            self.logger.error(f"AI analysis failed: {analysis['reasoning']}")
+    def _wait_for_screen(self, state: str, timeout: float) -> bool:
+        """
+        Wait until the screen classifier sees the given state
+        Falls back to sleeping the full timeout when the state cannot be detected
+        """
+        if not self.state_classifier.is_configured(state):
+            time.sleep(timeout)
             return False
-
-        # Log detailed loot comparison for debugging
-        loot = analysis.get("loot", {})
-        extracted_gold = loot.get("gold", 0)
-        extracted_elixir = loot.get("elixir", 0)
-        extracted_dark = loot.get("dark_elixir", 0)
-        townhall_level = analysis.get("townhall_level", 0)
-        
-        self.logger.info(f"🔍 AI Extracted Loot: Gold={extracted_gold:,}, Elixir={extracted_elixir:,}, Dark={extracted_dark:,}")
-        self.logger.info(f"🏰 Town Hall Level: {townhall_level}")
-        self.logger.info(f"📋 Requirements: Gold={min_gold:,}, Elixir={min_elixir:,}, Dark={min_dark:,}, Max TH=12")
-        
-        # Check loot requirements
-        gold_ok = extracted_gold >= min_gold
-        elixir_ok = extracted_elixir >= min_elixir
-        dark_ok = extracted_dark >= min_dark
-        th_ok = townhall_level <= 12
-        
-        self.logger.info(f"✅/❌ Meets Requirements: Gold={gold_ok}, Elixir={elixir_ok}, Dark={dark_ok}, TH_Level={th_ok}")
-        
-        # Override AI decision if Town Hall is too high
-        if townhall_level > 12:
-            self.logger.info(f"❌ Overriding AI: Town Hall {townhall_level} is too strong (max allowed: 12)")
+        
+        result = self.state_classifier.wait_for_state(state, timeout)
+        if result is None:
+            self.logger.debug(f"Screen state '{state}' not detected within {timeout}s")
+            return False
+        return True
+    
+    def _wait_for_screen_exit(self, state: str, timeout: float) -> bool:
+        """Wait until the screen leaves the given state (sleeps the full timeout if undetectable)"""
+        if not self.state_classifier.is_configured(state):
+            time.sleep(timeout)
             return False
-
-        recommendation = analysis.get("recommendation", "SKIP").upper()
-        return recommendation == "ATTACK"
-
-    def _check_loot(self) -> bool:
-        """Check if enemy base has good loot"""
-        coords = self.coordinate_mapper.get_coordinates()
         
-        # Check each loot type
-        loot_checks = {
-            'gold': ('enemy_gold', self.config.get('ai_analyzer.min_gold', 300000)),
-            'elixir': ('enemy_elixir', self.config.get('ai_analyzer.min_elixir', 300000)),
-            'dark': ('enemy_dark_elixir', self.config.get('ai_analyzer.min_dark_elixir', 5000))
+        return self.state_classifier.wait_for_state_exit(state, timeout) is not None
+    
+    def _record_base_scanned(self, search_start: float) -> None:
+        """Count a scanned base and the time spent on it"""
+        self.stats['bases_scanned'] += 1
+        self.stats['search_time'] += time.monotonic() - search_start
+    
+    def _build_decision_backend(self) -> AnalyzerBackend:
+        """The decider chosen by auto_attacker.decision_backend (cascade unless configured)"""
+        name = self.config.get('auto_attacker.decision_backend', 'cascade')
+        components = dict(config=self.config, logger=self.logger, ai_analyzer=self.ai_analyzer,
+                          loot_ocr=self.loot_ocr, townhall_detector=self.townhall_detector,
+                          coordinate_mapper=self.coordinate_mapper, payload_builder=self.payload_builder,
+                          screen_capture=self.screen_capture, should_continue=self._should_continue)
+        try:
+            return create_backend(name, **components)
+        except ValueError as e:
+            self.logger.error(f"{e} - using the cascade")
+            return create_backend('cascade', **components)
+    
+    def _loot_thresholds(self) -> Dict:
+        """Current loot requirements and Town Hall limit"""
+        return {
+            'gold': self.config.get('ai_analyzer.min_gold', 300000),
+            'elixir': self.config.get('ai_analyzer.min_elixir', 300000),
+            'dark_elixir': self.config.get('ai_analyzer.min_dark_elixir', 5000),
+            'max_townhall_level': self.max_townhall_level
         }
-        
-        good_loot_count = 0
-        
-        for loot_name, (coord_name, min_value) in loot_checks.items():
-            if coord_name in coords:
-                coord = coords[coord_name]
-                self.logger.info(f"Checking {loot_name} at ({coord['x']}, {coord['y']})")
-                
-                # Simple check - in real game you'd use OCR here
-                # For now, assume good loot (you can implement OCR later)
-                has_good_loot = True  # Placeholder
-                
-                if has_good_loot:
-                    good_loot_count += 1
-                    self.logger.info(f"✅ {loot_name.capitalize()}: Good")
-                else:
-                    self.logger.info(f"❌ {loot_name.capitalize()}: Too low")
-        
-        # Require at least 2 out of 3 loot types to be good
-        is_good = good_loot_count >= 2
-        
-        if is_good:
-            self.logger.info(f"✅ Loot check PASSED - {good_loot_count}/3 loot types are good")
-        else:
-            self.logger.info(f"❌ Loot check FAILED - Only {good_loot_count}/3 loot types are good")
-        
-        return is_good
+    
+    def _decide(self, frame: Frame) -> Decision:
+        """Run the decision backend on a scouted base"""
+        ai_enabled = self.config.get('ai_analyzer.enabled', False)
+        unavailable = self.ai_analyzer.remote_unavailable() if ai_enabled else "AI disabled"
+        if not self.loot_ocr.has_glyphs() and unavailable:
+            # Nothing can read the loot - keep the old behaviour of accepting every base
+            # unless a local check rejects it
+            reason = unavailable
+            self.logger.warning(f"No digit glyphs in {self.loot_ocr.glyph_dir} and {reason} - assuming good loot")
+            decision = self.decision_backend.analyze(frame, self._loot_thresholds())
+            if decision.stage == "fallback":
+                decision.verdict = Decision.ATTACK
+            return decision
+        
+        return self.decision_backend.analyze(frame, self._loot_thresholds())
     
     def _click_end_button_and_retry(self) -> None:
         """Click end button when Town Hall is not detected and retry"""
@@ -476,6 +449,8 @@ class AutoAttacker:
         else:
             runtime_hours = 0
         
+        cascade_stats = self.decision_backend.get_stats()
+        ai_stats = self.ai_analyzer.get_stats()
         return {
             'is_running': self.is_running,
             'total_attacks': self.stats['total_attacks'],
@@ -484,7 +459,20 @@ class AutoAttacker:
             'success_rate': (self.stats['successful_attacks'] / max(self.stats['total_attacks'], 1)) * 100,
             'runtime_hours': runtime_hours,
             'attacks_per_hour': self.stats['total_attacks'] / max(runtime_hours, 1),
+            'api_cost_per_successful_attack': ai_stats['usage']['cost_per_successful_attack'],
             'last_attack': self.stats['last_attack_time'].strftime("%H:%M:%S") if self.stats['last_attack_time'] else "None",
+            'bases_scanned': self.stats['bases_scanned'],
+            'bases_per_minute': self.stats['bases_scanned'] / max(self.stats['search_time'] / 60, 1e-9) if self.stats['search_time'] else 0.0,
+            'seconds_per_base': self.stats['search_time'] / max(self.stats['bases_scanned'], 1),
+            'api_calls_per_attack': cascade_stats['stages'].get('gemini', {}).get('evaluated', 0) / max(self.stats['total_attacks'], 1),
+            'decision_cascade': cascade_stats,
+            'ai_latency': ai_stats['latency'],
+            'ai_failures': ai_stats['failures'],
+            'ai_cache': ai_stats['cache'],
+            'ai_breaker': ai_stats['breaker'],
+            'ai_hedging': ai_stats['hedging'],
+            'ai_usage': ai_stats['usage'],
+            'ai_budget_exhausted': self.ai_analyzer.usage.over_budget() is not None,
             'configured_sessions': self.attack_sessions.copy()
         }
     
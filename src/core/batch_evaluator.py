@@ -0,0 +1,234 @@
+"""
+Batch Evaluator - Run a decision backend over a directory of saved frames
+"""
+
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+import cv2
+
+from .frame import Frame
+from .frame_source import IMAGE_EXTENSIONS
+from .decision_cascade import Decision
+from ..utils.metrics import percentile
+
+LOOT_FIELDS = ('gold', 'elixir', 'dark_elixir')
+
+class StaticCoordinates:
+    """Fixed button coordinates behind the CoordinateMapper lookup, for offline runs"""
+
+    def __init__(self, coordinates: Dict):
+        self.coordinates = coordinates
+
+    @classmethod
+    def load(cls, path: str) -> "StaticCoordinates":
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def get_coordinates(self, button_name: Optional[str] = None) -> Dict:
+        if button_name:
+            return self.coordinates.get(button_name, {})
+        return self.coordinates.copy()
+
+class FrameResult:
+    """Outcome of one frame: the decision, what was read, and how long it took"""
+
+    COLUMNS = ['file', 'decision', 'stage', 'gold', 'elixir', 'dark_elixir',
+               'townhall_level', 'latency_ms', 'reason', 'error']
+
+    def __init__(self, filename: str, decision: Optional[Decision] = None, latency: float = 0.0,
+                 error: Optional[str] = None):
+        self.filename = filename
+        self.decision = decision
+        self.latency = latency
+        self.error = error
+
+    @property
+    def verdict(self) -> Optional[str]:
+        return self.decision.verdict if self.decision else None
+
+    def to_row(self) -> Dict:
+        decision = self.decision
+        loot = decision.loot if decision else {}
+        return {
+            'file': self.filename,
+            'decision': self.verdict or "",
+            'stage': decision.stage if decision else "",
+            'gold': loot.get('gold', ""),
+            'elixir': loot.get('elixir', ""),
+            'dark_elixir': loot.get('dark_elixir', ""),
+            'townhall_level': decision.townhall_level if decision and decision.townhall_level is not None else "",
+            'latency_ms': f"{self.latency * 1000:.2f}",
+            'reason': decision.reason if decision else "",
+            'error': self.error or ""
+        }
+
+class BatchEvaluator:
+    """
+    Feeds saved frames to an AnalyzerBackend from a bounded pool of worker
+    threads. Frames are decoded inside the workers, so at most `workers` are
+    held in memory; an optional token bucket caps how fast frames are handed
+    to the backend.
+    """
+
+    def __init__(self, backend, thresholds: Dict, workers: int = 4, rate_limiter=None,
+                 offset: Tuple[int, int] = (0, 0)):
+        """
+        Args:
+            backend: AnalyzerBackend to evaluate
+            thresholds: {'gold', 'elixir', 'dark_elixir', 'max_townhall_level'}
+            workers: Frames evaluated concurrently
+            rate_limiter: TokenBucket taken once per frame (None for no limit)
+            offset: Screen position of the screenshots' top-left corner
+        """
+        self.backend = backend
+        self.thresholds = thresholds
+        self.workers = max(1, workers)
+        self.rate_limiter = rate_limiter
+        self.offset = offset
+        self.elapsed = 0.0
+
+    @staticmethod
+    def list_frames(frames_dir: str) -> List[str]:
+        """Image files in frames_dir in name order"""
+        if not os.path.isdir(frames_dir):
+            return []
+        return [os.path.join(frames_dir, f) for f in sorted(os.listdir(frames_dir))
+                if f.lower().endswith(IMAGE_EXTENSIONS)]
+
+    def evaluate_file(self, path: str) -> FrameResult:
+        """Decide on one saved frame"""
+        filename = os.path.basename(path)
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            return FrameResult(filename, error="could not read image")
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        start = time.perf_counter()
+        try:
+            decision = self.backend.analyze(Frame(image, offset=self.offset), self.thresholds)
+        except Exception as e:
+            return FrameResult(filename, latency=time.perf_counter() - start, error=str(e))
+        return FrameResult(filename, decision, time.perf_counter() - start)
+
+    def run(self, frames_dir: str, limit: Optional[int] = None,
+            progress: Optional[Callable[[int, int], None]] = None) -> List[FrameResult]:
+        """
+        Evaluate every frame in frames_dir (the first limit frames if given)
+
+        Args:
+            progress: Called with (done, total) after each frame
+        """
+        files = self.list_frames(frames_dir)
+        if limit:
+            files = files[:limit]
+
+        done = 0
+        lock = threading.Lock()
+
+        def evaluate(path: str) -> FrameResult:
+            nonlocal done
+            result = self.evaluate_file(path)
+            with lock:
+                done += 1
+                if progress:
+                    progress(done, len(files))
+            return result
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch-eval") as executor:
+            results = list(executor.map(evaluate, files))
+        self.elapsed = time.perf_counter() - start
+        return results
+
+    @staticmethod
+    def write_csv(results: List[FrameResult], path: str) -> None:
+        """Results table, one row per frame"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FrameResult.COLUMNS)
+            writer.writeheader()
+            for result in results:
+                writer.writerow(result.to_row())
+
+    def summarize(self, results: List[FrameResult]) -> Dict:
+        """Verdict counts, throughput and latency percentiles of the last run"""
+        latencies = sorted(r.latency for r in results if r.error is None)
+        verdicts = {Decision.ATTACK: 0, Decision.SKIP: 0, Decision.UNCERTAIN: 0}
+        stages: Dict[str, int] = {}
+        for result in results:
+            if result.decision:
+                verdicts[result.verdict] = verdicts.get(result.verdict, 0) + 1
+                stages[result.decision.stage] = stages.get(result.decision.stage, 0) + 1
+        return {
+            'frames': len(results),
+            'errors': sum(1 for r in results if r.error is not None),
+            'verdicts': verdicts,
+            'stages': stages,
+            'elapsed': self.elapsed,
+            'fps': len(results) / self.elapsed if self.elapsed > 0 else 0.0,
+            'mean_ms': sum(latencies) / max(len(latencies), 1) * 1000,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000
+        }
+
+    @staticmethod
+    def compare(results: List[FrameResult], labels: Dict[str, Dict]) -> Dict:
+        """
+        Compare results with ground truth
+
+        Args:
+            labels: {"file.png": {"decision": "attack"|"skip", "gold": n, "elixir": n,
+                     "dark_elixir": n, "townhall_level": n}} - every key is optional
+
+        Returns:
+            Accuracy per field (percent of labelled frames), the decision
+            confusion counts and the list of mismatches
+        """
+        checked = {field: 0 for field in ('decision',) + LOOT_FIELDS + ('townhall_level',)}
+        correct = dict.fromkeys(checked, 0)
+        confusion: Dict[str, int] = {}
+        mismatches = []
+
+        for result in results:
+            label = labels.get(result.filename)
+            if label is None:
+                continue
+            decision = result.decision
+            actual = {
+                'decision': result.verdict,
+                'townhall_level': decision.townhall_level if decision else None
+            }
+            for field in LOOT_FIELDS:
+                actual[field] = decision.loot.get(field) if decision else None
+
+            for field in checked:
+                if field not in label:
+                    continue
+                expected = label[field]
+                if field == 'decision':
+                    expected = str(expected).lower()
+                    key = f"{expected}->{actual[field] or 'error'}"
+                    confusion[key] = confusion.get(key, 0) + 1
+                checked[field] += 1
+                if actual[field] == expected:
+                    correct[field] += 1
+                else:
+                    mismatches.append((result.filename, field, expected, actual[field]))
+
+        return {
+            'labelled': sum(1 for r in results if r.filename in labels),
+            'checked': checked,
+            'accuracy': {f: correct[f] / checked[f] * 100 for f in checked if checked[f]},
+            'confusion': confusion,
+            'mismatches': mismatches
+        }
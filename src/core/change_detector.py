@@ -0,0 +1,76 @@
+"""
+Change Detector - Cheap detection of screen changes on downsampled frames
+"""
+
+import time
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+
+from .frame import Frame
+
+class FrameChangeDetector:
+    """
+    Compares a tiny grayscale thumbnail of each frame against the thumbnail
+    of the last frame that was reported as changed. Comparing against the
+    last *reported* frame (not simply the previous one) means slow fades
+    still add up to a change.
+
+    The whole-frame mean misses small changes (a button appearing on a
+    still screen moves it by a fraction of a level), so the thumbnail is
+    also split into tiles and a single tile changing enough counts too.
+    With recheck_interval set, a frame is reported as changed at least
+    that often regardless, so a missed change can only delay a caller.
+    """
+
+    def __init__(self, size: Tuple[int, int] = (128, 72), threshold: float = 2.0, tile: int = 8,
+                 tile_threshold: float = 12.0, recheck_interval: Optional[float] = None):
+        """
+        Args:
+            size: Thumbnail (width, height) used for the comparison
+            threshold: Mean absolute grayscale difference that counts as a change
+            tile: Tile edge in thumbnail pixels for the local comparison
+            tile_threshold: Mean difference inside any one tile that counts as a change
+            recheck_interval: Seconds after which a frame counts as changed anyway (None for never)
+        """
+        self.size = size
+        self.threshold = threshold
+        self.tile = tile
+        self.tile_threshold = tile_threshold
+        self.recheck_interval = recheck_interval
+        self.reference = None
+        self.last_reported = 0.0
+
+    def thumbnail(self, frame: Frame) -> np.ndarray:
+        """Downsampled grayscale version of a frame"""
+        small = cv2.resize(frame.image, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def max_tile_difference(self, difference: np.ndarray) -> float:
+        """Largest mean difference over the tiles of a thumbnail difference"""
+        rows = difference.shape[0] // self.tile
+        cols = difference.shape[1] // self.tile
+        if not rows or not cols:
+            return float(np.mean(difference))
+        tiles = difference[:rows * self.tile, :cols * self.tile].reshape(rows, self.tile, cols, self.tile)
+        return float(tiles.mean(axis=(1, 3)).max())
+
+    def has_changed(self, frame: Frame) -> bool:
+        """True if the frame differs from the reference (which then becomes this frame)"""
+        thumbnail = self.thumbnail(frame)
+        now = time.monotonic()
+        if self.reference is not None and thumbnail.shape == self.reference.shape:
+            difference = np.abs(thumbnail - self.reference)
+            changed = (float(np.mean(difference)) >= self.threshold
+                       or self.max_tile_difference(difference) >= self.tile_threshold)
+            due = self.recheck_interval is not None and now - self.last_reported >= self.recheck_interval
+            if not (changed or due):
+                return False
+
+        self.reference = thumbnail
+        self.last_reported = now
+        return True
+
+    def reset(self) -> None:
+        """Forget the reference so the next frame counts as changed"""
+        self.reference = None
@@ -0,0 +1,141 @@
+"""
+Circuit Breaker - Stop calling a failing or slow backend and probe it now and then
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+class CircuitBreaker:
+    """
+    closed: calls go through; consecutive failures (or calls slower than
+            slow_call_threshold) are counted and open the breaker at
+            failure_threshold.
+    open: calls are refused for open_duration seconds.
+    half-open: one probe call is let through; success closes the breaker,
+               failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 3, slow_call_threshold: Optional[float] = None,
+                 open_duration: float = 60.0, on_state_change: Optional[Callable[[str, str, str], None]] = None):
+        """
+        Args:
+            failure_threshold: Consecutive bad calls that open the breaker
+            slow_call_threshold: Seconds after which a successful call still counts as bad (None to ignore)
+            open_duration: Seconds to wait before probing again
+            on_state_change: Called with (old_state, new_state, reason)
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.slow_call_threshold = slow_call_threshold
+        self.open_duration = open_duration
+        self.on_state_change = on_state_change
+
+        self.state = self.CLOSED
+        self.state_since = time.monotonic()
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+        self.time_in_state = {self.CLOSED: 0.0, self.OPEN: 0.0, self.HALF_OPEN: 0.0}
+        self.transitions = deque(maxlen=20)  # (time.time(), old, new, reason)
+        self.stats = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'rejected': 0, 'opened': 0}
+
+    def _set_state(self, state: str, reason: str) -> str:
+        """Switch state (lock held) and return the old one; callbacks run outside the lock"""
+        now = time.monotonic()
+        old = self.state
+        self.time_in_state[old] += now - self.state_since
+        self.state = state
+        self.state_since = now
+        self.transitions.append((time.time(), old, state, reason))
+        if state == self.OPEN:
+            self.stats['opened'] += 1
+        return old
+
+    def _notify(self, change: Optional[tuple]) -> None:
+        if change and self.on_state_change:
+            self.on_state_change(*change)
+
+    def is_open(self) -> bool:
+        """True while calls are refused (an open breaker whose probe is due counts as closed)"""
+        with self.lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self.state_since < self.open_duration
+            return self.state == self.HALF_OPEN and self.probe_in_flight
+
+    def allow_request(self) -> bool:
+        """Whether a call may go out now; every allowed call must be followed by a record_* call"""
+        change = None
+        with self.lock:
+            if self.state == self.OPEN and time.monotonic() - self.state_since >= self.open_duration:
+                reason = f"probing after {self.open_duration:g}s"
+                change = (self._set_state(self.HALF_OPEN, reason), self.HALF_OPEN, reason)
+            if self.state == self.OPEN or (self.state == self.HALF_OPEN and self.probe_in_flight):
+                self.stats['rejected'] += 1
+                allowed = False
+            else:
+                if self.state == self.HALF_OPEN:
+                    self.probe_in_flight = True
+                self.stats['calls'] += 1
+                allowed = True
+        self._notify(change)
+        return allowed
+
+    def record_success(self, latency: float) -> None:
+        """A call returned a usable answer after latency seconds"""
+        if self.slow_call_threshold is not None and latency > self.slow_call_threshold:
+            with self.lock:
+                self.stats['slow_calls'] += 1
+            self.record_failure(f"slow call ({latency:.1f}s)", count=False)
+            return
+
+        change = None
+        with self.lock:
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            if self.state != self.CLOSED:
+                change = (self._set_state(self.CLOSED, "probe succeeded"), self.CLOSED, "probe succeeded")
+        self._notify(change)
+
+    def record_failure(self, reason: str = "call failed", count: bool = True) -> None:
+        """A call failed or timed out"""
+        change = None
+        with self.lock:
+            if count:
+                self.stats['failures'] += 1
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                change = (self._set_state(self.OPEN, f"probe failed: {reason}"), self.OPEN, f"probe failed: {reason}")
+            elif self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+                reason = f"{self.consecutive_failures} bad calls in a row, last: {reason}"
+                change = (self._set_state(self.OPEN, reason), self.OPEN, reason)
+        self._notify(change)
+
+    def record_cancelled(self) -> None:
+        """An allowed call was abandoned by the caller; it says nothing about the backend"""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def get_stats(self) -> Dict:
+        """Current state, time spent in each state and recent state changes"""
+        with self.lock:
+            now = time.monotonic()
+            time_in_state = dict(self.time_in_state)
+            time_in_state[self.state] += now - self.state_since
+            return {
+                'state': self.state,
+                'state_seconds': now - self.state_since,
+                'time_in_state': time_in_state,
+                'consecutive_failures': self.consecutive_failures,
+                'calls': self.stats['calls'],
+                'failures': self.stats['failures'],
+                'slow_calls': self.stats['slow_calls'],
+                'rejected': self.stats['rejected'],
+                'opened': self.stats['opened'],
+                'transitions': list(self.transitions)
+            }
@@ -0,0 +1,291 @@
+"""
+Decision Cascade - Cheap local checks first, the Gemini analyzer only for borderline bases
+"""
+
+import time
+import threading
+from typing import Dict, List, Optional
+
+from .frame import Frame
+
+class Decision:
+    """Verdict on a scouted base"""
+
+    ATTACK = "attack"
+    SKIP = "skip"
+    UNCERTAIN = "uncertain"
+
+    def __init__(self, verdict: str, reason: str = "", stage: str = "", loot: Optional[Dict] = None,
+                 townhall_level: Optional[int] = None, fallback: Optional[str] = None):
+        self.verdict = verdict
+        self.reason = reason
+        self.stage = stage  # Stage that produced the verdict
+        self.loot = loot or {}
+        self.townhall_level = townhall_level
+        # Best guess of an uncertain stage, used if no later stage decides
+        self.fallback = fallback
+
+    @property
+    def attack(self) -> bool:
+        return self.verdict == Decision.ATTACK
+
+    def __repr__(self) -> str:
+        return f"Decision({self.verdict!r}, stage={self.stage!r}, reason={self.reason!r})"
+
+class CascadeStage:
+    """
+    One step of the cascade. evaluate() returns ATTACK or SKIP when the
+    base is a clear case, UNCERTAIN to pass it on to the next stage.
+    """
+
+    name = "stage"
+
+    def evaluate(self, frame: Frame, thresholds: Dict) -> Decision:
+        raise NotImplementedError
+
+    def is_available(self) -> bool:
+        """False when the stage has nothing to work with (it is then skipped)"""
+        return True
+
+class SignatureStage(CascadeStage):
+    """Recorded pixel signatures that mark a base as an instant skip or attack"""
+
+    name = "signature"
+
+    def __init__(self, screen_capture, skip_signatures: List[str], attack_signatures: List[str]):
+        self.screen_capture = screen_capture
+        self.skip_signatures = skip_signatures
+        self.attack_signatures = attack_signatures
+
+    def _recorded(self, names: List[str]) -> List[str]:
+        return [n for n in names if self.screen_capture.signatures.get(n) is not None]
+
+    def is_available(self) -> bool:
+        return bool(self._recorded(self.skip_signatures) or self._recorded(self.attack_signatures))
+
+    def evaluate(self, frame: Frame, thresholds: Dict) -> Decision:
+        for name in self._recorded(self.skip_signatures):
+            if self.screen_capture.check_signature(name, frame):
+                return Decision(Decision.SKIP, f"signature '{name}'")
+        for name in self._recorded(self.attack_signatures):
+            if self.screen_capture.check_signature(name, frame):
+                return Decision(Decision.ATTACK, f"signature '{name}'")
+        return Decision(Decision.UNCERTAIN)
+
+class TownHallStage(CascadeStage):
+    """Skips bases whose Town Hall is confidently detected above the allowed level"""
+
+    name = "townhall"
+
+    def __init__(self, detector, reject_score: float = 0.8):
+        self.detector = detector
+        self.reject_score = reject_score
+
+    def is_available(self) -> bool:
+        return self.detector.is_available()
+
+    def evaluate(self, frame: Frame, thresholds: Dict) -> Decision:
+        result = self.detector.detect(frame)
+        max_level = thresholds['max_townhall_level']
+        if result.level is not None and result.level > max_level and result.score >= self.reject_score:
+            return Decision(Decision.SKIP, f"Town Hall {result.level} > {max_level}", townhall_level=result.level)
+        return Decision(Decision.UNCERTAIN, townhall_level=result.level)
+
+class OCRStage(CascadeStage):
+    """
+    Reads the loot panel locally. Loot far below the requirements is a
+    clear skip and loot far above them a clear attack; anything in between
+    (or read with low glyph confidence) is left to later stages.
+    """
+
+    name = "ocr"
+
+    def __init__(self, loot_ocr, coordinate_mapper, skip_below: float = 0.7,
+                 attack_above: float = 1.3, min_confidence: float = 0.75):
+        self.loot_ocr = loot_ocr
+        self.coordinate_mapper = coordinate_mapper
+        self.skip_below = skip_below  # Fraction of the requirement that is clearly too low
+        self.attack_above = attack_above  # Multiple of the requirement that is clearly enough
+        self.min_confidence = min_confidence
+
+    def is_available(self) -> bool:
+        return self.loot_ocr.has_glyphs()
+
+    def evaluate(self, frame: Frame, thresholds: Dict) -> Decision:
+        reading = self.loot_ocr.read_loot(frame, self.coordinate_mapper.get_coordinates())
+        loot = {k: v for k, v in reading.values.items() if v is not None}
+
+        ratios = {}
+        for resource, value in loot.items():
+            if reading.confidence[resource] >= self.min_confidence:
+                ratios[resource] = value / max(thresholds[resource], 1)
+
+        # Same rule as before: at least 2 of the 3 loot types must meet the requirement
+        strict = Decision.ATTACK if sum(r >= 1.0 for r in ratios.values()) >= 2 else Decision.SKIP
+        summary = ", ".join(f"{k}={v:,}" for k, v in loot.items())
+
+        if sum(r >= self.attack_above for r in ratios.values()) >= 2:
+            return Decision(Decision.ATTACK, f"loot well above requirements ({summary})", loot=loot)
+        # Unread loot types might still be good, so they count in the base's favour here
+        possible = sum(r >= self.skip_below for r in ratios.values()) + (3 - len(ratios))
+        if possible < 2:
+            return Decision(Decision.SKIP, f"loot well below requirements ({summary})", loot=loot)
+        return Decision(Decision.UNCERTAIN, f"borderline loot ({summary})", loot=loot, fallback=strict)
+
+class GeminiStage(CascadeStage):
+    """
+    Full Gemini analysis; always decides unless the request fails. The
+    request runs in the background with a deadline while should_continue
+    is polled, so an emergency stop is noticed at once; a base whose
+    analysis misses the deadline is skipped.
+    """
+
+    name = "gemini"
+
+    def __init__(self, ai_analyzer, config=None, logger=None, payload_builder=None, should_continue=None):
+        self.ai_analyzer = ai_analyzer
+        self.config = config
+        self.logger = logger
+        self.payload_builder = payload_builder  # Sends cropped regions instead of the whole frame
+        self.should_continue = should_continue or (lambda: True)
+        self.deadline = config.get('ai_analyzer.decision_deadline', 8.0) if config else 8.0
+        self.poll_interval = 0.05
+
+    def is_available(self) -> bool:
+        enabled = self.config.get('ai_analyzer.enabled', False) if self.config else True
+        # While the circuit breaker is open or the budget is used up the local stages decide on their own
+        return enabled and self.ai_analyzer.remote_unavailable() is None
+
+    def evaluate(self, frame: Frame, thresholds: Dict) -> Decision:
+        image = self.payload_builder.build(frame) if self.payload_builder else frame
+        handle = self.ai_analyzer.analyze_base_async(image, thresholds['gold'], thresholds['elixir'],
+                                                     thresholds['dark_elixir'], timeout=self.deadline)
+
+        while not handle.done():
+            if not self.should_continue():
+                handle.cancel()
+                return Decision(Decision.SKIP, "stopped while waiting for AI analysis")
+            if handle.expired():
+                handle.cancel()
+                return Decision(Decision.SKIP, f"AI analysis missed the {self.deadline:g}s deadline")
+            handle.result(timeout=self.poll_interval)
+
+        analysis = handle.result()
+        if (analysis is None or analysis.get("error")) and handle.remaining() is not None and handle.remaining() <= 0:
+            return Decision(Decision.SKIP, f"AI analysis missed the {self.deadline:g}s deadline")
+        if analysis is None:
+            return Decision(Decision.UNCERTAIN, "AI analysis failed")
+        if analysis.get("circuit_open"):
+            return Decision(Decision.UNCERTAIN, "AI circuit open")
+        if analysis.get("over_budget"):
+            return Decision(Decision.UNCERTAIN, "AI budget used up")
+        if analysis.get("error"):
+            return Decision(Decision.UNCERTAIN, f"AI analysis failed: {analysis['reasoning']}")
+
+        loot = analysis.get("loot", {})
+        townhall_level = analysis.get("townhall_level", 0)
+        if self.logger:
+            self.logger.info(f"🔍 AI Extracted Loot: Gold={loot.get('gold', 0):,}, "
+                             f"Elixir={loot.get('elixir', 0):,}, Dark={loot.get('dark_elixir', 0):,}")
+            self.logger.info(f"🏰 Town Hall Level: {townhall_level}")
+
+        # Override AI decision if Town Hall is too high
+        if townhall_level > thresholds['max_townhall_level']:
+            return Decision(Decision.SKIP, f"Town Hall {townhall_level} is too strong", loot=loot,
+                            townhall_level=townhall_level)
+
+        recommendation = analysis.get("recommendation", "SKIP").upper()
+        verdict = Decision.ATTACK if recommendation == "ATTACK" else Decision.SKIP
+        return Decision(verdict, analysis.get("reasoning", ""), loot=loot, townhall_level=townhall_level)
+
+class DecisionCascade:
+    """
+    Runs the stages in order until one of them decides. Bases no stage is
+    sure about use the fallback of the last uncertain stage that offered
+    one, or uncertain_action. Per-stage counters show how many bases each
+    stage resolved and how long it took.
+    """
+
+    def __init__(self, stages: List[CascadeStage], uncertain_action: str = Decision.SKIP):
+        self.stages = stages
+        self.uncertain_action = uncertain_action
+        self.lock = threading.Lock()
+        self.stats = {
+            'decisions': 0,
+            'fallbacks': 0,
+            'stages': {stage.name: {'evaluated': 0, 'attack': 0, 'skip': 0, 'time': 0.0} for stage in stages}
+        }
+
+    def decide(self, frame: Frame, thresholds: Dict) -> Decision:
+        """
+        Decide whether to attack the base in the frame
+
+        Args:
+            frame: Scouted base
+            thresholds: {'gold', 'elixir', 'dark_elixir', 'max_townhall_level'}
+        """
+        fallback = None
+        context = Decision(Decision.UNCERTAIN)
+
+        for stage in self.stages:
+            if not stage.is_available():
+                continue
+
+            start = time.perf_counter()
+            decision = stage.evaluate(frame, thresholds)
+            elapsed = time.perf_counter() - start
+            decision.stage = stage.name
+
+            with self.lock:
+                stage_stats = self.stats['stages'][stage.name]
+                stage_stats['evaluated'] += 1
+                stage_stats['time'] += elapsed
+                if decision.verdict != Decision.UNCERTAIN:
+                    stage_stats[decision.verdict] += 1
+
+            # Carry what earlier stages learned into the final decision
+            context.loot = decision.loot or context.loot
+            if decision.townhall_level is not None:
+                context.townhall_level = decision.townhall_level
+
+            if decision.verdict != Decision.UNCERTAIN:
+                decision.loot = decision.loot or context.loot
+                if decision.townhall_level is None:
+                    decision.townhall_level = context.townhall_level
+                with self.lock:
+                    self.stats['decisions'] += 1
+                return decision
+
+            if decision.fallback is not None:
+                fallback = decision
+
+        with self.lock:
+            self.stats['decisions'] += 1
+            self.stats['fallbacks'] += 1
+
+        if fallback is not None:
+            return Decision(fallback.fallback, f"no stage was sure, {fallback.stage}: {fallback.reason}",
+                            "fallback", context.loot, context.townhall_level)
+        return Decision(self.uncertain_action, "no stage could decide", "fallback",
+                        context.loot, context.townhall_level)
+
+    def get_stats(self) -> Dict:
+        """Per-stage evaluated/resolved counts and average time"""
+        with self.lock:
+            decisions = self.stats['decisions']
+            stages = {}
+            for name, s in self.stats['stages'].items():
+                resolved = s['attack'] + s['skip']
+                stages[name] = {
+                    'evaluated': s['evaluated'],
+                    'attack': s['attack'],
+                    'skip': s['skip'],
+                    'resolved': resolved,
+                    'resolved_pct': resolved / max(decisions, 1) * 100,
+                    'avg_ms': s['time'] / max(s['evaluated'], 1) * 1000
+                }
+            return {
+                'decisions': decisions,
+                'fallbacks': self.stats['fallbacks'],
+                'stages': stages
+            }
@@ -0,0 +1,61 @@
+"""
+Frame - In-memory screen capture passed between capture, matching and analysis
+"""
+
+import time
+from typing import Optional, Tuple
+import numpy as np
+
+class Frame:
+    """A captured screen image held in memory (BGR pixel order, as used by OpenCV)"""
+
+    def __init__(self, image: np.ndarray, timestamp: Optional[float] = None,
+                 offset: Tuple[int, int] = (0, 0), sequence: Optional[int] = None):
+        """
+        Args:
+            image: BGR image array of shape (height, width, 3)
+            timestamp: Capture time (time.time()), defaults to now
+            offset: Screen position (x, y) of the image's top-left pixel
+            sequence: Capture sequence number when produced by continuous capture
+        """
+        self.image = image
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.offset = (int(offset[0]), int(offset[1]))
+        self.sequence = sequence
+
+    @property
+    def width(self) -> int:
+        return self.image.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.image.shape[0]
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """Screen region covered by this frame as (x, y, width, height)"""
+        return (self.offset[0], self.offset[1], self.width, self.height)
+
+    def to_rgb(self) -> np.ndarray:
+        """Return the image in RGB pixel order (new array)"""
+        return self.image[:, :, ::-1].copy()
+
+    def to_local(self, x: int, y: int) -> Tuple[int, int]:
+        """Convert screen coordinates to frame pixel coordinates"""
+        return (x - self.offset[0], y - self.offset[1])
+
+    def to_screen(self, x: int, y: int) -> Tuple[int, int]:
+        """Convert frame pixel coordinates to screen coordinates"""
+        return (x + self.offset[0], y + self.offset[1])
+
+    def crop(self, region: Tuple[int, int, int, int]) -> 'Frame':
+        """
+        Crop a screen region (x, y, width, height) out of this frame.
+        The returned frame shares pixel memory with this one (no copy).
+        """
+        x, y = self.to_local(region[0], region[1])
+        x0 = max(0, min(x, self.width))
+        y0 = max(0, min(y, self.height))
+        x1 = max(x0, min(x + region[2], self.width))
+        y1 = max(y0, min(y + region[3], self.height))
+        return Frame(self.image[y0:y1, x0:x1], self.timestamp, self.to_screen(x0, y0), self.sequence)
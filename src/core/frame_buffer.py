@@ -0,0 +1,159 @@
+"""
+Frame Buffer - Background continuous capture into a preallocated ring buffer
+"""
+
+import time
+import threading
+from typing import Dict, Optional
+import numpy as np
+
+from .frame import Frame
+from .frame_source import FrameSource
+
+class FrameRingBuffer:
+    """
+    Fixed-size ring of preallocated frame slots.
+
+    Readers get frames that point straight into the slot memory (no copy)
+    unless they ask for a copy. A slot is reused after `size - 1` newer
+    writes, so a reader that keeps a frame for longer than that must use
+    copy=True. Slots are written and published under the lock, so a copy
+    is never torn.
+    """
+
+    def __init__(self, size: int = 4):
+        if size < 2:
+            raise ValueError("Ring buffer needs at least 2 slots")
+
+        self.size = size
+        self.slots = None
+        self.timestamps = np.zeros(size, dtype=np.float64)
+        self.offsets = np.zeros((size, 2), dtype=np.int32)
+        self.sequence = 0  # Number of frames written so far
+        self.condition = threading.Condition()
+
+    def _allocate(self, shape) -> None:
+        """(Re)allocate slots for frames of the given shape"""
+        self.slots = np.empty((self.size,) + tuple(shape), dtype=np.uint8)
+
+    def write(self, frame: Frame) -> int:
+        """Copy a frame into the next slot and return its sequence number"""
+        with self.condition:
+            if self.slots is None or self.slots.shape[1:] != frame.image.shape:
+                # First frame or the game window was resized
+                self._allocate(frame.image.shape)
+
+            slot = self.sequence % self.size
+            np.copyto(self.slots[slot], frame.image)
+            self.timestamps[slot] = frame.timestamp
+            self.offsets[slot] = frame.offset
+
+            self.sequence += 1
+            self.condition.notify_all()
+            return self.sequence
+
+    def _frame_at(self, sequence: int, copy: bool = False) -> Frame:
+        slot = (sequence - 1) % self.size
+        offset = (int(self.offsets[slot][0]), int(self.offsets[slot][1]))
+        image = self.slots[slot].copy() if copy else self.slots[slot]
+        return Frame(image, float(self.timestamps[slot]), offset, sequence)
+
+    def latest(self, copy: bool = False) -> Optional[Frame]:
+        """Return the most recent frame (a view into its slot unless copy), or None if empty"""
+        with self.condition:
+            if self.sequence == 0:
+                return None
+            return self._frame_at(self.sequence, copy)
+
+    def wait_for_newer(self, sequence: int, timeout: float = 1.0, copy: bool = False) -> Optional[Frame]:
+        """
+        Block until a frame newer than `sequence` is available
+        Returns the newest frame, or None on timeout
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.sequence > sequence, timeout):
+                return None
+            return self._frame_at(self.sequence, copy)
+
+class ContinuousCapture:
+    """Grabs frames from a source at a fixed rate on a background thread"""
+
+    def __init__(self, source: FrameSource, buffer: FrameRingBuffer, fps: float = 10.0):
+        self.source = source
+        self.buffer = buffer
+        self.fps = fps
+        self.is_running = False
+        self.capture_thread = None
+        self.stats = {
+            'frames_captured': 0,
+            'grab_failures': 0,
+            'missed_ticks': 0,
+            'total_grab_time': 0.0,
+            'start_time': None
+        }
+
+    def start(self) -> None:
+        """Start the capture thread"""
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self.stats['start_time'] = time.monotonic()
+
+        self.capture_thread = threading.Thread(target=self._capture_loop)
+        self.capture_thread.daemon = True
+        self.capture_thread.start()
+
+    def stop(self) -> None:
+        """Stop the capture thread and close the source"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        if self.capture_thread:
+            self.capture_thread.join(timeout=2)
+        self.source.close()
+
+    def _capture_loop(self) -> None:
+        """Capture loop scheduled against absolute ticks so it does not drift"""
+        interval = 1.0 / self.fps
+        next_tick = time.monotonic()
+
+        while self.is_running:
+            grab_start = time.monotonic()
+            try:
+                frame = self.source.grab()
+            except Exception as e:
+                print(f"Frame capture error: {e}")
+                frame = None
+
+            if frame is not None:
+                self.buffer.write(frame)
+                self.stats['frames_captured'] += 1
+            else:
+                self.stats['grab_failures'] += 1
+            self.stats['total_grab_time'] += time.monotonic() - grab_start
+
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind: skip the ticks we missed instead of bursting
+                missed = int(-delay / interval)
+                self.stats['missed_ticks'] += missed
+                next_tick += missed * interval
+
+    def get_stats(self) -> Dict:
+        """Get capture statistics"""
+        elapsed = time.monotonic() - self.stats['start_time'] if self.stats['start_time'] else 0
+        captured = self.stats['frames_captured']
+        return {
+            'is_running': self.is_running,
+            'target_fps': self.fps,
+            'actual_fps': captured / elapsed if elapsed > 0 else 0.0,
+            'frames_captured': captured,
+            'grab_failures': self.stats['grab_failures'],
+            'missed_ticks': self.stats['missed_ticks'],
+            'avg_grab_ms': self.stats['total_grab_time'] / max(captured, 1) * 1000
+        }
@@ -0,0 +1,83 @@
+"""
+Frame Sources - Pluggable producers of frames for continuous capture
+"""
+
+import os
+import time
+from typing import List, Optional
+import cv2
+
+from .frame import Frame
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp')
+
+class FrameSource:
+    """Base class for anything that can produce frames"""
+
+    def grab(self) -> Optional[Frame]:
+        """Produce the next frame, or None if no frame is available"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the source"""
+        pass
+
+class ScreenFrameSource(FrameSource):
+    """Grabs the game window (or full screen) through a ScreenCapture instance"""
+
+    def __init__(self, screen_capture):
+        self.screen_capture = screen_capture
+
+    def grab(self) -> Optional[Frame]:
+        return self.screen_capture.grab_frame(self.screen_capture.refresh_game_window())
+
+class DirectoryFrameSource(FrameSource):
+    """
+    Replays saved screenshots from an image file or a directory of images.
+    Lets the capture pipeline run and be benchmarked without a game window.
+    """
+
+    def __init__(self, path: str, loop: bool = True, preload: bool = True):
+        """
+        Args:
+            path: Image file or directory containing images
+            loop: Start again from the first image after the last one
+            preload: Decode all images up front so grab() costs no disk I/O
+        """
+        self.path = path
+        self.loop = loop
+        self.files = self._list_files(path)
+        self.index = 0
+        self.images = [cv2.imread(f, cv2.IMREAD_COLOR) for f in self.files] if preload else None
+
+        if not self.files:
+            print(f"No images found in: {path}")
+
+    def _list_files(self, path: str) -> List[str]:
+        """List image files under path in name order"""
+        if os.path.isfile(path):
+            return [path]
+        if not os.path.isdir(path):
+            return []
+
+        return [os.path.join(path, f) for f in sorted(os.listdir(path))
+                if f.lower().endswith(IMAGE_EXTENSIONS)]
+
+    def grab(self) -> Optional[Frame]:
+        if not self.files:
+            return None
+
+        if self.index >= len(self.files):
+            if not self.loop:
+                return None
+            self.index = 0
+
+        if self.images is not None:
+            image = self.images[self.index]
+        else:
+            image = cv2.imread(self.files[self.index], cv2.IMREAD_COLOR)
+        self.index += 1
+
+        if image is None:
+            return None
+        return Frame(image, time.time())
@@ -0,0 +1,242 @@
+"""
+HTTP Client - Pooled keep-alive session with bounded retries for API calls
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+class RequestCancelled(Exception):
+    """Raised when a request is cancelled between attempts"""
+
+class RetryPolicy:
+    """Exponential backoff with full jitter; Retry-After is honored on 429/503"""
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 retry_after_max: float = 30.0, jitter: bool = True):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.jitter = jitter
+
+    def should_retry_status(self, status_code: int) -> bool:
+        return status_code in self.RETRY_STATUSES
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number attempt (1-based)"""
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.retry_after_max)
+
+        delay = min(self.backoff_base * (2 ** (attempt - 1)), self.backoff_max)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Retry-After header as seconds (delta-seconds or HTTP date), None if absent or invalid"""
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return (when - datetime.now(timezone.utc)).total_seconds()
+
+class _TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report how long TCP/TLS setup took"""
+
+    def __init__(self, on_connect, **kwargs):
+        self.on_connect = on_connect
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': self._timed_pool(HTTPConnectionPool),
+            'https': self._timed_pool(HTTPSConnectionPool)
+        }
+
+    def _timed_pool(self, pool_class):
+        on_connect = self.on_connect
+
+        class TimedConnection(pool_class.ConnectionCls):
+            def connect(self):
+                start = time.perf_counter()
+                super().connect()
+                on_connect(time.perf_counter() - start)
+
+        class TimedPool(pool_class):
+            ConnectionCls = TimedConnection
+
+        return TimedPool
+
+class HttpClient:
+    """
+    One requests.Session shared by all API calls, so TCP and TLS
+    connections are kept alive and reused between bases. Transient
+    failures (connection errors, timeouts, 429 and 5xx) are retried a
+    bounded number of times.
+    """
+
+    # Bodies longer than this are not worth reading just to keep the connection
+    DRAIN_MAX_BYTES = 64 * 1024
+
+    def __init__(self, policy: Optional[RetryPolicy] = None, pool_size: int = 4, timeout: float = 30.0):
+        self.policy = policy or RetryPolicy()
+        self.timeout = timeout
+        # Reads the rest of streamed bodies the caller stopped reading early
+        self.drain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="http-drain")
+        self.lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'attempts': 0,
+            'retries': 0,
+            'failures': 0,
+            'connections': 0,
+            'connect_time': 0.0,
+            'retry_wait': 0.0,
+            'drained': 0,
+            'drain_abandoned': 0
+        }
+
+        self.session = requests.Session()
+        adapter = _TimedAdapter(self._record_connect, pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _record_connect(self, elapsed: float) -> None:
+        with self.lock:
+            self.stats['connections'] += 1
+            self.stats['connect_time'] += elapsed
+
+    def _count(self, key: str, amount=1) -> None:
+        with self.lock:
+            self.stats[key] += amount
+
+    def release(self, response: requests.Response, background: bool = False,
+                reader: Optional[Iterator] = None) -> None:
+        """
+        Read what is left of a streamed body and close it, so its connection
+        goes back to the pool instead of being thrown away. Bodies longer
+        than DRAIN_MAX_BYTES (or that fail mid-read) are closed unread.
+
+        Args:
+            background: Drain on the client's drain thread and return at once
+            reader: The iterator the caller was reading the body with; it must
+                    be finished rather than dropped (dropping a half-read
+                    iterator closes the connection)
+        """
+        if background:
+            try:
+                self.drain_executor.submit(self.release, response, False, reader)
+                return
+            except RuntimeError:
+                pass  # Shut down; drain inline
+
+        try:
+            remaining = self.DRAIN_MAX_BYTES
+            for chunk in reader if reader is not None else response.iter_content(4096):
+                remaining -= len(chunk)
+                if remaining < 0:
+                    raise IOError("body too long to drain")
+            self._count('drained')
+        except Exception:
+            # Closing an unread body discards the connection
+            self._count('drain_abandoned')
+        finally:
+            response.close()
+
+    def post_json(self, url: str, payload: Dict, timeout: Optional[float] = None,
+                  headers: Optional[Dict] = None, deadline: Optional[float] = None,
+                  cancel_event: Optional[threading.Event] = None, stream: bool = False) -> requests.Response:
+        """
+        POST a JSON payload, retrying transient failures
+        Returns the final response (which may still be an error status);
+        raises the last exception when every attempt failed to connect
+
+        Args:
+            deadline: time.monotonic() by which the whole call (retries included) must finish;
+                      attempt timeouts are shortened to fit and Timeout is raised when it passes
+            cancel_event: Set it to stop retrying (RequestCancelled is raised)
+            stream: Return as soon as the headers arrive; the caller reads (and closes) the body
+        """
+        self._count('requests')
+        timeout = timeout if timeout is not None else self.timeout
+        headers = headers or {'Content-Type': 'application/json'}
+        attempt = 0
+
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise RequestCancelled("Request cancelled")
+            attempt_timeout = timeout
+            if deadline is not None:
+                attempt_timeout = min(timeout, deadline - time.monotonic())
+                if attempt_timeout <= 0:
+                    self._count('failures')
+                    raise requests.exceptions.Timeout("Deadline passed")
+
+            attempt += 1
+            self._count('attempts')
+            retry_after = None
+            try:
+                response = self.session.post(url, json=payload, headers=headers, timeout=attempt_timeout,
+                                             stream=stream)
+                if not self.policy.should_retry_status(response.status_code) or attempt > self.policy.max_retries:
+                    if response.status_code >= 400:
+                        self._count('failures')
+                    return response
+                retry_after = RetryPolicy.parse_retry_after(response.headers.get('Retry-After'))
+                # Read the error body so the retry can reuse the connection
+                self.release(response)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt > self.policy.max_retries:
+                    self._count('failures')
+                    raise
+
+            delay = self.policy.delay(attempt, retry_after)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                self._count('failures')
+                raise requests.exceptions.Timeout("Deadline passed before the next retry")
+            self._count('retries')
+            self._count('retry_wait', delay)
+            if cancel_event is not None:
+                cancel_event.wait(delay)
+            else:
+                time.sleep(delay)
+
+    def get_stats(self) -> Dict:
+        """Request, retry and connection setup metrics"""
+        with self.lock:
+            connections = self.stats['connections']
+            attempts = self.stats['attempts']
+            return {
+                'requests': self.stats['requests'],
+                'attempts': attempts,
+                'retries': self.stats['retries'],
+                'failures': self.stats['failures'],
+                'connections_opened': connections,
+                'connection_reuse_rate': (1 - connections / max(attempts, 1)) * 100 if attempts else 0.0,
+                'avg_connect_ms': self.stats['connect_time'] / max(connections, 1) * 1000,
+                'retry_wait_s': self.stats['retry_wait'],
+                'streams_drained': self.stats['drained'],
+                'drains_abandoned': self.stats['drain_abandoned']
+            }
+
+    def close(self) -> None:
+        self.drain_executor.shutdown(wait=True)
+        self.session.close()
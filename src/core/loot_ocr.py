@@ -0,0 +1,262 @@
+"""
+Loot OCR - Local digit reader for the enemy loot panel
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+
+from .frame import Frame
+from .frame_source import IMAGE_EXTENSIONS
+
+class LootReading:
+    """Loot amounts read from one frame (None where a number could not be read)"""
+
+    def __init__(self, values: Dict[str, Optional[int]], confidence: Dict[str, float], elapsed: float):
+        self.values = values
+        self.confidence = confidence  # Lowest glyph match score per resource
+        self.elapsed = elapsed
+
+    @property
+    def gold(self) -> Optional[int]:
+        return self.values.get('gold')
+
+    @property
+    def elixir(self) -> Optional[int]:
+        return self.values.get('elixir')
+
+    @property
+    def dark_elixir(self) -> Optional[int]:
+        return self.values.get('dark_elixir')
+
+    def is_complete(self) -> bool:
+        return all(v is not None for v in self.values.values())
+
+    def __repr__(self) -> str:
+        return f"LootReading({self.values}, {self.elapsed * 1000:.1f} ms)"
+
+class LootOCR:
+    """
+    Reads the enemy gold, elixir and dark elixir numbers without any
+    network call: threshold the bright digit pixels, split them into
+    connected components and match each one against a small library of
+    digit glyphs (templates/digits/<digit>*.png).
+    """
+
+    # Resource name -> coordinate name mapped by the user
+    RESOURCES = {
+        'gold': 'enemy_gold',
+        'elixir': 'enemy_elixir',
+        'dark_elixir': 'enemy_dark_elixir'
+    }
+
+    GLYPH_SIZE = (12, 18)  # (width, height) every glyph is normalised to
+
+    def __init__(self, config=None):
+        self.glyph_dir = config.get('loot_ocr.glyph_dir', 'templates/digits') if config else 'templates/digits'
+        region = config.get('loot_ocr.region', {}) if config else {}
+        # Region read around each mapped coordinate
+        self.region_left = region.get('left', 10)
+        self.region_top = region.get('top', 20)
+        self.region_width = region.get('width', 220)
+        self.region_height = region.get('height', 40)
+        self.brightness_threshold = config.get('loot_ocr.brightness_threshold', 190) if config else 190
+        self.min_glyph_score = config.get('loot_ocr.min_glyph_score', 0.6) if config else 0.6
+
+        self.glyph_labels = np.zeros(0, dtype=np.int64)
+        self.glyph_matrix = np.zeros((0, self.GLYPH_SIZE[0] * self.GLYPH_SIZE[1]), dtype=np.float32)
+        self.load_glyphs()
+
+    def load_glyphs(self) -> int:
+        """Load the digit glyph library, returns the number of glyphs"""
+        labels = []
+        vectors = []
+        if os.path.isdir(self.glyph_dir):
+            for filename in sorted(os.listdir(self.glyph_dir)):
+                if not filename[:1].isdigit() or not filename.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                glyph = cv2.imread(os.path.join(self.glyph_dir, filename), cv2.IMREAD_GRAYSCALE)
+                if glyph is None:
+                    continue
+                labels.append(int(filename[0]))
+                vectors.append(self._normalise(glyph > 127))
+
+        if vectors:
+            self.glyph_labels = np.array(labels, dtype=np.int64)
+            self.glyph_matrix = np.stack(vectors)
+        return len(labels)
+
+    def has_glyphs(self) -> bool:
+        return len(self.glyph_labels) > 0
+
+    def _normalise(self, mask: np.ndarray) -> np.ndarray:
+        """Resize a binary glyph and turn it into a zero-mean unit-length vector"""
+        resized = cv2.resize(mask.astype(np.float32), self.GLYPH_SIZE, interpolation=cv2.INTER_AREA).ravel()
+        resized -= resized.mean()
+        norm = np.linalg.norm(resized)
+        return resized / norm if norm > 0 else resized
+
+    def region_for(self, coord: Dict) -> Tuple[int, int, int, int]:
+        """Screen region (x, y, width, height) read for a mapped coordinate"""
+        return (coord['x'] - self.region_left, coord['y'] - self.region_top, self.region_width, self.region_height)
+
+    def segment(self, image: np.ndarray) -> List[np.ndarray]:
+        """Split a loot number image into glyph masks, left to right"""
+        return [mask for mask, _, _ in self._components(image)]
+
+    def _components(self, image: np.ndarray) -> List[Tuple[np.ndarray, int, int]]:
+        """Glyph-sized components as (mask, left, width), left to right"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        mask = (gray >= self.brightness_threshold).astype(np.uint8)
+
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if count <= 1:
+            return []
+
+        # Drop specks and anything much shorter than the tallest component (commas, noise)
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        keep = np.nonzero((heights >= 0.6 * heights.max()) & (stats[1:, cv2.CC_STAT_AREA] >= 4))[0] + 1
+        keep = keep[np.argsort(stats[keep, cv2.CC_STAT_LEFT])]
+
+        components = []
+        for label in keep:
+            x, y, w, h = stats[label, :4]
+            components.append((labels[y:y + h, x:x + w] == label, int(x), int(w)))
+        return components
+
+    def read_image(self, image: np.ndarray) -> Tuple[Optional[int], float]:
+        """Read one number from an image crop, returns (value or None, confidence)"""
+        if not self.has_glyphs() or image.size == 0:
+            return None, 0.0
+
+        components = self._components(image)
+        if not components:
+            return None, 0.0
+        glyphs = [mask for mask, _, _ in components]
+
+        # Correlate every glyph against the whole library in one matrix product
+        vectors = np.stack([self._normalise(g) for g in glyphs])
+        scores = vectors @ self.glyph_matrix.T
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(glyphs)), best]
+
+        # Low scoring components set apart from the number are icons or background, not digits
+        accepted = np.nonzero(best_scores >= self.min_glyph_score)[0]
+        if not len(accepted):
+            return None, 0.0
+
+        # A component that matches no glyph between accepted digits, or right next
+        # to the first or last one (closer than a glyph width), is a digit we could
+        # not read; dropping it would give a confidently wrong number
+        if len(accepted) != accepted[-1] - accepted[0] + 1:
+            return None, 0.0
+        glyph_width = float(np.median([components[i][2] for i in accepted]))
+        first, last = accepted[0], accepted[-1]
+        if first > 0:
+            _, left, width = components[first - 1]
+            if components[first][1] - (left + width) < glyph_width:
+                return None, 0.0
+        if last < len(components) - 1:
+            _, left, width = components[last]
+            if components[last + 1][1] - (left + width) < glyph_width:
+                return None, 0.0
+
+        digits = [str(self.glyph_labels[best[i]]) for i in accepted]
+        confidence = float(best_scores[accepted].min())
+        return int("".join(digits)), confidence
+
+    def read_loot(self, frame: Frame, coordinates: Dict) -> LootReading:
+        """Read all three loot amounts from a frame using the mapped enemy_* coordinates"""
+        start = time.perf_counter()
+        values = {}
+        confidence = {}
+
+        for resource, coord_name in self.RESOURCES.items():
+            if coord_name not in coordinates:
+                values[resource], confidence[resource] = None, 0.0
+                continue
+            crop = frame.crop(self.region_for(coordinates[coord_name]))
+            values[resource], confidence[resource] = self.read_image(crop.image)
+
+        return LootReading(values, confidence, time.perf_counter() - start)
+
+    def learn_glyphs(self, frame: Frame, coordinates: Dict, labels: Dict[str, int]) -> int:
+        """
+        Add glyphs to the library from a frame with known loot values
+        Only numbers that segment into exactly as many glyphs as digits are used
+        Returns the number of glyph images written
+        """
+        os.makedirs(self.glyph_dir, exist_ok=True)
+        written = 0
+
+        for resource, coord_name in self.RESOURCES.items():
+            if resource not in labels or coord_name not in coordinates:
+                continue
+            digits = str(labels[resource])
+            crop = frame.crop(self.region_for(coordinates[coord_name]))
+            glyphs = self.segment(crop.image)
+            if len(glyphs) != len(digits):
+                print(f"Skipping {resource}: found {len(glyphs)} glyphs for '{digits}'")
+                continue
+
+            for digit, glyph in zip(digits, glyphs):
+                filename = f"{digit}_{int(time.time() * 1000)}_{written}.png"
+                cv2.imwrite(os.path.join(self.glyph_dir, filename), glyph.astype(np.uint8) * 255)
+                written += 1
+
+        self.load_glyphs()
+        return written
+
+    def evaluate(self, frames_dir: str, labels_file: str, coordinates: Dict,
+                 offset: Tuple[int, int] = (0, 0)) -> Dict:
+        """
+        Read every labelled screenshot and compare with ground truth
+
+        Args:
+            frames_dir: Directory of saved screenshots
+            labels_file: JSON {"file.png": {"gold": n, "elixir": n, "dark_elixir": n}}
+            coordinates: Mapped button coordinates (screen coordinates)
+            offset: Screen position of the screenshots' top-left corner
+        """
+        with open(labels_file, 'r') as f:
+            labels = json.load(f)
+
+        correct = {resource: 0 for resource in self.RESOURCES}
+        totals = {resource: 0 for resource in self.RESOURCES}
+        exact = 0
+        latencies = []
+        errors = []
+
+        for filename, truth in sorted(labels.items()):
+            image = cv2.imread(os.path.join(frames_dir, filename), cv2.IMREAD_COLOR)
+            if image is None:
+                continue
+
+            reading = self.read_loot(Frame(image, offset=offset), coordinates)
+            latencies.append(reading.elapsed)
+
+            all_ok = True
+            for resource in self.RESOURCES:
+                if resource not in truth:
+                    continue
+                totals[resource] += 1
+                if reading.values[resource] == truth[resource]:
+                    correct[resource] += 1
+                else:
+                    all_ok = False
+                    errors.append((filename, resource, truth[resource], reading.values[resource]))
+            exact += all_ok
+
+        latencies.sort()
+        frames = len(latencies)
+        return {
+            'frames': frames,
+            'exact_match_rate': exact / max(frames, 1) * 100,
+            'accuracy': {r: correct[r] / max(totals[r], 1) * 100 for r in self.RESOURCES},
+            'mean_ms': sum(latencies) / max(frames, 1) * 1000,
+            'p95_ms': latencies[int(0.95 * (frames - 1))] * 1000 if frames else 0.0,
+            'errors': errors
+        }
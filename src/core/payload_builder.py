@@ -0,0 +1,176 @@
+"""
+Payload Builder - Compact images for the Gemini analyzer (cropped regions, lossy encoding)
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+
+from .frame import Frame
+from .analysis_cache import dhash, bright_mask_hash
+
+# Image format -> (MIME type, OpenCV extension)
+PAYLOAD_FORMATS = {
+    'JPEG': ('image/jpeg', '.jpg'),
+    'WEBP': ('image/webp', '.webp'),
+    'PNG': ('image/png', '.png')
+}
+
+class Payload:
+    """An encoded image ready to be sent, with what went into it"""
+
+    def __init__(self, data: bytes, mime_type: str, size: Tuple[int, int], encode_time: float,
+                 regions: List[str], fingerprint: Optional[Dict[str, int]] = None):
+        self.data = data
+        self.mime_type = mime_type
+        self.size = size  # (width, height) of the encoded image
+        self.encode_time = encode_time
+        self.regions = regions  # Names of the tiles, top to bottom ("full" for the whole frame)
+        self.fingerprint = fingerprint or {}  # Perceptual hash of each region, for the analysis cache
+
+    @property
+    def is_composite(self) -> bool:
+        return self.regions != ["full"]
+
+    def __repr__(self) -> str:
+        return (f"Payload({len(self.data) / 1024:.1f} KB {self.mime_type}, {self.size[0]}x{self.size[1]}, "
+                f"{self.encode_time * 1000:.1f} ms, {self.regions})")
+
+class PayloadBuilder:
+    """
+    Builds the image sent to Gemini. In "crops" mode only the loot panel
+    (around the enemy_* coordinates) and the Town Hall are cut out and
+    stacked into one small composite; "full" mode sends the whole frame
+    scaled down. Both are encoded as JPEG, WebP or PNG.
+    """
+
+    LOOT_COORDINATES = ('enemy_gold', 'enemy_elixir', 'enemy_dark_elixir')
+
+    def __init__(self, coordinate_mapper=None, townhall_detector=None, loot_ocr=None, config=None):
+        self.coordinate_mapper = coordinate_mapper
+        self.townhall_detector = townhall_detector
+        self.loot_ocr = loot_ocr  # Supplies the region read around each loot coordinate
+
+        self.mode = config.get('ai_payload.mode', 'crops') if config else 'crops'
+        self.image_format = (config.get('ai_payload.format', 'JPEG') if config else 'JPEG').upper()
+        self.quality = config.get('ai_payload.quality', 85) if config else 85
+        self.max_width = config.get('ai_payload.max_width', 1024) if config else 1024
+        self.loot_margin = config.get('ai_payload.loot_margin', 12) if config else 12
+        self.townhall_size = config.get('ai_payload.townhall_size', [280, 280]) if config else [280, 280]
+        # Used when the Town Hall detector has no sprites or found nothing
+        self.townhall_region = config.get('ai_payload.townhall_region', None) if config else None
+
+        if self.image_format not in PAYLOAD_FORMATS:
+            print(f"Unknown payload format {self.image_format}, using JPEG")
+            self.image_format = 'JPEG'
+
+    def encode(self, image: np.ndarray) -> Tuple[bytes, float]:
+        """Encode a BGR image in the configured format, returns (bytes, seconds)"""
+        start = time.perf_counter()
+        extension = PAYLOAD_FORMATS[self.image_format][1]
+        if self.image_format == 'JPEG':
+            params = [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)]
+        elif self.image_format == 'WEBP':
+            params = [cv2.IMWRITE_WEBP_QUALITY, int(self.quality)]
+        else:
+            params = [cv2.IMWRITE_PNG_COMPRESSION, 3]
+
+        ok, buffer = cv2.imencode(extension, image, params)
+        if not ok:
+            raise ValueError(f"Could not encode payload as {self.image_format}")
+        return buffer.tobytes(), time.perf_counter() - start
+
+    def _fit_width(self, image: np.ndarray) -> np.ndarray:
+        if image.shape[1] <= self.max_width:
+            return image
+        ratio = self.max_width / image.shape[1]
+        return cv2.resize(image, (self.max_width, int(image.shape[0] * ratio)), interpolation=cv2.INTER_AREA)
+
+    def loot_region(self, frame: Frame) -> Optional[Tuple[int, int, int, int]]:
+        """Screen region covering all three loot numbers, None if they are not mapped"""
+        coords = self.coordinate_mapper.get_coordinates() if self.coordinate_mapper else {}
+        regions = []
+        for name in self.LOOT_COORDINATES:
+            if name in coords:
+                if self.loot_ocr is not None:
+                    regions.append(self.loot_ocr.region_for(coords[name]))
+                else:
+                    regions.append((coords[name]['x'] - 10, coords[name]['y'] - 20, 220, 40))
+        if not regions:
+            return None
+
+        m = self.loot_margin
+        x1 = min(r[0] for r in regions) - m
+        y1 = min(r[1] for r in regions) - m
+        x2 = max(r[0] + r[2] for r in regions) + m
+        y2 = max(r[1] + r[3] for r in regions) + m
+        return (x1, y1, x2 - x1, y2 - y1)
+
+    def townhall_crop_region(self, frame: Frame) -> Tuple[int, int, int, int]:
+        """Screen region around the detected Town Hall (or the configured/central fallback)"""
+        width, height = self.townhall_size
+        if self.townhall_detector is not None and self.townhall_detector.is_available():
+            result = self.townhall_detector.detect(frame)
+            if result.location is not None:
+                return (result.location[0] - width // 2, result.location[1] - height // 2, width, height)
+
+        if self.townhall_region:
+            return tuple(self.townhall_region)
+
+        # The Town Hall is usually near the middle of a scouted base
+        x, y, w, h = frame.bounds
+        return (x + w // 4, y + h // 4, w // 2, h // 2)
+
+    def _region_hash(self, name: str, tile: np.ndarray) -> int:
+        """Loot digits need a pixel-exact hash, a perceptual hash is enough elsewhere"""
+        if name == "loot":
+            threshold = self.loot_ocr.brightness_threshold if self.loot_ocr is not None else 190
+            return bright_mask_hash(tile, threshold)
+        return dhash(tile)
+
+    def _tile(self, tiles: List[np.ndarray], gap: int = 4) -> np.ndarray:
+        """Stack tiles vertically, left aligned, on a black canvas"""
+        width = max(t.shape[1] for t in tiles)
+        height = sum(t.shape[0] for t in tiles) + gap * (len(tiles) - 1)
+        canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        y = 0
+        for tile in tiles:
+            canvas[y:y + tile.shape[0], :tile.shape[1]] = tile
+            y += tile.shape[0] + gap
+        return canvas
+
+    def build(self, frame: Frame) -> Payload:
+        """Build the payload image for one frame"""
+        start = time.perf_counter()
+        loot_region = self.loot_region(frame) if self.mode == 'crops' else None
+
+        if loot_region is None:
+            image = self._fit_width(frame.image)
+            names = ["full"]
+            fingerprint = {"full": dhash(image)}
+        else:
+            tiles = []
+            names = []
+            loot = frame.crop(loot_region).image
+            if loot.size:
+                tiles.append(loot)
+                names.append("loot")
+
+            townhall = frame.crop(self.townhall_crop_region(frame)).image
+            if townhall.size:
+                # The central fallback region can be large - keep the tile at half the payload width
+                limit = self.max_width // 2
+                if max(townhall.shape[:2]) > limit:
+                    ratio = limit / max(townhall.shape[:2])
+                    townhall = cv2.resize(townhall, (int(townhall.shape[1] * ratio), int(townhall.shape[0] * ratio)),
+                                          interpolation=cv2.INTER_AREA)
+                tiles.append(townhall)
+                names.append("townhall")
+            image = self._fit_width(self._tile(tiles)) if tiles else self._fit_width(frame.image)
+            fingerprint = {name: self._region_hash(name, tile) for name, tile in zip(names, tiles)} or {"full": dhash(image)}
+            names = names or ["full"]
+
+        data, _ = self.encode(image)
+        return Payload(data, PAYLOAD_FORMATS[self.image_format][0], (image.shape[1], image.shape[0]),
+                       time.perf_counter() - start, names, fingerprint)
@@ -0,0 +1,150 @@
+"""
+Pixel Signatures - Batched pixel probes and named color signatures for fast screen checks
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .frame import Frame
+
+def points_in_frame(frame: Frame, points: Sequence[Tuple[int, int]]) -> np.ndarray:
+    """Boolean mask of the screen points (x, y) that lie inside the frame"""
+    coords = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    xs = coords[:, 0] - frame.offset[0]
+    ys = coords[:, 1] - frame.offset[1]
+    return (xs >= 0) & (xs < frame.width) & (ys >= 0) & (ys < frame.height)
+
+def probe_pixels(frame: Frame, points: Sequence[Tuple[int, int]], patch: int = 0) -> np.ndarray:
+    """
+    Read the RGB color at many screen points from one frame
+
+    Args:
+        frame: Frame to read from
+        points: Screen coordinates (x, y)
+        patch: Average a (2*patch+1) square around each point instead of one pixel
+
+    Returns:
+        Float array of shape (len(points), 3) with RGB values
+        Points outside the frame read as NaN (averaging patches are clamped to its edge)
+    """
+    coords = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    inside = points_in_frame(frame, coords)
+    xs = np.clip(coords[:, 0] - frame.offset[0], 0, frame.width - 1)
+    ys = np.clip(coords[:, 1] - frame.offset[1], 0, frame.height - 1)
+
+    if patch <= 0:
+        bgr = frame.image[ys, xs].astype(np.float32)
+    else:
+        steps = np.arange(-patch, patch + 1)
+        patch_ys = np.clip(ys[:, None, None] + steps[None, :, None], 0, frame.height - 1)
+        patch_xs = np.clip(xs[:, None, None] + steps[None, None, :], 0, frame.width - 1)
+        bgr = frame.image[patch_ys, patch_xs].reshape(len(coords), -1, 3).mean(axis=1, dtype=np.float32)
+
+    bgr[~inside] = np.nan
+    return bgr[:, ::-1]
+
+class PixelSignature:
+    """A set of screen points with expected colors that identifies a screen"""
+
+    def __init__(self, name: str, points: List[Tuple[int, int]], colors: List[Tuple[int, int, int]],
+                 tolerances: List[int], patch: int = 0):
+        self.name = name
+        self.points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        self.colors = np.asarray(colors, dtype=np.float32).reshape(-1, 3)
+        self.tolerances = np.asarray(tolerances, dtype=np.float32).reshape(-1)
+        self.patch = patch
+
+    def match_fraction(self, frame: Frame) -> float:
+        """Fraction of points whose color is within tolerance (points outside the frame never match)"""
+        if len(self.points) == 0:
+            return 0.0
+        sampled = probe_pixels(frame, self.points, self.patch)
+        within = np.all(np.abs(sampled - self.colors) <= self.tolerances[:, None], axis=1)
+        return float(np.mean(within))
+
+    def matches(self, frame: Frame, min_fraction: float = 1.0) -> bool:
+        """True if enough points match their expected colors"""
+        return self.match_fraction(frame) >= min_fraction
+
+    def to_dict(self) -> Dict:
+        return {
+            'patch': self.patch,
+            'points': [
+                {'x': int(x), 'y': int(y), 'color': [int(c) for c in color], 'tolerance': int(tolerance)}
+                for (x, y), color, tolerance in zip(self.points, self.colors, self.tolerances)
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict) -> 'PixelSignature':
+        points = data.get('points', [])
+        return cls(
+            name,
+            [(p['x'], p['y']) for p in points],
+            [p['color'] for p in points],
+            [p.get('tolerance', 20) for p in points],
+            data.get('patch', 0)
+        )
+
+class PixelSignatureStore:
+    """Named pixel signatures stored next to button_coordinates.json"""
+
+    def __init__(self, coordinates_dir: str = "coordinates"):
+        self.signatures_file = os.path.join(coordinates_dir, "pixel_signatures.json")
+        self.signatures: Dict[str, PixelSignature] = {}
+
+        os.makedirs(coordinates_dir, exist_ok=True)
+        self.load_signatures()
+
+    def load_signatures(self) -> None:
+        """Load signatures from file"""
+        if not os.path.exists(self.signatures_file):
+            return
+
+        try:
+            with open(self.signatures_file, 'r') as f:
+                data = json.load(f)
+            self.signatures = {name: PixelSignature.from_dict(name, sig) for name, sig in data.items()}
+            print(f"Loaded {len(self.signatures)} pixel signatures")
+        except Exception as e:
+            print(f"Error loading pixel signatures: {e}")
+            self.signatures = {}
+
+    def save_signatures(self) -> None:
+        """Save signatures to file"""
+        try:
+            with open(self.signatures_file, 'w') as f:
+                json.dump({name: sig.to_dict() for name, sig in self.signatures.items()}, f, indent=2)
+            print(f"Pixel signatures saved to {self.signatures_file}")
+        except Exception as e:
+            print(f"Error saving pixel signatures: {e}")
+
+    def get(self, name: str) -> Optional[PixelSignature]:
+        return self.signatures.get(name)
+
+    def record(self, name: str, frame: Frame, points: List[Tuple[int, int]],
+               tolerance: int = 20, patch: int = 1) -> PixelSignature:
+        """Create a signature from the colors currently at the given points"""
+        outside = ~points_in_frame(frame, points)
+        if outside.any():
+            raise ValueError(f"Points outside the captured frame: {np.asarray(points)[outside].tolist()}")
+        colors = np.rint(probe_pixels(frame, points, patch)).astype(int).tolist()
+        signature = PixelSignature(name, points, colors, [tolerance] * len(points), patch)
+        self.signatures[name] = signature
+        self.save_signatures()
+        return signature
+
+    def remove(self, name: str) -> bool:
+        """Remove a signature"""
+        if name not in self.signatures:
+            return False
+        del self.signatures[name]
+        self.save_signatures()
+        return True
+
+    def check(self, name: str, frame: Frame, min_fraction: float = 1.0) -> bool:
+        """Check whether a frame matches a named signature (False if unknown)"""
+        signature = self.signatures.get(name)
+        return signature is not None and signature.matches(frame, min_fraction)
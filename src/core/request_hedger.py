@@ -0,0 +1,162 @@
+"""
+Request Hedger - Send a backup request when the first one is slower than usual
+"""
+
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+from ..utils.metrics import LatencyTracker
+
+class RequestHedger:
+    """
+    Runs a request and, if it has not answered after the hedge delay (a
+    percentile of recent primary latencies), fires an identical second
+    one. The first usable answer wins and the other request is cancelled.
+    At most max_hedge_rate of all requests are hedged.
+
+    Two latency distributions are kept: what callers actually waited, and
+    how long the primary request took on its own. A primary cancelled
+    because the hedge won is timed until it returns - when its (streamed)
+    answer starts to arrive, or sooner if it was waiting to retry - so the
+    primary-only figures lean low and the improvement is not overstated.
+    Primaries that fail outright are not timed: a fast error is not a fast
+    answer and would pull the hedge delay down.
+    """
+
+    def __init__(self, percentile: float = 0.95, min_delay: float = 1.0, max_hedge_rate: float = 0.1,
+                 min_samples: int = 50, workers: int = 4, on_hedge: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            percentile: Primary latency percentile used as the hedge delay
+            min_delay: Hedge delay until min_samples latencies are known, and its lower bound
+            max_hedge_rate: Largest fraction of requests that may be hedged
+            min_samples: Primary latencies needed before the percentile is trusted
+            workers: Threads running primary and hedge requests
+            on_hedge: Called each time a hedge is fired (for usage accounting)
+        """
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.on_hedge = on_hedge
+        self.executor = ThreadPoolExecutor(max_workers=max(2, workers), thread_name_prefix="ai-hedge")
+        self.futures = weakref.WeakSet()  # Requests submitted, so close() can cancel the queued ones
+        self.latency = LatencyTracker()  # What callers waited
+        self.primary_latency = LatencyTracker()  # What the primary alone took (lower bound when cancelled)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'hedges': 0, 'hedge_wins': 0, 'hedges_capped': 0}
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary before hedging"""
+        if self.primary_latency.count < self.min_samples:
+            return self.min_delay
+        return max(self.min_delay, self.primary_latency.percentile(self.percentile))
+
+    def _may_hedge(self) -> bool:
+        with self.lock:
+            if self.stats['hedges'] + 1 > self.max_hedge_rate * self.stats['requests']:
+                self.stats['hedges_capped'] += 1
+                return False
+            self.stats['hedges'] += 1
+            return True
+
+    def call(self, request: Callable[[threading.Event, bool], Optional[Dict]], deadline: Optional[float] = None,
+             cancel_event: Optional[threading.Event] = None) -> Optional[Dict]:
+        """
+        Run request(cancel_event, is_hedge), hedged; returns the first usable (non-None) answer
+
+        Args:
+            request: Sends one request; it must give up once its cancel event is set
+            deadline: time.monotonic() after which no hedge is started
+            cancel_event: Set it to cancel every request in flight
+        """
+        with self.lock:
+            self.stats['requests'] += 1
+
+        start = time.perf_counter()
+        events = {}
+        started = {}
+
+        def submit(name: str):
+            events[name] = threading.Event()
+            started[name] = time.perf_counter()
+            future = self.executor.submit(request, events[name], name == 'hedge')
+            self.futures.add(future)
+            return future
+
+        pending = {submit('primary'): 'primary'}
+        hedge_at = time.monotonic() + self.hedge_delay()
+        hedged = False
+        result = None
+        winner = None
+
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            now = time.monotonic()
+            if not hedged and now >= hedge_at:
+                hedged = True
+                if (deadline is None or now < deadline) and self._may_hedge():
+                    if self.on_hedge is not None:
+                        self.on_hedge()
+                    pending[submit('hedge')] = 'hedge'
+                continue
+
+            timeout = 0.05 if hedged else max(0.0, min(0.05, hedge_at - now))
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    answer = future.result()
+                except Exception:
+                    answer = None
+                if name == 'primary' and answer is not None:
+                    self.primary_latency.record(time.perf_counter() - started['primary'])
+                if answer is not None and result is None:
+                    result, winner = answer, name
+            if result is not None:
+                break
+
+        # Cancel whatever is still running: the loser, or everything on cancellation
+        for future, name in pending.items():
+            events[name].set()
+            if name == 'primary' and winner == 'hedge':
+                # Still timed: a cancelled request returns once its answer starts to arrive
+                future.add_done_callback(
+                    lambda _, begun=started['primary']: self.primary_latency.record(time.perf_counter() - begun))
+
+        if result is not None:
+            self.latency.record(time.perf_counter() - start)
+        if winner == 'hedge':
+            with self.lock:
+                self.stats['hedge_wins'] += 1
+        return result
+
+    def get_stats(self) -> Dict:
+        """How often hedges fired and won, and p99 latency with hedging vs the primary alone"""
+        with self.lock:
+            stats = dict(self.stats)
+        hedged = self.latency.get_stats()
+        primary = self.primary_latency.get_stats()
+        return {
+            'requests': stats['requests'],
+            'hedges': stats['hedges'],
+            'hedge_rate': stats['hedges'] / max(stats['requests'], 1) * 100,
+            'hedge_wins': stats['hedge_wins'],
+            'hedges_capped': stats['hedges_capped'],
+            'hedge_delay_ms': self.hedge_delay() * 1000,
+            'p50_ms': hedged['p50_ms'],
+            'p99_ms': hedged['p99_ms'],
+            'primary_p50_ms': primary['p50_ms'],
+            'primary_p99_ms': primary['p99_ms'],
+            'p99_saved_ms': primary['p99_ms'] - hedged['p99_ms']
+        }
+
+    def close(self) -> None:
+        # shutdown(cancel_futures=True) needs Python 3.9
+        for future in list(self.futures):
+            future.cancel()
+        self.executor.shutdown(wait=False)
@@ -7,19 +7,71 @@ import cv2
 import numpy as np
 import time
 import os
-from typing import Optional, Tuple, List
-from datetime import datetime
-import win32gui
-import win32con
+from typing import Dict, Optional, Tuple, List
+
+from .frame import Frame
+from .frame_source import FrameSource, ScreenFrameSource
+from .frame_buffer import FrameRingBuffer, ContinuousCapture
+from .template_registry import TemplateRegistry
+from .template_matcher import TemplateMatcher, MatchResults
+from .change_detector import FrameChangeDetector
+from .pixel_signatures import PixelSignatureStore, points_in_frame, probe_pixels
+from .screenshot_writer import ScreenshotWriter
+from .window_provider import WindowProvider, create_window_provider
 
 class ScreenCapture:
     """Handles screen capture and game window detection"""
     
-    def __init__(self):
-        self.screenshot_dir = "screenshots"
-        self.game_window_title = "Clash of Clans"
+    def __init__(self, config=None, window_provider: Optional[WindowProvider] = None):
+        self.config = config
+        self.screenshot_dir = config.get_directory("screenshots") if config else "screenshots"
+        self.game_window_titles = config.get_game_window_titles() if config else ["Clash of Clans", "BlueStacks", "Nox"]
+        self.game_window_handle = None
         self.game_window_bounds = None
         
+        # Window lookup is pluggable so a fake or X11 provider can stand in on Linux
+        if window_provider is None:
+            window_provider = create_window_provider(config.get('game.window_provider', 'auto') if config else 'auto')
+        self.window_provider = window_provider
+        self.window_check_interval = config.get('game.window_check_interval', 0.5) if config else 0.5
+        self.last_window_check = 0.0
+        
+        # Optional debug sink: also write every captured game frame to disk
+        self.save_debug_frames = config.get('screen_capture.save_debug_frames', False) if config else False
+        
+        # Screenshots are encoded and written on a background thread
+        self.writer = ScreenshotWriter(
+            self.screenshot_dir,
+            image_format=config.get('automation.screenshot_format', 'PNG') if config else 'PNG',
+            quality=config.get('screen_capture.screenshot_quality', 90) if config else 90,
+            png_compression=config.get('screen_capture.png_compression', 3) if config else 3,
+            queue_size=config.get('screen_capture.writer_queue_size', 32) if config else 32,
+            max_files=config.get('screen_capture.retention_max_files', 2000) if config else 2000,
+            max_total_mb=config.get('screen_capture.retention_max_mb', None) if config else None,
+            max_age_hours=config.get('screen_capture.retention_max_age_hours', None) if config else None,
+            retained_prefixes=config.get('screen_capture.retention_prefixes', ["frame"]) if config else ["frame"]
+        )
+        
+        # Templates are decoded once and served from memory
+        template_dir = config.get_directory("templates") if config else "templates"
+        self.templates = TemplateRegistry(template_dir)
+        loaded = self.templates.preload()
+        if loaded:
+            print(f"Loaded {loaded} templates from {template_dir}")
+        self.matcher = TemplateMatcher(
+            self.templates,
+            max_workers=config.get('game.template_matching_workers', None) if config else None,
+            mode=config.get('game.template_matching_mode', TemplateMatcher.EXHAUSTIVE) if config else TemplateMatcher.EXHAUSTIVE
+        )
+        
+        # Named pixel signatures for microsecond screen checks
+        self.signatures = PixelSignatureStore(config.get_directory("coordinates") if config else "coordinates")
+        
+        # Continuous capture (off until start_continuous_capture() is called)
+        self.continuous_capture = None
+        self.frame_buffer = None
+        self.last_wait_stats = {}
+        
         # Create screenshots directory
         os.makedirs(self.screenshot_dir, exist_ok=True)
         
@@ -29,130 +81,345 @@ class ScreenCapture:
     
     def find_game_window(self) -> Optional[Tuple[int, int, int, int]]:
         """Find the COC game window and return its bounds (x, y, width, height)"""
-        def enum_windows_callback(hwnd, windows):
-            if win32gui.IsWindowVisible(hwnd):
-                window_title = win32gui.GetWindowText(hwnd)
-                if "clash of clans" in window_title.lower() or "bluestacks" in window_title.lower() or "nox" in window_title.lower():
-                    rect = win32gui.GetWindowRect(hwnd)
-                    windows.append((hwnd, window_title, rect))
-        
-        windows = []
-        win32gui.EnumWindows(enum_windows_callback, windows)
+        windows = self.window_provider.find_windows(self.game_window_titles)
+        self.last_window_check = time.monotonic()
         
         if windows:
             # Take the first match
-            hwnd, title, rect = windows[0]
-            x, y, right, bottom = rect
-            width = right - x
-            height = bottom - y
-            self.game_window_bounds = (x, y, width, height)
-            print(f"Found game window: {title} at ({x}, {y}, {width}, {height})")
+            window = windows[0]
+            self.game_window_handle = window.handle
+            self._set_window_bounds(window.bounds)
+            x, y, width, height = window.bounds
+            print(f"Found game window: {window.title} at ({x}, {y}, {width}, {height})")
             return self.game_window_bounds
         
+        self.game_window_handle = None
+        self.game_window_bounds = None
         print("Could not find COC game window. Make sure the game is running.")
         return None
     
-    def capture_screen(self, region: Optional[Tuple[int, int, int, int]] = None) -> str:
+    def refresh_game_window(self) -> Optional[Tuple[int, int, int, int]]:
         """
-        Capture screenshot of specified region or full screen
-        Returns the path to the saved screenshot
+        Return the game window bounds, re-validating the cached window handle
+        instead of enumerating every window. Bounds are only re-read every
+        window_check_interval seconds, and only changed when the window
+        actually moved or was resized.
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"screenshot_{timestamp}.png"
-        filepath = os.path.join(self.screenshot_dir, filename)
+        now = time.monotonic()
+        if now - self.last_window_check < self.window_check_interval:
+            return self.game_window_bounds
+        self.last_window_check = now
         
+        if self.game_window_handle is None:
+            return self.find_game_window()
+        
+        if not self.window_provider.is_valid(self.game_window_handle):
+            print("Game window closed or hidden, searching again...")
+            return self.find_game_window()
+        
+        bounds = self.window_provider.get_bounds(self.game_window_handle)
+        if bounds is None:
+            return self.find_game_window()
+        
+        if bounds != self.game_window_bounds:
+            x, y, width, height = bounds
+            print(f"Game window moved/resized to ({x}, {y}, {width}, {height})")
+            self._set_window_bounds(bounds)
+        return self.game_window_bounds
+    
+    def _set_window_bounds(self, bounds: Tuple[int, int, int, int]) -> None:
+        """Update the cached bounds; learned template regions are stale after a move"""
+        if bounds != self.game_window_bounds:
+            self.game_window_bounds = bounds
+            self.matcher.forget_rois()
+    
+    def grab_frame(self, region: Optional[Tuple[int, int, int, int]] = None) -> Frame:
+        """
+        Capture the specified region (or full screen) into an in-memory frame
+        without touching the disk
+        """
+        timestamp = time.time()
         if region:
-            # Capture specific region
             screenshot = pyautogui.screenshot(region=region)
+            offset = (region[0], region[1])
         else:
-            # Capture full screen or game window if detected
-            if self.game_window_bounds:
-                screenshot = pyautogui.screenshot(region=self.game_window_bounds)
-            else:
-                screenshot = pyautogui.screenshot()
+            screenshot = pyautogui.screenshot()
+            offset = (0, 0)
         
-        screenshot.save(filepath)
+        image = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+        return Frame(image, timestamp, offset)
+    
+    def start_continuous_capture(self, fps: Optional[float] = None, buffer_size: Optional[int] = None,
+                                 source: Optional[FrameSource] = None) -> None:
+        """
+        Start grabbing frames on a background thread into a ring buffer.
+        Frame consumers then read the latest buffered frame instead of
+        taking their own screenshots. A custom source (e.g. a
+        DirectoryFrameSource) can replace the live screen.
+        """
+        if self.continuous_capture and self.continuous_capture.is_running:
+            print("Continuous capture already running")
+            return
+        
+        if fps is None:
+            fps = self.config.get('screen_capture.continuous_fps', 10) if self.config else 10
+        if buffer_size is None:
+            buffer_size = self.config.get('screen_capture.ring_buffer_size', 4) if self.config else 4
+        
+        if source is None:
+            self.refresh_game_window()
+            source = ScreenFrameSource(self)
+        
+        self.frame_buffer = FrameRingBuffer(buffer_size)
+        self.continuous_capture = ContinuousCapture(source, self.frame_buffer, fps)
+        self.continuous_capture.start()
+        print(f"Continuous capture started at {fps} FPS ({buffer_size} frame buffer)")
+    
+    def stop_continuous_capture(self) -> None:
+        """Stop the background capture thread"""
+        if self.continuous_capture:
+            self.continuous_capture.stop()
+            print("Continuous capture stopped")
+        self.continuous_capture = None
+        self.frame_buffer = None
+    
+    def is_capturing_continuously(self) -> bool:
+        """Check if the background capture thread is running"""
+        return self.continuous_capture is not None and self.continuous_capture.is_running
+    
+    def get_latest_frame(self, copy: bool = False) -> Optional[Frame]:
+        """
+        Latest buffered frame, or None without continuous capture
+        Without copy the frame is a view of a ring buffer slot, only valid briefly
+        """
+        if not self.is_capturing_continuously():
+            return None
+        return self.frame_buffer.latest(copy)
+    
+    def wait_for_new_frame(self, after_sequence: int = 0, timeout: float = 1.0) -> Optional[Frame]:
+        """Wait for a buffered frame newer than after_sequence"""
+        if not self.is_capturing_continuously():
+            return None
+        return self.frame_buffer.wait_for_newer(after_sequence, timeout)
+    
+    def get_frame(self, region: Optional[Tuple[int, int, int, int]] = None) -> Frame:
+        """
+        Get the current screen contents, from the continuous capture buffer
+        when it is running, otherwise by taking a screenshot
+        """
+        frame = self.get_latest_frame()
+        if frame is None:
+            return self.grab_frame(region)
+        return frame.crop(region) if region else frame
+    
+    def capture_game_frame(self, save_debug: bool = True) -> Optional[Frame]:
+        """
+        Capture the game window into an in-memory frame
+        save_debug=False keeps high-rate polling out of the debug frame dump
+        """
+        # Callers keep this frame through OCR, detection and payload building,
+        # longer than a ring buffer slot lives, so it gets its own copy
+        frame = self.get_latest_frame(copy=True)
+        if frame is None:
+            bounds = self.refresh_game_window()
+            if not bounds:
+                return None
+            
+            frame = self.grab_frame(bounds)
+        
+        if self.save_debug_frames and save_debug:
+            self.save_frame(frame, prefix="frame")
+        return frame
+    
+    def save_frame(self, frame: Frame, prefix: str = "screenshot", block: bool = False) -> Optional[str]:
+        """
+        Queue a frame for writing to the screenshots directory and return its path
+        Returns None if the writer queue is full and the frame was dropped
+        """
+        return self.writer.submit(frame, prefix, block)
+    
+    def capture_screen(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[str]:
+        """
+        Capture screenshot of specified region or full screen
+        Returns the path to the saved screenshot, or None if the writer is stopped
+        """
+        # Capture full screen or game window if detected
+        if not region and self.game_window_bounds:
+            region = self.game_window_bounds
+        
+        filepath = self.save_frame(self.grab_frame(region), block=True)
+        if filepath is None:
+            print("Screenshot not saved: writer is stopped")
+            return None
+        # Callers open the file straight away, so wait for the writer
+        self.writer.flush()
         print(f"Screenshot saved: {filepath}")
         return filepath
     
     def capture_game_screen(self) -> Optional[str]:
         """Capture screenshot of the game window specifically"""
-        if not self.game_window_bounds:
-            self.find_game_window()
-        
-        if self.game_window_bounds:
-            return self.capture_screen(self.game_window_bounds)
+        bounds = self.refresh_game_window()
+        if bounds:
+            return self.capture_screen(bounds)
         return None
     
-    def find_template_on_screen(self, template_path: str, threshold: float = 0.8, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[Tuple[int, int]]:
+    def find_template_on_screen(self, template: str, threshold: float = 0.8, region: Optional[Tuple[int, int, int, int]] = None,
+                                frame: Optional[Frame] = None) -> Optional[Tuple[int, int]]:
         """
         Find a template image on screen using template matching
+        The template is a name from the template registry (or a file path)
+        If a frame is given it is searched instead of taking a new screenshot
         Returns the center coordinates of the match if found
         """
-        # Take screenshot
-        if region:
-            screenshot = pyautogui.screenshot(region=region)
-        else:
-            screenshot = pyautogui.screenshot()
-        
-        # Convert to OpenCV format
-        screenshot_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+        if frame is None:
+            frame = self.get_frame(region)
+            region = None
         
-        # Load template
-        if not os.path.exists(template_path):
-            print(f"Template not found: {template_path}")
-            return None
-            
-        template = cv2.imread(template_path, cv2.IMREAD_COLOR)
+        match = self.matcher.match(frame, template, threshold, region)
+        return match.location if match.found else None
+    
+    def match_many(self, templates: List[str], frame: Optional[Frame] = None,
+                   rois: Optional[Dict[str, Tuple[int, int, int, int]]] = None,
+                   threshold: float = 0.8, grayscale: bool = False) -> MatchResults:
+        """
+        Match several templates against a single capture
+        Checking N templates costs one screenshot instead of N
+        """
+        if frame is None:
+            frame = self.get_frame()
+        return self.matcher.match_many(frame, templates, rois, threshold, grayscale)
+    
+    def wait_for_template(self, template: str, timeout: int = 30, threshold: float = 0.8, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[Tuple[int, int]]:
+        """
+        Wait for a template to appear on screen
+        Returns coordinates when found or None if timeout
+        Statistics for the wait are kept in self.last_wait_stats
+        """
+        coords, _ = self.wait_for_template_with_stats(template, timeout, threshold, region)
+        return coords
+    
+    def create_change_detector(self, recheck_interval: Optional[float] = None) -> FrameChangeDetector:
+        """Change detector with the screen_capture thresholds and recheck interval (unless one is given)"""
+        if recheck_interval is None:
+            recheck_interval = self.config.get('screen_capture.recheck_interval', 1.0) if self.config else 1.0
+        return FrameChangeDetector(
+            threshold=self.config.get('screen_capture.change_threshold', 2.0) if self.config else 2.0,
+            tile_threshold=self.config.get('screen_capture.change_tile_threshold', 12.0) if self.config else 12.0,
+            recheck_interval=recheck_interval
+        )
+    
+    def wait_for_template_with_stats(self, template: str, timeout: float = 30, threshold: float = 0.8,
+                                     region: Optional[Tuple[int, int, int, int]] = None) -> Tuple[Optional[Tuple[int, int]], Dict]:
+        """
+        Wait for a template to appear, matching only when the screen changed
+        (and at least every screen_capture.recheck_interval seconds, so a
+        change too small to notice is still picked up)
         
-        # Perform template matching
-        result = cv2.matchTemplate(screenshot_cv, template, cv2.TM_CCOEFF_NORMED)
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        Polls quickly right after a change and backs off while the screen
+        stays still. Returns (coordinates or None, stats) where stats holds
+        frames seen, matches run and time to detection.
+        """
+        min_interval = self.config.get('screen_capture.wait_min_interval', 0.05) if self.config else 0.05
+        max_interval = self.config.get('screen_capture.wait_max_interval', 0.5) if self.config else 0.5
+        detector = self.create_change_detector()
+        stats = {
+            'frames_seen': 0,
+            'matches_run': 0,
+            'time_to_detection': None,
+            'elapsed': 0.0
+        }
+        coords = None
+        interval = min_interval
+        sequence = 0
+        start_time = time.monotonic()
         
-        if max_val >= threshold:
-            # Calculate center coordinates
-            template_height, template_width = template.shape[:2]
-            center_x = max_loc[0] + template_width // 2
-            center_y = max_loc[1] + template_height // 2
+        while time.monotonic() - start_time < timeout:
+            if self.is_capturing_continuously():
+                frame = self.wait_for_new_frame(sequence, timeout=max_interval)
+                if frame is None:
+                    continue
+                sequence = frame.sequence
+                if region:
+                    frame = frame.crop(region)
+            else:
+                frame = self.grab_frame(region)
+            stats['frames_seen'] += 1
             
-            # Adjust for region offset if specified
-            if region:
-                center_x += region[0]
-                center_y += region[1]
+            if detector.has_changed(frame):
+                stats['matches_run'] += 1
+                match = self.matcher.match(frame, template, threshold)
+                if match.found:
+                    coords = match.location
+                    stats['time_to_detection'] = time.monotonic() - start_time
+                    break
+                # Screen is moving: look again soon
+                interval = min_interval
+            else:
+                # Nothing changed: back off
+                interval = min(interval * 2, max_interval)
             
-            return (center_x, center_y)
+            time.sleep(interval)
         
-        return None
+        stats['elapsed'] = time.monotonic() - start_time
+        self.last_wait_stats = stats
+        
+        if coords is None:
+            print(f"Template not found within timeout: {template} "
+                  f"({stats['frames_seen']} frames seen, {stats['matches_run']} matches run)")
+        return coords, stats
     
-    def wait_for_template(self, template_path: str, timeout: int = 30, threshold: float = 0.8, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[Tuple[int, int]]:
+    def _frame_covering(self, points) -> Frame:
         """
-        Wait for a template to appear on screen
-        Returns coordinates when found or None if timeout
+        Current frame for reading the given screen points; the continuous
+        capture frame only covers the game window, so points outside it
+        fall back to a full-screen grab
         """
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout:
-            coords = self.find_template_on_screen(template_path, threshold, region)
-            if coords:
-                return coords
-            time.sleep(0.5)
-        
-        print(f"Template not found within timeout: {template_path}")
-        return None
+        frame = self.get_frame()
+        if len(points) and not points_in_frame(frame, points).all():
+            frame = self.grab_frame()
+        return frame
     
     def get_pixel_color(self, x: int, y: int) -> Tuple[int, int, int]:
         """Get the RGB color of a pixel at specified coordinates"""
-        screenshot = pyautogui.screenshot()
-        pixel = screenshot.getpixel((x, y))
-        return pixel
+        r, g, b = self.probe_pixels([(x, y)])[0]
+        return (int(r), int(g), int(b))
+    
+    def probe_pixels(self, points: List[Tuple[int, int]], frame: Optional[Frame] = None,
+                     patch: int = 0) -> np.ndarray:
+        """
+        Read the RGB colors at many screen points from a single frame
+        With patch > 0 each value is the average of a small square around the point
+        Returns an array of shape (len(points), 3); points outside a given frame read as NaN
+        """
+        if frame is None:
+            frame = self._frame_covering(points)
+        return probe_pixels(frame, points, patch)
+    
+    def check_signature(self, name: str, frame: Optional[Frame] = None, min_fraction: float = 1.0) -> bool:
+        """Check whether the screen matches a named pixel signature"""
+        if frame is None:
+            signature = self.signatures.get(name)
+            if signature is None:
+                return False
+            frame = self._frame_covering(signature.points)
+        return self.signatures.check(name, frame, min_fraction)
+    
+    def record_signature(self, name: str, points: List[Tuple[int, int]], tolerance: int = 20,
+                         patch: int = 1) -> None:
+        """Store the current colors at the given points as a named pixel signature"""
+        self.signatures.record(name, self._frame_covering(points), points, tolerance, patch)
+        print(f"Pixel signature '{name}' recorded with {len(points)} points")
+    
+    def shutdown(self) -> None:
+        """Stop background capture, write queued screenshots and stop worker threads"""
+        self.stop_continuous_capture()
+        self.writer.stop()
+        self.matcher.shutdown()
     
     def save_template(self, region: Tuple[int, int, int, int], name: str) -> str:
         """Save a region of the screen as a template for later matching"""
-        template_dir = "templates"
-        os.makedirs(template_dir, exist_ok=True)
-        
         screenshot = pyautogui.screenshot(region=region)
-        filepath = os.path.join(template_dir, f"{name}.png")
+        filepath = os.path.join(self.templates.template_dir, f"{name}.png")
         screenshot.save(filepath)
         
         print(f"Template saved: {filepath}")
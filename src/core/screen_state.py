@@ -0,0 +1,124 @@
+"""
+Screen State - Fast classification of the current game screen
+"""
+
+import time
+from typing import List, Optional, Union
+
+from .frame import Frame
+
+class ScreenState:
+    """Game screens the auto attacker cares about"""
+
+    HOME = "home"
+    SEARCHING = "searching"  # Clouds while the next base loads
+    BASE_READY = "base_ready"  # Enemy base shown with the Next button
+    BATTLE = "battle"
+    RESULTS = "results"
+    UNKNOWN = "unknown"
+
+    # Checked in this order; the first state whose evidence is found wins.
+    # BASE_READY comes before BATTLE because scouting also shows End Battle.
+    PRIORITY = [RESULTS, BASE_READY, BATTLE, SEARCHING, HOME]
+
+DEFAULT_STATE_RULES = {
+    ScreenState.HOME: {"signatures": ["home_screen"], "templates": ["attack_button"]},
+    ScreenState.SEARCHING: {"signatures": ["search_clouds"], "templates": ["clouds"]},
+    ScreenState.BASE_READY: {"signatures": ["base_ready"], "templates": ["next_button"]},
+    ScreenState.BATTLE: {"signatures": ["battle_screen"], "templates": ["end_battle"]},
+    ScreenState.RESULTS: {"signatures": ["results_screen"], "templates": ["return_home"]}
+}
+
+class StateResult:
+    """Classifier output for one frame"""
+
+    def __init__(self, state: str, evidence: str = "", score: float = 0.0, elapsed: float = 0.0):
+        self.state = state
+        self.evidence = evidence  # Signature or template that decided the state
+        self.score = score
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        return f"StateResult({self.state!r}, evidence={self.evidence!r}, {self.elapsed * 1000:.1f} ms)"
+
+class ScreenStateClassifier:
+    """
+    Labels frames as home, searching, base ready, battle or results.
+
+    Pixel signatures are checked first (microseconds); templates are only
+    matched when no signature decided, all in one match_many call. Only
+    signatures and templates that actually exist are used, so a state with
+    no recorded evidence is simply never detected.
+    """
+
+    def __init__(self, screen_capture, config=None):
+        self.screen_capture = screen_capture
+        self.rules = config.get('screen_state.rules', DEFAULT_STATE_RULES) if config else DEFAULT_STATE_RULES
+        self.threshold = config.get_template_threshold() if config else 0.8
+        self.poll_interval = config.get('screen_state.poll_interval', 0.05) if config else 0.05
+        self.recheck_interval = config.get('screen_state.recheck_interval', 0.5) if config else 0.5
+
+    def _signatures(self, state: str) -> List[str]:
+        names = self.rules.get(state, {}).get('signatures', [])
+        return [n for n in names if self.screen_capture.signatures.get(n) is not None]
+
+    def _templates(self, state: str, available: set) -> List[str]:
+        return [n for n in self.rules.get(state, {}).get('templates', []) if n in available]
+
+    def is_configured(self, state: str) -> bool:
+        """True if there is any signature or template to detect this state"""
+        available = set(self.screen_capture.templates.list_templates())
+        return bool(self._signatures(state) or self._templates(state, available))
+
+    def classify(self, frame: Optional[Frame] = None) -> StateResult:
+        """Classify a frame (or the current screen)"""
+        start = time.perf_counter()
+        if frame is None:
+            frame = self.screen_capture.capture_game_frame()
+            if frame is None:
+                return StateResult(ScreenState.UNKNOWN)
+
+        for state in ScreenState.PRIORITY:
+            for name in self._signatures(state):
+                if self.screen_capture.check_signature(name, frame):
+                    return StateResult(state, name, 1.0, time.perf_counter() - start)
+
+        available = set(self.screen_capture.templates.list_templates())
+        template_states = {state: self._templates(state, available) for state in ScreenState.PRIORITY}
+        names = [n for templates in template_states.values() for n in templates]
+        if names:
+            results = self.screen_capture.match_many(names, frame, threshold=self.threshold)
+            for state in ScreenState.PRIORITY:
+                for name in template_states[state]:
+                    if results.found(name):
+                        return StateResult(state, name, results.score(name), time.perf_counter() - start)
+
+        return StateResult(ScreenState.UNKNOWN, elapsed=time.perf_counter() - start)
+
+    def wait_for_state(self, expected: Union[str, List[str]], timeout: float) -> Optional[StateResult]:
+        """
+        Wait until the screen reaches one of the expected states
+        Frames are only classified when the screen changed, or when it has
+        looked still for screen_state.recheck_interval seconds (a button
+        fading in after the last change can be too small to notice)
+        Returns the result, or None on timeout
+        """
+        expected = [expected] if isinstance(expected, str) else list(expected)
+        return self._wait(lambda state: state in expected, timeout)
+
+    def wait_for_state_exit(self, state: str, timeout: float) -> Optional[StateResult]:
+        """Wait until the screen is no longer in the given state"""
+        return self._wait(lambda current: current != state, timeout)
+
+    def _wait(self, condition, timeout: float) -> Optional[StateResult]:
+        detector = self.screen_capture.create_change_detector(self.recheck_interval)
+        deadline = time.monotonic() + timeout
+
+        while time.monotonic() < deadline:
+            frame = self.screen_capture.capture_game_frame(save_debug=False)
+            if frame is not None and detector.has_changed(frame):
+                result = self.classify(frame)
+                if condition(result.state):
+                    return result
+            time.sleep(self.poll_interval)
+        return None
@@ -0,0 +1,213 @@
+"""
+Screenshot Writer - Background screenshot encoding and saving with a retention policy
+"""
+
+import itertools
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+import cv2
+
+from .frame import Frame
+
+FORMAT_EXTENSIONS = {
+    'png': '.png',
+    'jpeg': '.jpg',
+    'jpg': '.jpg',
+    'webp': '.webp'
+}
+
+class ScreenshotWriter:
+    """
+    Encodes and writes frames on a background thread so capture never
+    blocks on disk. The queue is bounded: when it is full, frames are
+    dropped and counted instead of stalling the caller.
+
+    Retention only ever deletes files this writer named with one of the
+    retained prefixes (debug frames by default); screenshots taken on
+    request and anything else in the directory are left alone.
+    """
+
+    def __init__(self, directory: str = "screenshots", image_format: str = "png", quality: int = 90,
+                 png_compression: int = 3, queue_size: int = 32, max_files: Optional[int] = None,
+                 max_total_mb: Optional[float] = None, max_age_hours: Optional[float] = None,
+                 retained_prefixes: Optional[Iterable[str]] = ("frame",)):
+        """
+        Args:
+            directory: Where screenshots are written
+            image_format: "png", "jpeg" or "webp"
+            quality: JPEG/WebP quality (1-100)
+            png_compression: PNG compression level (0 = fastest, 9 = smallest)
+            queue_size: Frames waiting to be written before new ones are dropped
+            max_files: Keep at most this many screenshots (oldest deleted first)
+            max_total_mb: Keep the directory under this size
+            max_age_hours: Delete screenshots older than this
+            retained_prefixes: Name prefixes the retention limits apply to (None for every file this writer names)
+        """
+        image_format = image_format.lower()
+        if image_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unsupported screenshot format: {image_format}")
+
+        self.directory = directory
+        self.extension = FORMAT_EXTENSIONS[image_format]
+        self.encode_params = self._encode_params(image_format, quality, png_compression)
+        self.max_files = max_files
+        self.max_total_bytes = max_total_mb * 1024 * 1024 if max_total_mb else None
+        self.max_age = max_age_hours * 3600 if max_age_hours else None
+        self.retained_prefixes = tuple(retained_prefixes) if retained_prefixes is not None else None
+        prefixes = "|".join(re.escape(p) for p in self.retained_prefixes) if self.retained_prefixes is not None \
+            else r"[\w-]+"
+        extensions = "|".join(re.escape(e) for e in set(FORMAT_EXTENSIONS.values()))
+        # <prefix>_<YYYYmmdd>_<HHMMSS>_<microseconds>_<counter><ext>, as submit() names files
+        self.retained_name = re.compile(rf"^(?:{prefixes})_\d{{8}}_\d{{6}}_\d{{6}}_\d{{4,}}(?:{extensions})$",
+                                        re.IGNORECASE)
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.stats = {
+            'written': 0,
+            'dropped': 0,
+            'deleted': 0,
+            'errors': 0,
+            'bytes_written': 0,
+            'write_time': 0.0
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        # (mtime, size, path) of screenshots under retention, oldest first
+        self.files = deque(self._scan_existing())
+        self.total_bytes = sum(size for _, size, _ in self.files)
+
+        self.is_running = True
+        self.writer_thread = threading.Thread(target=self._writer_loop)
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+
+    def _encode_params(self, image_format: str, quality: int, png_compression: int) -> list:
+        if image_format == 'png':
+            return [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+        if image_format == 'webp':
+            return [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+        return [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+
+    def _scan_existing(self) -> list:
+        """Find screenshots an earlier run wrote under a retained prefix, so retention covers them too"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and self.retained_name.match(entry.name):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(files)
+
+    def submit(self, frame: Frame, prefix: str = "screenshot", block: bool = False) -> Optional[str]:
+        """
+        Queue a frame for writing and return the path it will be saved to
+        Returns None if the queue was full and the frame was dropped
+        (with block=True the caller waits for space instead), or if the
+        writer has been stopped
+        """
+        if not self.is_running:
+            return None
+
+        timestamp = datetime.fromtimestamp(frame.timestamp).strftime("%Y%m%d_%H%M%S_%f")
+        filename = f"{prefix}_{timestamp}_{next(self.counter):04d}{self.extension}"
+        filepath = os.path.join(self.directory, filename)
+
+        # Frames from the continuous capture ring buffer point into reused
+        # slots, so the writer gets its own copy
+        item = (frame.image.copy(), filepath, bool(self.retained_name.match(filename)))
+        try:
+            self.queue.put(item, block=block)
+        except queue.Full:
+            with self.lock:
+                self.stats['dropped'] += 1
+            return None
+        return filepath
+
+    def _writer_loop(self) -> None:
+        """Encode and write queued frames, then apply the retention policy"""
+        while self.is_running or not self.queue.empty():
+            try:
+                image, filepath, retained = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                start = time.perf_counter()
+                ok, encoded = cv2.imencode(self.extension, image, self.encode_params)
+                if not ok:
+                    raise IOError("encoding failed")
+                with open(filepath, 'wb') as f:
+                    f.write(encoded.tobytes())
+
+                with self.lock:
+                    self.stats['written'] += 1
+                    self.stats['bytes_written'] += len(encoded)
+                    self.stats['write_time'] += time.perf_counter() - start
+                if retained:
+                    self.files.append((time.time(), len(encoded), filepath))
+                    self.total_bytes += len(encoded)
+                    self._apply_retention()
+            except Exception as e:
+                with self.lock:
+                    self.stats['errors'] += 1
+                print(f"Error writing screenshot {filepath}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _apply_retention(self) -> None:
+        """Delete the oldest screenshots until every retention limit holds"""
+        now = time.time()
+        while self.files:
+            mtime, size, path = self.files[0]
+            too_many = self.max_files is not None and len(self.files) > self.max_files
+            too_big = self.max_total_bytes is not None and self.total_bytes > self.max_total_bytes
+            too_old = self.max_age is not None and now - mtime > self.max_age
+            if not (too_many or too_big or too_old):
+                break
+
+            self.files.popleft()
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+                with self.lock:
+                    self.stats['deleted'] += 1
+            except OSError:
+                pass
+
+    def flush(self) -> None:
+        """Block until every queued screenshot has been written, or the writer thread has exited"""
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks and self.writer_thread.is_alive():
+                self.queue.all_tasks_done.wait(0.5)
+
+    def stop(self) -> None:
+        """Write any queued screenshots and stop the writer thread"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.writer_thread.join(timeout=10)
+
+    def get_stats(self) -> Dict:
+        """Get writer statistics"""
+        with self.lock:
+            written = self.stats['written']
+            return {
+                'queued': self.queue.qsize(),
+                'written': written,
+                'dropped': self.stats['dropped'],
+                'deleted': self.stats['deleted'],
+                'errors': self.stats['errors'],
+                'bytes_written': self.stats['bytes_written'],
+                'avg_write_ms': self.stats['write_time'] / max(written, 1) * 1000,
+                'files_on_disk': len(self.files),
+                'disk_usage_mb': self.total_bytes / (1024 * 1024)
+            }
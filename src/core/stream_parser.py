@@ -0,0 +1,87 @@
+"""
+Stream Parser - Incremental reading of the analyzer's streamed JSON answer
+"""
+
+import json
+import re
+from typing import Dict, Iterable, Iterator, Optional
+
+# A value only counts once the character after it shows it is complete
+_NUMBER_FIELD = r'"{name}"\s*:\s*(-?\d+)\s*[,}}\s]'
+_STRING_FIELD = r'"{name}"\s*:\s*"((?:[^"\\]|\\.)*)"'
+
+def iter_sse_data(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the data payload of each server-sent event from an iterable of lines"""
+    data = []
+    for line in lines:
+        if line is None:
+            continue
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith("data:"):
+            data.append(line[5:].lstrip())
+    if data:
+        yield "\n".join(data)
+
+def chunk_text(event: Dict) -> str:
+    """Text carried by one streamed generateContent chunk"""
+    try:
+        parts = event['candidates'][0]['content']['parts']
+    except (KeyError, IndexError, TypeError):
+        return ""
+    return "".join(part.get('text', '') for part in parts)
+
+class StreamingAnalysisScanner:
+    """
+    Accumulates streamed text and pulls out the decision fields as soon as
+    each one is complete, so the caller can stop the stream without waiting
+    for the rest of the answer (the free-text reasoning comes last).
+    """
+
+    LOOT_FIELDS = ('gold', 'elixir', 'dark_elixir')
+
+    def __init__(self):
+        self.text = ""
+        self.fields: Dict = {}
+
+    def feed(self, chunk: str) -> None:
+        self.text += chunk
+        for name in self.LOOT_FIELDS + ('townhall_level',):
+            if name not in self.fields:
+                match = re.search(_NUMBER_FIELD.format(name=name), self.text)
+                if match:
+                    self.fields[name] = int(match.group(1))
+        for name in ('recommendation', 'difficulty', 'reasoning'):
+            if name not in self.fields:
+                match = re.search(_STRING_FIELD.format(name=name), self.text)
+                if match:
+                    self.fields[name] = json.loads(f'"{match.group(1)}"')
+
+    def is_decided(self) -> bool:
+        """True once loot, Town Hall level and recommendation have all arrived"""
+        return all(name in self.fields for name in self.LOOT_FIELDS + ('townhall_level', 'recommendation'))
+
+    def complete(self) -> Optional[Dict]:
+        """The whole answer if the accumulated text is complete JSON, else None"""
+        try:
+            return json.loads(self.text.strip())
+        except json.JSONDecodeError:
+            return None
+
+    def result(self) -> Dict:
+        """Analysis dict in the same shape as a non-streamed answer"""
+        full = self.complete()
+        if full is not None:
+            return full
+        return {
+            "loot": {name: self.fields.get(name, 0) for name in self.LOOT_FIELDS},
+            "townhall_level": self.fields.get('townhall_level', 0),
+            "difficulty": self.fields.get('difficulty', "Unknown"),
+            "recommendation": self.fields.get('recommendation', 'SKIP'),
+            "reasoning": self.fields.get('reasoning', "(stream closed after the decision)")
+        }
@@ -0,0 +1,277 @@
+"""
+Template Matcher - Template matching against in-memory frames
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+
+from .frame import Frame
+from .template_registry import TemplateRegistry
+
+class TemplateMatch:
+    """Outcome of matching one template against a frame"""
+
+    def __init__(self, name: str, score: float, location: Optional[Tuple[int, int]], threshold: float):
+        self.name = name
+        self.score = score
+        self.location = location  # Screen coordinates of the match center
+        self.threshold = threshold
+
+    @property
+    def found(self) -> bool:
+        return self.location is not None and self.score >= self.threshold
+
+    def __repr__(self) -> str:
+        return f"TemplateMatch({self.name!r}, score={self.score:.3f}, location={self.location})"
+
+class MatchResults:
+    """Scores for several templates matched against the same frame"""
+
+    def __init__(self, matches: Dict[str, TemplateMatch]):
+        self.matches = matches
+
+    def __getitem__(self, name: str) -> TemplateMatch:
+        return self.matches[name]
+
+    def found(self, name: str) -> bool:
+        match = self.matches.get(name)
+        return match is not None and match.found
+
+    def score(self, name: str) -> float:
+        match = self.matches.get(name)
+        return match.score if match else 0.0
+
+    def location(self, name: str) -> Optional[Tuple[int, int]]:
+        match = self.matches.get(name)
+        return match.location if match and match.found else None
+
+    def best(self) -> Optional[TemplateMatch]:
+        """Highest scoring template that passed its threshold"""
+        found = [m for m in self.matches.values() if m.found]
+        return max(found, key=lambda m: m.score) if found else None
+
+class PreparedFrame:
+    """A frame plus lazily computed grayscale and pyramid versions shared by several matches"""
+
+    def __init__(self, frame: Frame):
+        self.frame = frame
+        self._gray = None
+        self._pyramid = []
+
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.frame.image, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    def pyramid(self, level: int) -> np.ndarray:
+        """Grayscale frame downscaled `level` times by a factor of 2"""
+        if not self._pyramid:
+            self._pyramid.append(self.gray())
+        while len(self._pyramid) <= level:
+            self._pyramid.append(cv2.pyrDown(self._pyramid[-1]))
+        return self._pyramid[level]
+
+class TemplateMatcher:
+    """Matches registry templates against frames, several at a time on a thread pool"""
+
+    EXHAUSTIVE = "exhaustive"
+    PYRAMID = "pyramid"
+
+    def __init__(self, registry: TemplateRegistry, max_workers: Optional[int] = None,
+                 mode: str = EXHAUSTIVE, pyramid_level: int = 2, candidates: int = 3):
+        """
+        Args:
+            registry: Template registry to match from
+            max_workers: Thread pool size for match_many
+            mode: "exhaustive" (full resolution everywhere) or "pyramid"
+                  (learned ROI first, then coarse search refined at full resolution)
+            pyramid_level: How many times the frame is halved for the coarse search
+            candidates: Coarse candidates refined at full resolution
+        """
+        self.registry = registry
+        self.mode = mode
+        self.pyramid_level = pyramid_level
+        self.candidates = candidates
+
+        # Screen region around the last hit of each template, searched first
+        self.learned_rois: Dict[str, Tuple[int, int, int, int]] = {}
+        self.stats = {
+            'roi_hits': 0,
+            'coarse_searches': 0,
+            'exhaustive_searches': 0
+        }
+
+        # cv2.matchTemplate releases the GIL, so threads give real parallelism
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 4),
+                                           thread_name_prefix="template-match")
+
+    def match(self, frame, name: str, threshold: float = 0.8,
+              region: Optional[Tuple[int, int, int, int]] = None, grayscale: bool = False,
+              mode: Optional[str] = None) -> TemplateMatch:
+        """
+        Match a single template against a frame (optionally within a screen region)
+        `frame` may be a Frame or a PreparedFrame shared between several calls
+        """
+        prepared = frame if isinstance(frame, PreparedFrame) else PreparedFrame(frame)
+        entry = self.registry.get(name)
+        if entry is None:
+            return TemplateMatch(name, 0.0, None, threshold)
+
+        if (mode or self.mode) == self.PYRAMID:
+            return self._match_pyramid(prepared, entry, threshold, region)
+        return self._match_exhaustive(prepared, entry, threshold, region, grayscale)
+
+    def _match_exhaustive(self, prepared: PreparedFrame, entry, threshold: float,
+                          region: Optional[Tuple[int, int, int, int]], grayscale: bool = False) -> TemplateMatch:
+        """Full-resolution TM_CCOEFF_NORMED over the frame or region"""
+        frame = prepared.frame
+        if grayscale:
+            search = Frame(prepared.gray(), frame.timestamp, frame.offset, frame.sequence)
+            template = entry.gray
+        else:
+            search = frame
+            template = entry.color
+
+        if region:
+            search = search.crop(region)
+
+        if search.height < entry.height or search.width < entry.width:
+            return TemplateMatch(entry.name, 0.0, None, threshold)
+
+        self.stats['exhaustive_searches'] += 1
+        result = cv2.matchTemplate(search.image, template, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+
+        center = search.to_screen(max_loc[0] + entry.width // 2, max_loc[1] + entry.height // 2)
+        return TemplateMatch(entry.name, float(max_val), center, threshold)
+
+    def _match_pyramid(self, prepared: PreparedFrame, entry, threshold: float,
+                       region: Optional[Tuple[int, int, int, int]]) -> TemplateMatch:
+        """Learned ROI first, then a downscaled search refined around the best candidates"""
+        frame = prepared.frame
+
+        roi = self.learned_rois.get(entry.name)
+        if roi is not None:
+            if region:
+                roi = self._intersect(roi, region)
+            if roi is not None:
+                match = self._match_exhaustive(prepared, entry, threshold, roi)
+                if match.found:
+                    self.stats['roi_hits'] += 1
+                    self._remember(entry, match)
+                    return match
+
+        level = min(self.pyramid_level, len(entry.pyramid) - 1)
+        scale = 2 ** level
+        coarse = prepared.pyramid(level)
+        coarse_template = entry.pyramid[level]
+
+        base_x = base_y = 0
+        if region:
+            local_x, local_y = frame.to_local(region[0], region[1])
+            base_x, base_y = max(0, local_x // scale), max(0, local_y // scale)
+            coarse = coarse[base_y:max(base_y, (local_y + region[3]) // scale),
+                            base_x:max(base_x, (local_x + region[2]) // scale)]
+
+        if (level == 0 or coarse.shape[0] < coarse_template.shape[0]
+                or coarse.shape[1] < coarse_template.shape[1]):
+            match = self._match_exhaustive(prepared, entry, threshold, region)
+        else:
+            self.stats['coarse_searches'] += 1
+            result = cv2.matchTemplate(coarse, coarse_template, cv2.TM_CCOEFF_NORMED)
+            template_h, template_w = coarse_template.shape[:2]
+            margin = 2 * scale
+
+            match = None
+            for _ in range(self.candidates):
+                _, max_val, _, max_loc = cv2.minMaxLoc(result)
+                if max_val <= -1.0:
+                    break
+
+                # Suppress this peak so the next candidate is a different spot
+                x, y = max_loc
+                result[max(0, y - template_h // 2):y + template_h // 2 + 1,
+                       max(0, x - template_w // 2):x + template_w // 2 + 1] = -1.0
+
+                screen_x, screen_y = frame.to_screen((base_x + x) * scale, (base_y + y) * scale)
+                window = (screen_x - margin, screen_y - margin,
+                          entry.width + 2 * margin, entry.height + 2 * margin)
+                if region:
+                    window = self._intersect(window, region)
+                if window is None:
+                    continue
+
+                candidate = self._match_exhaustive(prepared, entry, threshold, window)
+                if match is None or candidate.score > match.score:
+                    match = candidate
+                if match.found and match.score > 0.99:
+                    break
+
+            if match is None:
+                match = TemplateMatch(entry.name, 0.0, None, threshold)
+
+        if match.found:
+            self._remember(entry, match)
+        return match
+
+    def _remember(self, entry, match: TemplateMatch) -> None:
+        """Store the region around a hit as the template's learned ROI"""
+        # Buttons barely move between screens, so a small margin is enough
+        margin_x = max(16, entry.width // 8)
+        margin_y = max(16, entry.height // 8)
+        x, y = match.location
+        self.learned_rois[entry.name] = (x - entry.width // 2 - margin_x, y - entry.height // 2 - margin_y,
+                                         entry.width + 2 * margin_x, entry.height + 2 * margin_y)
+
+    def _intersect(self, a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> Optional[Tuple[int, int, int, int]]:
+        """Intersection of two (x, y, width, height) regions, None if empty"""
+        x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+        x1, y1 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def forget_rois(self) -> None:
+        """Clear learned ROIs (e.g. after the game window moved)"""
+        self.learned_rois.clear()
+
+    def match_many(self, frame: Frame, names: List[str],
+                   rois: Optional[Dict[str, Tuple[int, int, int, int]]] = None,
+                   threshold: float = 0.8, grayscale: bool = False,
+                   mode: Optional[str] = None) -> MatchResults:
+        """
+        Match several templates against one frame in parallel
+
+        Args:
+            frame: Frame to search
+            names: Template names from the registry
+            rois: Optional screen region per template name to restrict the search
+            threshold: Minimum score for a template to count as found
+            grayscale: Match grayscale variants (frame is converted once)
+            mode: Override the matcher's default mode
+        """
+        rois = rois or {}
+        prepared = PreparedFrame(frame)
+
+        # Build shared conversions up front so worker threads only read them
+        if (mode or self.mode) == self.PYRAMID:
+            prepared.pyramid(self.pyramid_level)
+        elif grayscale:
+            prepared.gray()
+
+        futures = {
+            name: self.executor.submit(self.match, prepared, name, threshold, rois.get(name), grayscale, mode)
+            for name in names
+        }
+        return MatchResults({name: future.result() for name, future in futures.items()})
+
+    def get_stats(self) -> Dict:
+        """Get matching strategy counters"""
+        return dict(self.stats, learned_rois=len(self.learned_rois))
+
+    def shutdown(self) -> None:
+        """Stop the worker threads"""
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,154 @@
+"""
+Template Registry - Preloaded template images with grayscale and pyramid variants
+"""
+
+import os
+import time
+import threading
+from typing import Dict, List, Optional
+import cv2
+import numpy as np
+
+from .frame_source import IMAGE_EXTENSIONS
+
+class TemplateEntry:
+    """A template image decoded once and kept in memory in several variants"""
+
+    def __init__(self, name: str, path: str, mtime: float, color: np.ndarray, pyramid_levels: int):
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self.color = color
+        self.gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+
+        # pyramid[0] is the full-resolution grayscale image, each further
+        # level is half the size of the previous one
+        self.pyramid = [self.gray]
+        for _ in range(1, pyramid_levels):
+            previous = self.pyramid[-1]
+            if min(previous.shape[:2]) < 8:
+                break
+            self.pyramid.append(cv2.pyrDown(previous))
+
+    @property
+    def width(self) -> int:
+        return self.color.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.color.shape[0]
+
+class TemplateRegistry:
+    """
+    Loads every template in the templates directory once and serves them
+    from memory. An entry is reloaded only when its file's mtime changes.
+    """
+
+    def __init__(self, template_dir: str = "templates", pyramid_levels: int = 3):
+        self.template_dir = template_dir
+        self.pyramid_levels = pyramid_levels
+        self.entries: Dict[str, TemplateEntry] = {}
+        self.lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'loads': 0,
+            'reloads': 0,
+            'load_time': 0.0
+        }
+
+        os.makedirs(self.template_dir, exist_ok=True)
+
+    def preload(self) -> int:
+        """Load every template in the templates directory, returns the count"""
+        loaded = 0
+        for name in self.list_templates():
+            if self.get(name) is not None:
+                loaded += 1
+        return loaded
+
+    def list_templates(self) -> List[str]:
+        """Names of all templates in the templates directory"""
+        if not os.path.isdir(self.template_dir):
+            return []
+        return sorted(os.path.splitext(f)[0] for f in os.listdir(self.template_dir)
+                      if f.lower().endswith(IMAGE_EXTENSIONS))
+
+    def _resolve_path(self, name: str) -> Optional[str]:
+        """Map a template name (or an explicit file path) to a file on disk"""
+        if os.path.isfile(name):
+            return name
+
+        for extension in IMAGE_EXTENSIONS:
+            path = os.path.join(self.template_dir, name + extension)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def get(self, name: str) -> Optional[TemplateEntry]:
+        """
+        Get a template by name (file name without extension in the templates
+        directory) or by path. Returns None if it does not exist.
+        """
+        path = self._resolve_path(name)
+        if path is None:
+            print(f"Template not found: {name}")
+            return None
+
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is not None and entry.path == path and entry.mtime == mtime:
+                self.stats['hits'] += 1
+                return entry
+            self.stats['misses'] += 1
+
+        new_entry = self._load(name, path, mtime)
+        if new_entry is None:
+            return None
+
+        with self.lock:
+            if entry is not None:
+                self.stats['reloads'] += 1
+            self.entries[name] = new_entry
+        return new_entry
+
+    def _load(self, name: str, path: str, mtime: float) -> Optional[TemplateEntry]:
+        """Decode a template file and build its variants"""
+        start = time.perf_counter()
+        color = cv2.imread(path, cv2.IMREAD_COLOR)
+        if color is None:
+            print(f"Could not read template: {path}")
+            return None
+
+        entry = TemplateEntry(name, path, mtime, color, self.pyramid_levels)
+        with self.lock:
+            self.stats['loads'] += 1
+            self.stats['load_time'] += time.perf_counter() - start
+        return entry
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop one cached template, or all of them"""
+        with self.lock:
+            if name is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(name, None)
+
+    def get_stats(self) -> Dict:
+        """Get cache hit/miss and load-time counters"""
+        with self.lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                'templates_cached': len(self.entries),
+                'hits': self.stats['hits'],
+                'misses': self.stats['misses'],
+                'hit_rate': self.stats['hits'] / max(lookups, 1) * 100,
+                'loads': self.stats['loads'],
+                'reloads': self.stats['reloads'],
+                'total_load_ms': self.stats['load_time'] * 1000
+            }
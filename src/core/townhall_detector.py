@@ -0,0 +1,172 @@
+"""
+Town Hall Detector - Local Town Hall level classification by multi-scale template matching
+"""
+
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import cv2
+import numpy as np
+
+from .frame import Frame
+from .template_registry import TemplateRegistry
+
+class TownHallResult:
+    """Detected Town Hall level for one frame (level is None when nothing matched well enough)"""
+
+    def __init__(self, level: Optional[int], score: float = 0.0, location: Optional[Tuple[int, int]] = None,
+                 sprite: str = "", elapsed: float = 0.0, cached: bool = False):
+        self.level = level
+        self.score = score
+        self.location = location  # Screen coordinates of the sprite center
+        self.sprite = sprite
+        self.elapsed = elapsed
+        self.cached = cached
+
+    def __repr__(self) -> str:
+        return f"TownHallResult(level={self.level}, score={self.score:.3f}, {self.elapsed * 1000:.1f} ms)"
+
+class TownHallDetector:
+    """
+    Finds the Town Hall in a base frame and reads its level from the sprite
+    that matches best. Sprites live in templates/townhall/ named th<level>.png
+    (extra variants as th<level>_<anything>.png). The Town Hall is first
+    located on a downscaled grayscale frame, then the level is classified
+    at full resolution in a small area around it, each at a few sprite
+    scales. Results for the last few frames are cached, keyed by the
+    frame's pixel array itself, so the cascade and the payload builder
+    share one detection per frame.
+    """
+
+    SPRITE_NAME = re.compile(r"^th(\d+)", re.IGNORECASE)
+
+    def __init__(self, config=None):
+        sprite_dir = config.get('townhall_detector.sprite_dir', 'templates/townhall') if config else 'templates/townhall'
+        self.scales = config.get('townhall_detector.scales', [0.85, 1.0, 1.15]) if config else [0.85, 1.0, 1.15]
+        self.locate_scale = config.get('townhall_detector.locate_scale', 0.25) if config else 0.25
+        self.min_score = config.get('townhall_detector.min_score', 0.7) if config else 0.7
+        self.region = config.get('townhall_detector.region', None) if config else None
+        self.cache_size = config.get('townhall_detector.cache_size', 8) if config else 8
+
+        self.sprites = TemplateRegistry(sprite_dir, pyramid_levels=1)
+        self.scaled_sprites: Dict[Tuple[str, float, float], np.ndarray] = {}
+        # key -> (weak reference to the frame's pixels, result)
+        self.cache: "OrderedDict[Tuple, Tuple[weakref.ref, TownHallResult]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {
+            'detections': 0,
+            'cache_hits': 0,
+            'detect_time': 0.0
+        }
+
+    def sprite_levels(self) -> Dict[str, int]:
+        """Sprite name -> Town Hall level for every sprite in the sprite directory"""
+        levels = {}
+        for name in self.sprites.list_templates():
+            match = self.SPRITE_NAME.match(name)
+            if match:
+                levels[name] = int(match.group(1))
+        return levels
+
+    def is_available(self) -> bool:
+        return bool(self.sprite_levels())
+
+    def _scaled_sprite(self, name: str, factor: float) -> Optional[np.ndarray]:
+        """Grayscale sprite resized by factor (rebuilt when the file changes)"""
+        entry = self.sprites.get(name)
+        if entry is None:
+            return None
+
+        key = (name, factor, entry.mtime)
+        sprite = self.scaled_sprites.get(key)
+        if sprite is None:
+            size = (max(1, int(entry.width * factor)), max(1, int(entry.height * factor)))
+            sprite = cv2.resize(entry.gray, size, interpolation=cv2.INTER_AREA)
+            self.scaled_sprites[key] = sprite
+        return sprite
+
+    def _best_match(self, gray: np.ndarray, names, factor: float,
+                    scales) -> Tuple[str, float, Optional[Tuple[int, int]], Tuple[int, int]]:
+        """Best (sprite name, score, top-left, sprite size) over the given sprites and scales"""
+        best = ("", -1.0, None, (0, 0))
+        for name in names:
+            for scale in scales:
+                sprite = self._scaled_sprite(name, scale * factor)
+                if sprite is None or sprite.shape[0] > gray.shape[0] or sprite.shape[1] > gray.shape[1]:
+                    continue
+                _, score, _, loc = cv2.minMaxLoc(cv2.matchTemplate(gray, sprite, cv2.TM_CCOEFF_NORMED))
+                if score > best[1]:
+                    best = (name, score, loc, (sprite.shape[1], sprite.shape[0]))
+        return best
+
+    def _cache_key(self, frame: Frame) -> Tuple:
+        # id() alone can be reused once an array is freed; the weak reference
+        # stored with the result confirms it is still the same array
+        return (id(frame.image), frame.offset, frame.image.shape)
+
+    def detect(self, frame: Frame) -> TownHallResult:
+        """Detect the Town Hall level in a frame"""
+        key = self._cache_key(frame)
+        with self.lock:
+            entry = self.cache.get(key)
+            cached = entry[1] if entry is not None and entry[0]() is frame.image else None
+            if cached is not None:
+                self.stats['cache_hits'] += 1
+                return TownHallResult(cached.level, cached.score, cached.location, cached.sprite,
+                                      cached.elapsed, cached=True)
+
+        start = time.perf_counter()
+        levels = self.sprite_levels()
+        search = frame.crop(tuple(self.region)) if self.region else frame
+        gray = cv2.cvtColor(search.image, cv2.COLOR_BGR2GRAY)
+        result = TownHallResult(None)
+
+        # Stage 1: locate the Town Hall on a small copy of the frame (nominal sprite scale only,
+        # the coarse correlation peak tolerates small size differences)
+        small = cv2.resize(gray, None, fx=self.locate_scale, fy=self.locate_scale, interpolation=cv2.INTER_AREA)
+        nominal = min(self.scales, key=lambda scale: abs(scale - 1.0))
+        _, _, loc, size = self._best_match(small, levels, self.locate_scale, [nominal])
+
+        if loc is not None:
+            # Stage 2: classify the level at full resolution around that spot
+            center_x = int((loc[0] + size[0] / 2) / self.locate_scale)
+            center_y = int((loc[1] + size[1] / 2) / self.locate_scale)
+            half_w = int(size[0] / self.locate_scale * 0.75) + 8
+            half_h = int(size[1] / self.locate_scale * 0.75) + 8
+            x1, y1 = max(0, center_x - half_w), max(0, center_y - half_h)
+            roi = gray[y1:center_y + half_h, x1:center_x + half_w]
+
+            name, score, roi_loc, roi_size = self._best_match(roi, levels, 1.0, self.scales)
+            result.score = max(score, 0.0)
+            if roi_loc is not None and score >= self.min_score:
+                result.level = levels[name]
+                result.sprite = name
+                result.location = search.to_screen(x1 + roi_loc[0] + roi_size[0] // 2,
+                                                   y1 + roi_loc[1] + roi_size[1] // 2)
+        result.elapsed = time.perf_counter() - start
+
+        with self.lock:
+            self.stats['detections'] += 1
+            self.stats['detect_time'] += result.elapsed
+            self.cache[key] = (weakref.ref(frame.image), result)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return result
+
+    def is_too_strong(self, frame: Frame, max_level: int) -> bool:
+        """True only when a Town Hall above max_level was detected confidently"""
+        result = self.detect(frame)
+        return result.level is not None and result.level > max_level
+
+    def get_stats(self) -> Dict:
+        """Get detection counts and timing"""
+        with self.lock:
+            detections = self.stats['detections']
+            return {
+                'detections': detections,
+                'cache_hits': self.stats['cache_hits'],
+                'avg_detect_ms': self.stats['detect_time'] / max(detections, 1) * 1000
+            }
@@ -0,0 +1,187 @@
+"""
+Usage Meter - Bytes, tokens and cost of analyzer calls, per hour and per attack, with an hourly budget
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Tuple
+
+def estimate_tokens(text: str, image_size: Optional[Tuple[int, int]] = None) -> int:
+    """
+    Rough token count when a response carries no usageMetadata: about 4
+    characters per text token, 258 tokens per image up to 384x384 and per
+    768x768 tile above that
+    """
+    tokens = len(text) // 4
+    if image_size:
+        width, height = image_size
+        if width <= 384 and height <= 384:
+            tokens += 258
+        else:
+            tokens += 258 * math.ceil(width / 768) * math.ceil(height / 768)
+    return tokens
+
+class UsageRecord:
+    """One analyzer call (a hedge counts as its own call; a cache hit costs nothing)"""
+
+    def __init__(self, request_bytes: int = 0, prompt_tokens: int = 0, output_tokens: int = 0,
+                 latency: float = 0.0, success: bool = True, cached: bool = False, hedge: bool = False,
+                 estimated: bool = False):
+        self.timestamp = time.time()
+        self.request_bytes = request_bytes
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        self.latency = latency
+        self.success = success
+        self.cached = cached
+        self.hedge = hedge
+        self.estimated = estimated  # Token counts guessed because the response carried no usageMetadata
+        self.cost = 0.0
+
+def _empty_totals() -> Dict:
+    return {'requests': 0, 'failed': 0, 'cached': 0, 'hedges': 0, 'request_bytes': 0,
+            'prompt_tokens': 0, 'output_tokens': 0, 'latency': 0.0, 'cost': 0.0}
+
+class UsageMeter:
+    """
+    Rolls call records up into totals, per clock hour and per attack.
+    Cost is priced per million prompt/output tokens plus a flat amount per
+    request. Budgets apply to the last 60 minutes; once one is used up
+    over_budget() is True until old calls fall out of the window.
+    """
+
+    def __init__(self, input_price: float = 0.10, output_price: float = 0.40, request_price: float = 0.0,
+                 hourly_requests: Optional[int] = None, hourly_tokens: Optional[int] = None,
+                 hourly_cost: Optional[float] = None, hours_kept: int = 24):
+        """
+        Args:
+            input_price: Cost per million prompt tokens
+            output_price: Cost per million output tokens
+            request_price: Cost per request
+            hourly_requests, hourly_tokens, hourly_cost: Budgets for the last hour (None for no limit)
+            hours_kept: Clock hours kept in the per-hour breakdown
+        """
+        self.input_price = input_price
+        self.output_price = output_price
+        self.request_price = request_price
+        self.hourly_requests = hourly_requests
+        self.hourly_tokens = hourly_tokens
+        self.hourly_cost = hourly_cost
+        self.hours_kept = hours_kept
+
+        self.lock = threading.Lock()
+        self.totals = _empty_totals()
+        self.hours: "OrderedDict[str, Dict]" = OrderedDict()
+        self.window = deque()  # Paid records of the last hour, for the budget
+        self.attack = _empty_totals()  # Usage since the last attack ended
+        self.attacks = {'total': 0, 'successful': 0}
+        self.last_attack: Optional[Dict] = None
+
+    def cost_of(self, record: UsageRecord) -> float:
+        if record.cached:
+            return 0.0
+        return (record.prompt_tokens * self.input_price + record.output_tokens * self.output_price) / 1e6 \
+            + self.request_price
+
+    @staticmethod
+    def _add(totals: Dict, record: UsageRecord) -> None:
+        if record.cached:
+            totals['cached'] += 1
+            return
+        totals['requests'] += 1
+        totals['failed'] += 0 if record.success else 1
+        totals['request_bytes'] += record.request_bytes
+        totals['prompt_tokens'] += record.prompt_tokens
+        totals['output_tokens'] += record.output_tokens
+        totals['latency'] += record.latency
+        totals['cost'] += record.cost
+
+    def record(self, record: UsageRecord) -> None:
+        record.cost = self.cost_of(record)
+        hour = time.strftime("%Y-%m-%d %H:00", time.localtime(record.timestamp))
+        with self.lock:
+            self._add(self.totals, record)
+            self._add(self.attack, record)
+            if hour not in self.hours:
+                self.hours[hour] = _empty_totals()
+                while len(self.hours) > self.hours_kept:
+                    self.hours.popitem(last=False)
+            self._add(self.hours[hour], record)
+            if not record.cached:
+                self.window.append(record)
+
+    def record_hedge(self) -> None:
+        """
+        Count a hedge when it is fired. Its request is accounted by record()
+        when it returns, which for a cancelled loser can be after the
+        caller has moved on, so counting it there would lag behind
+        """
+        hour = time.strftime("%Y-%m-%d %H:00")
+        with self.lock:
+            self.totals['hedges'] += 1
+            self.attack['hedges'] += 1
+            if hour not in self.hours:
+                self.hours[hour] = _empty_totals()
+                while len(self.hours) > self.hours_kept:
+                    self.hours.popitem(last=False)
+            self.hours[hour]['hedges'] += 1
+
+    def end_attack(self, successful: bool) -> Dict:
+        """Close the current attack's usage; returns what it used"""
+        with self.lock:
+            used = self.attack
+            self.last_attack = used
+            self.attack = _empty_totals()
+            self.attacks['total'] += 1
+            if successful:
+                self.attacks['successful'] += 1
+            return used
+
+    def _last_hour(self) -> Dict:
+        """Requests, tokens and cost of the last 60 minutes (lock held)"""
+        cutoff = time.time() - 3600
+        while self.window and self.window[0].timestamp < cutoff:
+            self.window.popleft()
+        return {
+            'requests': len(self.window),
+            'tokens': sum(r.prompt_tokens + r.output_tokens for r in self.window),
+            'cost': sum(r.cost for r in self.window)
+        }
+
+    def over_budget(self) -> Optional[str]:
+        """Which hourly budget is used up, None while all have room left"""
+        with self.lock:
+            used = self._last_hour()
+        if self.hourly_requests is not None and used['requests'] >= self.hourly_requests:
+            return f"{used['requests']} requests in the last hour (budget {self.hourly_requests})"
+        if self.hourly_tokens is not None and used['tokens'] >= self.hourly_tokens:
+            return f"{used['tokens']:,} tokens in the last hour (budget {self.hourly_tokens:,})"
+        if self.hourly_cost is not None and used['cost'] >= self.hourly_cost:
+            return f"${used['cost']:.4f} in the last hour (budget ${self.hourly_cost:.4f})"
+        return None
+
+    def get_stats(self) -> Dict:
+        """Totals, last hour against the budgets, per-hour breakdown and cost per attack"""
+        with self.lock:
+            totals = dict(self.totals)
+            last_hour = self._last_hour()
+            hours = {hour: dict(values) for hour, values in self.hours.items()}
+            attacks = dict(self.attacks)
+            last_attack = dict(self.last_attack) if self.last_attack else None
+        requests = totals['requests']
+        return {
+            'totals': totals,
+            'avg_request_kb': totals['request_bytes'] / max(requests, 1) / 1024,
+            'avg_latency_ms': totals['latency'] / max(requests, 1) * 1000,
+            'last_hour': last_hour,
+            'budget': {'requests': self.hourly_requests, 'tokens': self.hourly_tokens, 'cost': self.hourly_cost},
+            'hours': hours,
+            'attacks': attacks['total'],
+            'successful_attacks': attacks['successful'],
+            'cost_per_attack': totals['cost'] / max(attacks['total'], 1),
+            'cost_per_successful_attack': totals['cost'] / max(attacks['successful'], 1),
+            'tokens_per_attack': (totals['prompt_tokens'] + totals['output_tokens']) / max(attacks['total'], 1),
+            'last_attack': last_attack
+        }
@@ -0,0 +1,153 @@
+"""
+Window Providers - Pluggable game window lookup (Win32, X11 or a fake for tests and benchmarks)
+"""
+
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+class WindowInfo:
+    """A top-level window: native handle, title and bounds (x, y, width, height)"""
+
+    def __init__(self, handle, title: str, bounds: Tuple[int, int, int, int]):
+        self.handle = handle
+        self.title = title
+        self.bounds = bounds
+
+class WindowProvider:
+    """Interface for finding the game window and tracking its position"""
+
+    def find_windows(self, titles: List[str]) -> List[WindowInfo]:
+        """Visible windows whose title contains any of the given strings (case-insensitive)"""
+        raise NotImplementedError
+
+    def is_valid(self, handle) -> bool:
+        """Check that a previously found window still exists and is visible"""
+        raise NotImplementedError
+
+    def get_bounds(self, handle) -> Optional[Tuple[int, int, int, int]]:
+        """Current bounds of a window, None if it is gone"""
+        raise NotImplementedError
+
+    def _title_matches(self, title: str, titles: List[str]) -> bool:
+        lowered = title.lower()
+        return any(t.lower() in lowered for t in titles)
+
+class Win32WindowProvider(WindowProvider):
+    """Windows implementation using pywin32"""
+
+    def __init__(self):
+        import win32gui
+        self.win32gui = win32gui
+
+    def find_windows(self, titles: List[str]) -> List[WindowInfo]:
+        def enum_windows_callback(hwnd, windows):
+            if self.win32gui.IsWindowVisible(hwnd):
+                window_title = self.win32gui.GetWindowText(hwnd)
+                if self._title_matches(window_title, titles):
+                    windows.append(WindowInfo(hwnd, window_title, self._rect_to_bounds(self.win32gui.GetWindowRect(hwnd))))
+
+        windows = []
+        self.win32gui.EnumWindows(enum_windows_callback, windows)
+        return windows
+
+    def is_valid(self, handle) -> bool:
+        return bool(self.win32gui.IsWindow(handle) and self.win32gui.IsWindowVisible(handle))
+
+    def get_bounds(self, handle) -> Optional[Tuple[int, int, int, int]]:
+        try:
+            return self._rect_to_bounds(self.win32gui.GetWindowRect(handle))
+        except Exception:
+            return None
+
+    def _rect_to_bounds(self, rect) -> Tuple[int, int, int, int]:
+        x, y, right, bottom = rect
+        return (x, y, right - x, bottom - y)
+
+class X11WindowProvider(WindowProvider):
+    """Linux/X11 implementation using the xdotool command line tool"""
+
+    def _run(self, args: List[str]) -> Optional[str]:
+        try:
+            result = subprocess.run(["xdotool"] + args, capture_output=True, text=True, timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return result.stdout if result.returncode == 0 else None
+
+    def find_windows(self, titles: List[str]) -> List[WindowInfo]:
+        windows = []
+        seen = set()
+        for title in titles:
+            output = self._run(["search", "--onlyvisible", "--name", title])
+            for line in (output or "").split():
+                handle = int(line)
+                if handle in seen:
+                    continue
+                seen.add(handle)
+                bounds = self.get_bounds(handle)
+                if bounds:
+                    name = (self._run(["getwindowname", str(handle)]) or "").strip()
+                    windows.append(WindowInfo(handle, name, bounds))
+        return windows
+
+    def is_valid(self, handle) -> bool:
+        return self._run(["getwindowname", str(handle)]) is not None
+
+    def get_bounds(self, handle) -> Optional[Tuple[int, int, int, int]]:
+        output = self._run(["getwindowgeometry", "--shell", str(handle)])
+        if not output:
+            return None
+        values = dict(line.split("=", 1) for line in output.split() if "=" in line)
+        try:
+            return (int(values["X"]), int(values["Y"]), int(values["WIDTH"]), int(values["HEIGHT"]))
+        except (KeyError, ValueError):
+            return None
+
+class FakeWindowProvider(WindowProvider):
+    """In-memory windows for tests and benchmarks on machines without the game"""
+
+    def __init__(self, windows: Optional[Dict[str, Tuple[int, int, int, int]]] = None):
+        self.windows: Dict[int, WindowInfo] = {}
+        self.next_handle = 1
+        self.enumerations = 0
+        for title, bounds in (windows or {}).items():
+            self.add_window(title, bounds)
+
+    def add_window(self, title: str, bounds: Tuple[int, int, int, int]) -> int:
+        handle = self.next_handle
+        self.next_handle += 1
+        self.windows[handle] = WindowInfo(handle, title, bounds)
+        return handle
+
+    def move_window(self, handle: int, bounds: Tuple[int, int, int, int]) -> None:
+        self.windows[handle].bounds = bounds
+
+    def close_window(self, handle: int) -> None:
+        self.windows.pop(handle, None)
+
+    def find_windows(self, titles: List[str]) -> List[WindowInfo]:
+        self.enumerations += 1
+        return [w for w in self.windows.values() if self._title_matches(w.title, titles)]
+
+    def is_valid(self, handle) -> bool:
+        return handle in self.windows
+
+    def get_bounds(self, handle) -> Optional[Tuple[int, int, int, int]]:
+        window = self.windows.get(handle)
+        return window.bounds if window else None
+
+def create_window_provider(name: str = "auto") -> WindowProvider:
+    """
+    Create a window provider by name: "win32", "x11", "fake" or "auto"
+    (Win32 on Windows, X11 elsewhere)
+    """
+    if name == "auto":
+        name = "win32" if sys.platform.startswith("win") else "x11"
+
+    if name == "win32":
+        return Win32WindowProvider()
+    if name == "x11":
+        return X11WindowProvider()
+    if name == "fake":
+        return FakeWindowProvider()
+    raise ValueError(f"Unknown window provider: {name}")
@@ -274,7 +274,48 @@ class ConsoleUI:
         print(f"Failed: {stats['failed_attacks']}")
         print(f"Success Rate: {stats['success_rate']:.1f}%")
         print(f"Runtime: {stats['runtime_hours']:.1f} hours")
-        print(f"Attacks/Hour: {stats['attacks_per_hour']:.1f}")
+        print(f"Attacks/Hour: {stats['attacks_per_hour']:.1f} "
+              f"(API cost/successful attack: ${stats['api_cost_per_successful_attack']:.4f})")
+        print(f"Bases Scanned: {stats['bases_scanned']} ({stats['bases_per_minute']:.1f}/min, {stats['seconds_per_base']:.1f}s each)")
+        print(f"API Calls/Attack: {stats['api_calls_per_attack']:.2f}")
+        latency = stats['ai_latency']
+        if latency['count']:
+            print(f"AI Latency: p50 {latency['p50_ms'] / 1000:.2f}s, p95 {latency['p95_ms'] / 1000:.2f}s, "
+                  f"p99 {latency['p99_ms'] / 1000:.2f}s ({latency['count']} answers)")
+        failures = stats['ai_failures']
+        if any(failures.values()):
+            print(f"AI Calls Without Answer: {failures['failed']} failed, {failures['circuit_open']} circuit open, "
+                  f"{failures['over_budget']} over budget")
+        cache = stats['ai_cache']
+        if cache and cache['hits'] + cache['misses']:
+            print(f"AI Cache: {cache['hit_rate']:.1f}% hits, {cache['saved_calls']} calls "
+                  f"and {cache['saved_seconds']:.1f}s saved")
+        hedging = stats['ai_hedging']
+        if hedging and hedging['requests']:
+            print(f"AI Hedging: {hedging['hedges']} hedges ({hedging['hedge_rate']:.1f}%, {hedging['hedge_wins']} won), "
+                  f"p99 {hedging['p99_ms'] / 1000:.2f}s vs {hedging['primary_p99_ms'] / 1000:.2f}s unhedged")
+        usage = stats['ai_usage']
+        if usage['totals']['requests']:
+            totals = usage['totals']
+            last_hour = usage['last_hour']
+            print(f"AI Usage: {totals['requests']} calls ({totals['cached']} cached, {totals['hedges']} hedges), "
+                  f"{totals['prompt_tokens']:,} in / {totals['output_tokens']:,} out tokens, "
+                  f"{totals['request_bytes'] / 1024 / 1024:.1f} MB sent, ${totals['cost']:.4f}")
+            print(f"AI Last Hour: {last_hour['requests']} calls, {last_hour['tokens']:,} tokens, "
+                  f"${last_hour['cost']:.4f}" + (" - BUDGET USED UP, local only" if stats['ai_budget_exhausted'] else ""))
+        breaker = stats['ai_breaker']
+        if breaker['calls'] or breaker['opened']:
+            modes = breaker['time_in_state']
+            print(f"AI Circuit: {breaker['state'].upper()} (opened {breaker['opened']}x, "
+                  f"{breaker['rejected']} calls refused) - Gemini {modes['closed'] / 60:.1f} min, "
+                  f"local only {(modes['open'] + modes['half-open']) / 60:.1f} min")
+        cascade = stats['decision_cascade']
+        if cascade['decisions']:
+            print(f"Decisions: {cascade['decisions']} (undecided: {cascade['fallbacks']})")
+            for name, stage in cascade['stages'].items():
+                if stage['evaluated']:
+                    print(f"  {name:10s} resolved {stage['resolved']:4d} ({stage['resolved_pct']:5.1f}%)  "
+                          f"avg {stage['avg_ms']:.1f} ms")
         print(f"Last Attack: {stats['last_attack']}")
         print(f"Configured Sessions: {', '.join(stats['configured_sessions'])}")
         print("=" * 50)
@@ -557,13 +598,16 @@ class ConsoleUI:
             elif choice == '3':
                 screenshots_dir = "screenshots"
                 if os.path.exists(screenshots_dir):
-                    files = [f for f in os.listdir(screenshots_dir) if f.endswith('.png')]
+                    files = [f for f in os.listdir(screenshots_dir) if f.lower().endswith(('.png', '.jpg', '.webp'))]
                     if files:
+                        writer_stats = self.bot.screen_capture.writer.get_stats()
                         print(f"\nScreenshots in {screenshots_dir}:")
                         for file in sorted(files)[-10:]:  # Show last 10
                             print(f"  {file}")
                         if len(files) > 10:
                             print(f"  ... and {len(files) - 10} more")
+                        print(f"Writer: {writer_stats['written']} written, {writer_stats['dropped']} dropped, "
+                              f"{writer_stats['deleted']} removed by retention ({writer_stats['disk_usage_mb']:.1f} MB on disk)")
                     else:
                         print("No screenshots found.")
                 else:
@@ -581,7 +625,7 @@ class ConsoleUI:
         print("=" * 40)
         print("Current settings:")
         print("  PyAutoGUI Fail-safe: Enabled")
-        print("  Screenshot format: PNG")
+        print(f"  Screenshot format: {self.bot.config.get('automation.screenshot_format', 'PNG')}")
         print("  Default playback speed: 1.0x")
         print("\nSettings are currently read-only.")
         input("Press Enter to continue...")
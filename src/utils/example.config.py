@@ -30,7 +30,7 @@ class Config:
             "automation": {
                 "default_click_delay": 0.1,
                 "default_playback_speed": 1.0,
-                "screenshot_format": "PNG",
+                "screenshot_format": "PNG",  # PNG, JPEG or WEBP
                 "failsafe_enabled": True,
                 "max_recording_duration": 300,  # 5 minutes
                 "auto_save_recordings": True
@@ -66,6 +66,24 @@ class Config:
                     "emergency_stop": "esc"
                 }
             },
+            "screen_capture": {
+                "save_debug_frames": False,  # Also write every analyzed frame to screenshots/
+                "continuous_enabled": False,  # Grab frames on a background thread during auto attack
+                "continuous_fps": 10,  # Background capture rate
+                "ring_buffer_size": 4,  # Frames kept in the capture ring buffer
+                "wait_min_interval": 0.05,  # Poll interval right after the screen changed
+                "wait_max_interval": 0.5,  # Poll interval once the screen has been still for a while
+                "change_threshold": 2.0,  # Mean grayscale difference (0-255) that counts as a screen change
+                "change_tile_threshold": 12.0,  # Mean difference inside one small area that counts as a change
+                "recheck_interval": 1.0,  # Seconds after which a still screen is checked again anyway
+                "screenshot_quality": 90,  # JPEG/WebP quality when automation.screenshot_format is JPEG or WEBP
+                "png_compression": 3,  # 0 = fastest, 9 = smallest
+                "writer_queue_size": 32,  # Screenshots waiting to be written before new ones are dropped
+                "retention_max_files": 2000,  # Oldest debug frames are deleted beyond this count (None = unlimited)
+                "retention_max_mb": None,  # Size limit for the retained files
+                "retention_max_age_hours": None,  # Delete retained files older than this
+                "retention_prefixes": ["frame"]  # Only files the writer named with these prefixes are ever deleted (None = all it names)
+            },
             "game": {
                 "window_titles": [
                     "Clash of Clans",
@@ -74,16 +92,99 @@ class Config:
                     "LDPlayer",
                     "MEmu"
                 ],
+                "window_provider": "auto",  # auto, win32, x11 or fake
+                "window_check_interval": 0.5,  # Seconds between cached window handle re-validations
                 "detection_timeout": 10,
                 "click_precision": 5,  # pixels
-                "template_matching_threshold": 0.8
+                "template_matching_threshold": 0.8,
+                "template_matching_workers": None,  # Thread pool size for match_many (None = auto)
+                "template_matching_mode": "exhaustive"  # "pyramid" = learned ROI + coarse-to-fine search
+            },
+            "screen_state": {
+                "poll_interval": 0.05,  # Seconds between screen checks while waiting for a transition
+                "recheck_interval": 0.5  # Classify a still-looking screen again after this long
+                # "rules": {"base_ready": {"signatures": ["base_ready"], "templates": ["next_button"]}, ...}
+            },
+            "loot_ocr": {
+                "glyph_dir": "templates/digits",  # Digit glyphs named <digit>_*.png
+                "region": {"left": 10, "top": 20, "width": 220, "height": 40},  # Area read around each enemy_* coordinate
+                "brightness_threshold": 190,  # Grayscale level that counts as digit pixels
+                "min_glyph_score": 0.6  # Components below this score are ignored when set apart from the number (icons, noise); one between or right next to the digits makes the reading unreadable
+            },
+            "townhall_detector": {
+                "sprite_dir": "templates/townhall",  # Town Hall sprites named th<level>.png / th<level>_*.png
+                "scales": [0.85, 1.0, 1.15],  # Sprite sizes tried relative to the saved sprite
+                "locate_scale": 0.25,  # Frame downscale used to find the Town Hall before classifying it
+                "min_score": 0.7,  # Lower scores leave the level unknown (never rejects a base)
+                "region": None,  # Optional screen region (x, y, width, height) to search
+                "cache_size": 8  # Frames whose result is remembered
+            },
+            "decision_cascade": {
+                "stages": ["signature", "townhall", "ocr", "gemini"],  # Checked in this order until one decides
+                "skip_signatures": [],  # Pixel signatures that mean "skip this base"
+                "attack_signatures": [],  # Pixel signatures that mean "attack this base"
+                "townhall_reject_score": 0.8,  # Town Hall match score needed to skip on level alone
+                "ocr_skip_below": 0.7,  # Skip when fewer than 2 loot types reach this fraction of the minimum
+                "ocr_attack_above": 1.3,  # Attack when 2 loot types exceed the minimum by this factor
+                "ocr_min_confidence": 0.75,  # Glyph score below which an OCR reading is not trusted
+                "uncertain_action": "skip"  # Used when no stage can decide
+            },
+            "ai_payload": {
+                "mode": "crops",  # "crops" = loot panel + Town Hall only, "full" = whole frame
+                "format": "JPEG",  # JPEG, WEBP or PNG
+                "quality": 85,  # JPEG/WebP quality
+                "max_width": 1024,  # Payload images are scaled down to this width
+                "loot_margin": 12,  # Extra pixels around the loot panel crop
+                "townhall_size": [280, 280],  # Crop around the detected Town Hall
+                "townhall_region": None  # Region (x, y, width, height) used when the Town Hall is not detected
+            },
+            "analysis_cache": {
+                "enabled": True,  # Reuse AI results for near-identical frames
+                "max_entries": 256,
+                "ttl": 600,  # Seconds a cached analysis stays valid
+                "max_distance": {"loot": 16, "townhall": 12, "full": 6}  # Differing hash bits allowed per region (one changed digit flips ~50 loot bits)
+            },
+            "auto_attacker": {
+                "attack_sessions": [],
+                "max_search_attempts": 10,
+                "max_townhall_level": 12,  # Bases with a higher Town Hall are skipped
+                "decision_backend": "cascade"  # cascade, gemini, ocr, townhall or mock
+            },
+            "mock_backend": {
+                "verdict": None,  # "attack" or "skip" every time, None for random
+                "attack_rate": 0.5,  # Share of random verdicts that are "attack"
+                "latency": 0.0,  # Seconds each verdict takes
+                "seed": None
             },
             "ai_analyzer": {
                 "google_gemini_api_key": "AIzaSyC5tOcA2HA20BvrDMLlS7UDyFuT",
                 "enabled": False,
                 "min_gold": 300000,
                 "min_elixir": 300000,
-                "min_dark_elixir": 2000
+                "min_dark_elixir": 2000,
+                "model": "gemini-2.5-flash-lite-preview-06-17",
+                "base_url": None,  # Full generateContent URL, e.g. a local stub; None for the public API
+                "record_cassette": None,  # Directory to record answers into for offline replay
+                "decision_deadline": 8.0,  # Seconds the search waits for an AI verdict before skipping the base
+                "workers": 2,  # Background threads running AI requests
+                "request_timeout": 30,  # Seconds per request attempt
+                "max_retries": 3,  # Retries on connection errors, timeouts, 429 and 5xx
+                "backoff_base": 0.5,  # First retry waits up to this long, doubling each time
+                "backoff_max": 8.0,  # Upper bound for one backoff wait (Retry-After is honored up to 30s)
+                "streaming": True,  # Stream the answer and stop reading once the recommendation arrives
+                "max_output_tokens": 160,  # Output budget for the schema-constrained JSON answer
+                "breaker_failures": 3,  # Failed or slow calls in a row that switch to local decisions
+                "breaker_slow_call": 10.0,  # Seconds after which an answer counts as a slow call
+                "breaker_open_seconds": 60,  # How long to stay local before probing Gemini again
+                "hedge_enabled": False,  # Send a backup request when an answer is slower than usual
+                "hedge_percentile": 0.95,  # Recent latency percentile to wait before hedging
+                "hedge_min_delay": 2.0,  # Never hedge sooner than this (seconds)
+                "hedge_max_rate": 0.1,  # At most this fraction of requests is hedged
+                "price_input_per_million": 0.10,  # Cost per million prompt tokens (image included)
+                "price_output_per_million": 0.40,  # Cost per million output tokens
+                "budget_requests_per_hour": None,  # Budgets for the last 60 minutes; when one is used up
+                "budget_tokens_per_hour": None,  # the bot decides locally until it has room again
+                "budget_cost_per_hour": None
             }
         }
     
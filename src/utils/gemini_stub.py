@@ -0,0 +1,301 @@
+"""
+Gemini Stub - Local stand-in for the Gemini API with latency and error injection
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Union
+
+from .http_cassette import HttpCassette
+
+DEFAULT_ANALYSIS = {
+    "loot": {"gold": 450000, "elixir": 420000, "dark_elixir": 3500},
+    "townhall_level": 11,
+    "difficulty": "Medium",
+    "recommendation": "ATTACK",
+    "reasoning": "Stub response"
+}
+
+class LatencyModel:
+    """
+    Response delay distribution, written as "kind:arguments":
+      fixed:0.2             always 0.2 s
+      uniform:0.5,2.0       between 0.5 and 2.0 s
+      lognormal:1.2,0.5     median 1.2 s, sigma 0.5 (long right tail)
+      tail:1.0,10.0,0.05    1.0 s, but 10.0 s for 5% of requests
+    A plain number is the same as fixed.
+    """
+
+    KINDS = ('fixed', 'uniform', 'lognormal', 'tail')
+
+    def __init__(self, kind: str = "fixed", params: Optional[List[float]] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution '{kind}' (use one of {', '.join(self.KINDS)})")
+        self.kind = kind
+        self.params = params or [0.0]
+
+    @classmethod
+    def parse(cls, spec: Union[str, float, int, "LatencyModel", None]) -> "LatencyModel":
+        if isinstance(spec, LatencyModel):
+            return spec
+        if spec is None:
+            return cls()
+        if isinstance(spec, (int, float)) or ":" not in spec:
+            return cls("fixed", [float(spec)])
+        kind, args = spec.split(":", 1)
+        return cls(kind.strip(), [float(v) for v in args.split(",")])
+
+    def sample(self) -> float:
+        p = self.params
+        if self.kind == "uniform":
+            value = random.uniform(p[0], p[1])
+        elif self.kind == "lognormal":
+            value = random.lognormvariate(math.log(max(p[0], 1e-6)), p[1] if len(p) > 1 else 0.5)
+        elif self.kind == "tail":
+            value = p[1] if random.random() < p[2] else p[0]
+        else:
+            value = p[0]
+        return max(0.0, value)
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{','.join(f'{v:g}' for v in self.params)}"
+
+class GeminiStub:
+    """
+    Serves generateContent-style responses on localhost so the analyzer's
+    networking (keep-alive, retries, timeouts) can be exercised offline.
+    streamGenerateContent paths replay the answer as server-sent events.
+    With a cassette, recorded answers are replayed for known requests.
+
+    Usage:
+        stub = GeminiStub(latency="lognormal:1.2,0.5", error_rate=0.1)
+        stub.start()
+        analyzer = AIAnalyzer("test-key", logger, base_url=stub.url)
+
+    Or as a server: python -m src.utils.gemini_stub --port 8765 --cassette cassettes/run1
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: Union[str, float] = 0.0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 1.0,
+                 analysis: Optional[Dict] = None, chunk_size: int = 24, chunk_delay: float = 0.0,
+                 stream_chunks: Optional[List[str]] = None, cassette: Optional[HttpCassette] = None,
+                 strict: bool = False, replay_latency: bool = False):
+        """
+        Args:
+            latency: Seconds each response is delayed, or a LatencyModel spec
+            error_rate: Fraction of requests answered with 503
+            rate_limit_rate: Fraction of requests answered with 429 and Retry-After
+            retry_after: Retry-After value sent with 429 responses
+            analysis: JSON the "model" returns (DEFAULT_ANALYSIS if not given)
+            chunk_size: Characters of the answer per streamed event (streamGenerateContent)
+            chunk_delay: Seconds between streamed events
+            stream_chunks: Canned text chunks to replay instead of splitting the analysis
+            cassette: Recorded answers, looked up by request payload
+            strict: Answer 404 for requests missing from the cassette instead of using analysis
+            replay_latency: Delay cassette answers by their recorded latency instead of the latency model
+        """
+        self.latency = LatencyModel.parse(latency)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.analysis = analysis or DEFAULT_ANALYSIS
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.stream_chunks = stream_chunks
+        self.cassette = cassette
+        self.strict = strict
+        self.replay_latency = replay_latency
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'rate_limited': 0,
+                      'streams': 0, 'chunks_sent': 0, 'streams_aborted': 0,
+                      'cassette_hits': 0, 'cassette_misses': 0}
+
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1beta/models/stub:generateContent"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+            # Headers and body go out in separate writes; with Nagle on, every reused
+            # connection would wait out the client's delayed ACK (~40 ms)
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                request_body = self.rfile.read(length)
+                status, headers, body, analysis = stub._respond(request_body)
+                if status == 200 and "streamGenerateContent" in self.path:
+                    self._stream(analysis, stub._prompt_tokens(request_body))
+                    return
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (timeout or cancelled request)
+                    self.close_connection = True
+
+            def _stream(self, analysis: Dict, prompt_tokens: int):
+                """Server-sent events in chunked encoding, one event per answer chunk"""
+                try:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/event-stream')
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    self.end_headers()
+                    output = ""
+                    for index, text in enumerate(stub._chunks(analysis)):
+                        if index and stub.chunk_delay:
+                            time.sleep(stub.chunk_delay)
+                        output += text
+                        event = json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}],
+                                            "usageMetadata": stub._usage(prompt_tokens, output)})
+                        data = f"data: {event}\r\n\r\n".encode()
+                        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                        self.wfile.flush()
+                        with stub.lock:
+                            stub.stats['chunks_sent'] += 1
+                    self.wfile.write(b"0\r\n\r\n")
+                    with stub.lock:
+                        stub.stats['streams'] += 1
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client read what it needed and closed the stream
+                    with stub.lock:
+                        stub.stats['streams_aborted'] += 1
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _lookup(self, request_body: bytes) -> Optional[Dict]:
+        """Cassette entry recorded for this request body"""
+        try:
+            entry = self.cassette.lookup(json.loads(request_body or b"{}"))
+        except ValueError:
+            entry = None
+        with self.lock:
+            self.stats['cassette_hits' if entry else 'cassette_misses'] += 1
+        return entry
+
+    def _respond(self, request_body: bytes = b""):
+        """Pick the outcome for one request: (status, headers, body, analysis)"""
+        with self.lock:
+            self.stats['requests'] += 1
+
+        analysis = self.analysis
+        latency = None
+        if self.cassette is not None:
+            entry = self._lookup(request_body)
+            if entry:
+                analysis = entry['analysis']
+                if self.replay_latency:
+                    latency = entry.get('latency', 0.0)
+            elif self.strict:
+                body = json.dumps({"error": {"code": 404, "status": "NOT_FOUND",
+                                             "message": "Request not in cassette"}}).encode()
+                return 404, {}, body, None
+
+        latency = self.latency.sample() if latency is None else latency
+        if latency:
+            time.sleep(latency)
+
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            with self.lock:
+                self.stats['rate_limited'] += 1
+            body = json.dumps({"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}}).encode()
+            return 429, {'Retry-After': str(self.retry_after)}, body, None
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self.lock:
+                self.stats['errors'] += 1
+            body = json.dumps({"error": {"code": 503, "status": "UNAVAILABLE"}}).encode()
+            return 503, {}, body, None
+
+        text = json.dumps(analysis)
+        body = json.dumps({
+            "candidates": [{"content": {"parts": [{"text": text}]}}],
+            "usageMetadata": self._usage(self._prompt_tokens(request_body), text)
+        }).encode()
+        return 200, {}, body, analysis
+
+    @staticmethod
+    def _prompt_tokens(request_body: bytes) -> int:
+        """Token count billed for a request: ~4 characters per text token, 258 per image"""
+        try:
+            parts = json.loads(request_body)['contents'][0]['parts']
+        except (ValueError, KeyError, IndexError, TypeError):
+            return 0
+        return sum(len(p['text']) // 4 if 'text' in p else 258 for p in parts)
+
+    @staticmethod
+    def _usage(prompt_tokens: int, output: str) -> Dict:
+        """usageMetadata block; output counts are cumulative, as in a real stream"""
+        output_tokens = max(1, len(output) // 4)
+        return {"promptTokenCount": prompt_tokens, "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens}
+
+    def _chunks(self, analysis: Optional[Dict] = None) -> List[str]:
+        """Text pieces of one streamed answer"""
+        if self.stream_chunks is not None:
+            return list(self.stream_chunks)
+        text = json.dumps(analysis or self.analysis)
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+def main():
+    """Run the stub as a standalone server (point ai_analyzer.base_url at the printed URL)"""
+    parser = argparse.ArgumentParser(description="Local Gemini API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="0", help='Delay spec, e.g. "0.3", "lognormal:1.2,0.5", "tail:1,10,0.05"')
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 answers")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of 429 answers")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with 429")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument("--cassette", help="Directory of recorded answers to replay")
+    parser.add_argument("--strict", action="store_true", help="404 for requests missing from the cassette")
+    parser.add_argument("--replay-latency", action="store_true", help="Use the recorded latency of cassette answers")
+    args = parser.parse_args()
+
+    cassette = HttpCassette(args.cassette) if args.cassette else None
+    stub = GeminiStub(args.host, args.port, args.latency, args.error_rate, args.rate_limit_rate, args.retry_after,
+                      chunk_delay=args.chunk_delay, cassette=cassette, strict=args.strict,
+                      replay_latency=args.replay_latency)
+    print(f"Gemini stub listening on {stub.url}")
+    print(f"Latency {stub.latency}, errors {args.error_rate:.0%}, rate limited {args.rate_limit_rate:.0%}"
+          + (f", cassette {args.cassette} ({len(cassette)} answers)" if cassette else ""))
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+        print(f"Stopped: {stub.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+HTTP Cassette - Recorded Gemini answers keyed by request payload, for offline replay
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+class HttpCassette:
+    """
+    A directory of recorded request/answer pairs, one JSON file per
+    request. The key is a hash of the request payload (prompt, image and
+    generation settings, not the API key), so replaying the same frames
+    with the same settings finds the same answers. Streamed and plain
+    requests share a key: the answer is stored as the model's JSON and
+    the stub serves it either way.
+
+    Record with ai_analyzer.record_cassette, replay with
+    GeminiStub(cassette=HttpCassette(path)).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def key_for(payload: Dict) -> str:
+        """Stable hash of a request payload"""
+        canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+
+    def record(self, payload: Dict, analysis: Dict, latency: float, status: int = 200) -> str:
+        """Store the answer to a request; returns its key"""
+        key = self.key_for(payload)
+        parts = payload.get('contents', [{}])[0].get('parts', [])
+        prompt = next((p['text'] for p in parts if 'text' in p), "")
+        image = next((p['inline_data'] for p in parts if 'inline_data' in p), {})
+        entry = {
+            'key': key,
+            'recorded': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'request': {
+                'prompt': prompt,
+                'mime_type': image.get('mime_type'),
+                'image_bytes': len(image.get('data', '')) * 3 // 4
+            },
+            'status': status,
+            'latency': latency,
+            'analysis': analysis
+        }
+        with self.lock:
+            with open(self._file(key), 'w') as f:
+                json.dump(entry, f, indent=2)
+        return key
+
+    def lookup(self, payload: Dict) -> Optional[Dict]:
+        """Recorded entry for this request payload, None if it was never recorded"""
+        path = self._file(self.key_for(payload))
+        if not os.path.exists(path):
+            return None
+        with self.lock:
+            with open(path, 'r') as f:
+                return json.load(f)
+
+    def keys(self) -> List[str]:
+        return sorted(f[:-5] for f in os.listdir(self.path) if f.endswith('.json'))
+
+    def __len__(self) -> int:
+        return len(self.keys())
@@ -0,0 +1,47 @@
+"""
+Metrics - Small helpers for latency statistics
+"""
+
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 if empty)"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+class LatencyTracker:
+    """Keeps the most recent latencies (seconds) and reports percentiles in milliseconds"""
+
+    def __init__(self, max_samples: int = 1000):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency in seconds at the given fraction (0.5 = median), None without samples"""
+        with self.lock:
+            values = sorted(self.samples)
+        return percentile(values, fraction) if values else None
+
+    def get_stats(self) -> Dict:
+        """Sample count, mean and p50/p95/p99 in milliseconds"""
+        with self.lock:
+            values = sorted(self.samples)
+            count = self.count
+        return {
+            'count': count,
+            'mean_ms': sum(values) / max(len(values), 1) * 1000,
+            'p50_ms': percentile(values, 0.50) * 1000,
+            'p95_ms': percentile(values, 0.95) * 1000,
+            'p99_ms': percentile(values, 0.99) * 1000,
+            'max_ms': (values[-1] if values else 0.0) * 1000
+        }
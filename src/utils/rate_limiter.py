@@ -0,0 +1,72 @@
+"""
+Rate Limiter - Token bucket shared by threads that call a rate-limited API
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+class TokenBucket:
+    """
+    Allows rate requests per second on average with bursts of up to
+    burst requests. acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity (the bucket starts full)
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.stats = {'acquired': 0, 'waits': 0, 'wait_time': 0.0}
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now"""
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.stats['acquired'] += 1
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a token; False if none became available within timeout"""
+        start = time.monotonic()
+        waited = False
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.stats['acquired'] += 1
+                    if waited:
+                        self.stats['waits'] += 1
+                        self.stats['wait_time'] += now - start
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if timeout is not None and now + wait - start > timeout:
+                return False
+            waited = True
+            time.sleep(wait)
+
+    def get_stats(self) -> Dict:
+        """Tokens handed out and time callers spent waiting for them"""
+        with self.lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'acquired': self.stats['acquired'],
+                'waits': self.stats['waits'],
+                'wait_seconds': self.stats['wait_time']
+            }